@@ -1,10 +1,16 @@
 import json
 from pathlib import Path
 
-from webhook_handler.models import LLM, PipelineInputs, PullRequestData
-from webhook_handler.services import (Config, CSTBuilder, DockerService,
+from webhook_handler.helper import general
+from webhook_handler.models import (LLM, AdmissionDecision, PipelineInputs,
+                                    PullRequestData)
+from webhook_handler.services import (AdmissionPolicy, CodeReducer, Config,
+                                      ContainerPool, CSTBuilder,
+                                      DockerService, FileClassifier,
                                       GitHubService, LLMHandler,
-                                      PullRequestDiffContext, TestGenerator)
+                                      ParserPool, ParseTreeCache,
+                                      PullRequestDiffContext, SymbolIndex,
+                                      TestGenerator)
 
 
 class BotRunner:
@@ -21,12 +27,26 @@ class BotRunner:
         self._environment_prepared = False
 
         self._gh_service = GitHubService(config, self._pr_data)
+        self._file_classifier = FileClassifier.for_repository(
+            self._pr_data.repo, config.file_rules_path
+        )
+        self._admission_policy = AdmissionPolicy(config)
+        self._parser_pool = ParserPool.shared(
+            config.parser_pool_size, config.parse_timeout_seconds
+        )
+        self._parse_cache = ParseTreeCache(config.parse_cache_max_bytes)
+        self._admission_decision = None
+        self._raw_files = None
         self._issue_statement = None
         self._pr_diff_ctx = None
         self._pipeline_inputs = None
         self._llm_handler = None
         self._docker_service = None
         self._cst_builder = None
+        self._symbol_index = None
+        self._code_before = None  # source files before the PR, without test-only items
+        self._code_sliced = None  # slices of the changed source files, for sliced-only PRs
+        self._compiler_errors = None  # of the previous attempt, fed back to the next prompt
 
     def is_valid_pr(self) -> tuple[str, bool]:
         """
@@ -47,8 +67,16 @@ class BotRunner:
             self._pdf_candidate = None
             return "No linked issue found", False
 
+        if self._admit_pr() == AdmissionDecision.REJECT:
+            self._issue_statement = None
+            return "PR is too large", False
+
         self._pr_diff_ctx = PullRequestDiffContext(
-            self._pr_data.base_commit, self._pr_data.head_commit, self._gh_service
+            self._pr_data.base_commit,
+            self._pr_data.head_commit,
+            self._gh_service,
+            self._file_classifier,
+            self._raw_files,
         )
         if not self._pr_diff_ctx.fulfills_requirements:
             # helpers.remove_dir(self._config.pr_log_dir)
@@ -94,6 +122,7 @@ class BotRunner:
 
         try:
             result = generator.generate()
+            print(f"Parse cache: {self._parse_cache.stats()}")
             assert self._config.output_dir is not None
             gen_test = Path(
                 self._config.output_dir, "generation", "generated_test.txt"
@@ -107,6 +136,8 @@ class BotRunner:
         except Exception as e:
             print(f"Failed with unexpected error:\n{e}")
             return False
+        finally:
+            self._compiler_errors = generator.compiler_errors
 
     def prepare_environment(self, curr_attempt: int, model: LLM) -> None:
         """
@@ -137,10 +168,18 @@ class BotRunner:
         # Create a generation subdirectory within the attempt directory
         Path(attempt_instance_dir, "generation").mkdir(parents=True, exist_ok=True)
 
+        # Check the size of the PR before fetching the file contents
+        if self._admit_pr() == AdmissionDecision.REJECT:
+            raise Exception("PR is too large")
+
         # Get the file contents
         if self._pr_diff_ctx is None:
             self._pr_diff_ctx = PullRequestDiffContext(
-                self._pr_data.base_commit, self._pr_data.head_commit, self._gh_service
+                self._pr_data.base_commit,
+                self._pr_data.head_commit,
+                self._gh_service,
+                self._file_classifier,
+                self._raw_files,
             )
         if len(self._pr_diff_ctx.source_code_file_diffs) == 0:
             raise Exception("No source code changes found in PR")
@@ -159,13 +198,43 @@ class BotRunner:
         #     self._gh_service.clone_repo(update=True)
 
         # Get the PR diff and stuff like that
-
-        self._cst_builder = CSTBuilder(self._config.parsing_language, self._pr_diff_ctx)
-        # Check if this line is necessary
-        # code_sliced = self._cst_builder.get_sliced_code_files()
+        if self._symbol_index is None:
+            self._symbol_index = self._load_symbol_index()
+
+        # The parse cache is shared by all attempts of this PR
+        self._cst_builder = CSTBuilder(
+            self._parser_pool,
+            self._pr_diff_ctx,
+            self._parse_cache,
+            self._config.slicing_workers,
+            self._symbol_index,
+        )
+        # The source files are sent without their test-only items, sliced-only PRs are too large for
+        # the whole files, so the slices of the changed files are sent instead (computed once per PR)
+        if self._admission_decision == AdmissionDecision.SLICED_ONLY:
+            if self._code_sliced is None:
+                self._code_sliced = self._cst_builder.get_sliced_code_files()
+        elif self._code_before is None:
+            self._code_before = self._pr_diff_ctx.remove_tests_from_code_before(
+                CodeReducer(self._parser_pool)
+            )
 
         # Build docker image if not exists
-        self._docker_service = DockerService(self._config.root_dir, self._pr_data)
+        # Test containers are pooled across attempts and PRs
+        container_pool = ContainerPool.shared(
+            self._config.container_pool_size,
+            self._config.container_idle_timeout_seconds,
+            self._config.target_cache_max_volumes,
+            self._config.target_cache_max_bytes,
+        )
+        self._docker_service = DockerService(
+            self._config.root_dir,
+            self._pr_data,
+            container_pool,
+            self._config.test_timeout_seconds,
+            self._config.libtest_json,
+            self._config.test_output_max_bytes,
+        )
 
         owner = self._pr_data.owner
         dockerfile_path = Path(
@@ -173,16 +242,88 @@ class BotRunner:
         )
         self._docker_service.build_image(dockerfile_path)
 
+        self._prepare_attempt_inputs()
+
+    def _prepare_attempt_inputs(self) -> None:
+        """
+        Gathers the pipeline data of the next attempt, including the compiler errors of the previous one, and sets up its LLM handler.
+        """
+
         # Gather Pipeline data
         self._pipeline_inputs = PipelineInputs(
             pr_data=self._pr_data,
             pr_diff_ctx=self._pr_diff_ctx,
-            # code_sliced,
+            code_sliced=self._code_sliced,
             problem_statement=self._issue_statement,
+            # unit tests live in the test module of the code they test, so the test goes into the first changed file
+            filename_to_insert_test=self._pr_diff_ctx.code_names[0],
+            test_file_content=self._pr_diff_ctx.code_before[0],
+            sliced_only=self._admission_decision == AdmissionDecision.SLICED_ONLY,
+            changed_symbols=self._cst_builder.get_changed_symbols(),
+            compiler_errors=self._compiler_errors,
+            code_before=self._code_before,
         )
 
         # Setup LLM handler
-        self._llm_handler = LLMHandler(self._config, self._pipeline_inputs)
+        self._llm_handler = LLMHandler(
+            self._config, self._pipeline_inputs, self._symbol_index
+        )
+
+    def _admit_pr(self) -> AdmissionDecision:
+        """
+        Estimates the size of the PR from the metadata of its changed files and applies the admission policy.
+        The decision is only computed once per PR.
+
+        Returns:
+            AdmissionDecision: Whether the PR is accepted, accepted in "sliced only" mode or rejected
+        """
+
+        if self._admission_decision is None:
+            self._raw_files = self._gh_service.fetch_pr_files()
+            estimate = self._admission_policy.estimate(
+                self._raw_files, self._file_classifier, self._issue_statement or ""
+            )
+            self._admission_decision = self._admission_policy.decide(estimate)
+            print(
+                f"Estimated prompt size: {estimate.estimated_prompt_chars} chars "
+                f"({estimate.changes} changed lines in {estimate.source_files} files), "
+                f"admission: {self._admission_decision}"
+            )
+        return self._admission_decision
+
+    def _load_symbol_index(self) -> SymbolIndex | None:
+        """
+        Opens the symbol index of the base commit, building it from the cloned repository if it does not exist yet.
+        A clone made only for the index is removed again once it is built.
+        The index only adds context to the prompt, so the pipeline continues without it on failure.
+
+        Returns:
+            SymbolIndex | None: The symbol index, None if it is disabled or could not be built
+        """
+
+        if not self._config.symbol_index_path:
+            return None
+
+        symbol_index = SymbolIndex(
+            Path(self._config.symbol_index_path),
+            f"{self._pr_data.owner}/{self._pr_data.repo}",
+            self._pr_data.base_commit,
+        )
+        if not symbol_index.is_built:
+            clone_dir = Path(self._config.cloned_repo_dir)
+            cloned = not clone_dir.exists()
+            try:
+                if cloned:
+                    self._gh_service.clone_repo()
+                count = symbol_index.build(clone_dir, self._parser_pool)
+                print(f"Symbol index built, {count} new files parsed")
+            except Exception as e:
+                print(f"Could not build symbol index: {e}")
+                return None
+            finally:
+                if cloned:
+                    general.remove_dir(clone_dir)
+        return symbol_index
 
     def _record_result(
         self, number: str, model: LLM, i_attempt: int, stop: bool | str
@@ -13,3 +13,50 @@ PROMPT_COMBINATIONS_GEN: dict[str, list[int | str]] = {
 
 def get_total_attempts() -> int:
     return len(PROMPT_COMBINATIONS_GEN["include_golden_code"])
+
+
+# Used to estimate the prompt size of a PR before any file contents are fetched
+PROMPT_TEMPLATE_CHARS = 2500  # guidelines, instructions and example of the prompt
+AVG_CHANGED_LINE_CHARS = 45  # used when GitHub omits the patch of a file (large diffs)
+FUNCTION_CONTEXT_FACTOR = (
+    4  # size of the function-context patch relative to the plain patch
+)
+
+
+# Glob (or "re:"-prefixed regex) rules per repository, matched against the path relative
+# to the repository root. Categories are checked in the order given here, so a file under
+# "tests/" is a test file even though it also ends with ".rs".
+# Only manifest and build script changes are non-source files, other files (e.g. Cargo.lock,
+# examples/*.rs or docs) are "other" and do not reject a PR.
+# The rules of a repository can be overridden through the JSON file in FILE_RULES_PATH.
+DEFAULT_FILE_RULES: dict[str, list[str]] = {
+    "test": [
+        "tests/**",
+        "**/tests/**",
+        "benches/**",
+        "**/benches/**",
+        "**/tests.rs",
+    ],
+    "source": [
+        "src/**/*.rs",
+        "**/src/**/*.rs",
+    ],
+    "non_source": [
+        "Cargo.toml",
+        "**/Cargo.toml",
+        "build.rs",
+        "**/build.rs",
+    ],
+}
+
+FILE_CLASSIFICATION_RULES: dict[str, dict[str, list[str]]] = {
+    "default": DEFAULT_FILE_RULES,
+    "rust-code-analysis": {
+        **DEFAULT_FILE_RULES,
+        "source": [
+            "src/**/*.rs",
+            "rust-code-analysis-cli/src/**/*.rs",
+            "rust-code-analysis-web/src/**/*.rs",
+        ],
+    },
+}
@@ -1,3 +1,3 @@
-from . import general, git_diff, logger, templates
+from . import general, git_diff, libtest, logger, templates
 
-__all__ = ["logger", "templates", "git_diff", "general"]
+__all__ = ["logger", "templates", "git_diff", "general", "libtest"]
@@ -2,7 +2,10 @@ import os
 import shutil
 import stat
 import time
-from pathlib import Path
+from pathlib import Path, PurePosixPath
+
+# directories holding the root files of a crate's targets (library, binaries, integration tests, ...)
+CRATE_TARGET_DIRS = {"src", "tests", "benches", "examples"}
 
 
 def remove_dir(
@@ -37,3 +40,97 @@ def remove_dir(
             else:
                 pass
                 #  logger.error(f"Final attempt failed removing {path}, must be removed manually: {e}")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Roughly estimates the number of LLM tokens of a text (about four characters per token for code).
+
+    Parameters:
+        text (str): The text to estimate
+
+    Returns:
+        int: The estimated number of tokens
+    """
+
+    return (len(text) + 3) // 4
+
+
+def get_module_path(file_name: str) -> list[str]:
+    """
+    Derives the module path of a Rust file from its location in the crate,
+    e.g. src/parser/mod.rs -> [parser], src/lib.rs -> [], tests/cli.rs -> [] (own test crate).
+
+    Parameters:
+        file_name (str): The path of the file within the repository
+
+    Returns:
+        list: The modules leading to the file, empty for the root file of a target
+    """
+
+    parts = PurePosixPath(file_name).with_suffix("").parts
+    root = _find_target_root(parts)
+    if root is None:
+        return []
+
+    modules = list(parts[root + 1 :])
+    if parts[root] != "src":
+        modules = modules[1:]  # tests/<target>.rs or tests/<target>/...
+    elif modules[:1] == ["bin"]:
+        modules = modules[2:]  # src/bin/<target>.rs or src/bin/<target>/...
+    elif modules == ["lib"]:
+        modules = []
+    if modules[-1:] in (["main"], ["mod"]):
+        modules = modules[:-1]
+    return modules
+
+
+def get_cargo_test_target(file_name: str) -> tuple[str, list[str]]:
+    """
+    Derives the crate directory and the cargo target selecting the tests of a Rust file,
+    e.g. tests/cli.rs -> ("", [--test, cli]), core/src/parser.rs -> (core, [--lib]).
+
+    Parameters:
+        file_name (str): The path of the file within the repository
+
+    Returns:
+        str: The directory of the crate within the repository, empty for the root crate
+        list: The cargo arguments selecting the target of the file
+    """
+
+    parts = PurePosixPath(file_name).with_suffix("").parts
+    root = _find_target_root(parts)
+    if root is None:
+        return "", []
+
+    crate_dir = "/".join(parts[:root])
+    rest = parts[root + 1 :]
+    if parts[root] != "src":
+        kind = {"tests": "--test", "benches": "--bench", "examples": "--example"}
+        return crate_dir, [kind[parts[root]], rest[0]] if rest else []
+    if rest[:1] == ("bin",) and len(rest) > 1:
+        return crate_dir, ["--bin", rest[1]]
+    if rest == ("main",):
+        return crate_dir, ["--bins"]
+    return crate_dir, ["--lib"]
+
+
+def _find_target_root(parts: tuple[str, ...]) -> int | None:
+    """
+    Finds the directory holding the target of a Rust file. The file name itself is never a target directory
+    (e.g. src/examples.rs), neither is a module directory within src (e.g. src/tests/mod.rs).
+
+    Parameters:
+        parts (tuple): The parts of the file path, without extension
+
+    Returns:
+        int | None: The index of the target directory in parts, None if the file is not within one
+    """
+
+    root = None
+    for i, part in enumerate(parts[:-1]):
+        if part in CRATE_TARGET_DIRS:
+            root = i
+            if part == "src":
+                break
+    return root
@@ -1,8 +1,12 @@
 import os
+import re
 import subprocess
 from pathlib import Path
 
 from webhook_handler.helper import general
+from webhook_handler.models.diff_hunk import DiffHunk
+
+HUNK_HEADER_REGEX = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
 
 
 def unified_diff(
@@ -56,6 +60,65 @@ def unified_diff(
     return git_header + "".join(diff)
 
 
+def parse_hunks(diff: str) -> list[DiffHunk]:
+    """
+    Splits a unified diff of one file into its hunks in a single pass. The hunk headers
+    determine how many lines belong to each hunk, so added or removed lines starting
+    with "++" or "--" are not mistaken for file headers.
+
+    Parameters:
+        diff (str): The diff to parse
+
+    Returns:
+        list: The hunks of the diff
+    """
+
+    hunks: list[DiffHunk] = []
+    diff_lines = diff.splitlines()
+    i = 0
+
+    while i < len(diff_lines):
+        match = HUNK_HEADER_REGEX.match(diff_lines[i])
+        i += 1
+        if not match:
+            continue
+
+        hunk = DiffHunk(
+            old_start=int(match.group(1)),
+            old_count=int(match.group(2) or 1),
+            new_start=int(match.group(3)),
+            new_count=int(match.group(4) or 1),
+        )
+        hunks.append(hunk)
+
+        # line counters
+        current_line_original = hunk.old_start - 1
+        current_line_updated = hunk.new_start - 1
+        old_remaining = hunk.old_count
+        new_remaining = hunk.new_count
+
+        while i < len(diff_lines) and (old_remaining > 0 or new_remaining > 0):
+            patch_line = diff_lines[i]
+            i += 1
+            if patch_line.startswith("+"):
+                current_line_updated += 1
+                new_remaining -= 1
+                hunk.added.append((current_line_updated, patch_line[1:]))
+            elif patch_line.startswith("-"):
+                current_line_original += 1
+                old_remaining -= 1
+                hunk.removed.append((current_line_original, patch_line[1:]))
+            elif patch_line.startswith("\\"):
+                continue  # "\ No newline at end of file"
+            else:
+                current_line_original += 1
+                current_line_updated += 1
+                old_remaining -= 1
+                new_remaining -= 1
+
+    return hunks
+
+
 def unified_diff_with_function_context(
     original: str, modified: str, fname: str = "tempfile.rs", context_lines: int = 3
 ) -> str:
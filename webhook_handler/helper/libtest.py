@@ -0,0 +1,169 @@
+import json
+import re
+
+from webhook_handler.models import CargoTestResult, TestCaseResult, TestOutcome
+
+# lines kept of the failure section of a test
+MAX_FAILURE_LINES = 200
+# error diagnostics kept of a failed build, and lines kept of each
+MAX_COMPILER_ERRORS = 5
+MAX_COMPILER_ERROR_LINES = 40
+
+# cargo prints one "Running" line per test binary it executes (one "Executable" line with --no-run),
+# so there is none if compilation failed
+RUNNING_REGEX = re.compile(r"^\s*(Running|Executable)\b")
+COMPILE_FAILED_REGEX = re.compile(r"^error: could not compile\b")
+COMPILER_ERROR_REGEX = re.compile(r"^error(\[E\d+\])?: ")
+TEST_LINE_REGEX = re.compile(r"^test (\S+) \.\.\. (ok|FAILED|ignored)\b")
+FAILURE_SECTION_REGEX = re.compile(r"^---- (\S+) stdout ----$")
+FAILURE_SECTION_END_REGEX = re.compile(r"^(failures:|test result:)")
+PANIC_REGEX = re.compile(
+    r"^thread '[^']*' panicked at [^\n]*\n?(.*?)(?=^note: |^stack backtrace:|\Z)",
+    re.MULTILINE | re.DOTALL,
+)
+
+TEXT_OUTCOMES = {
+    "ok": TestOutcome.PASSED,
+    "FAILED": TestOutcome.FAILED,
+    "ignored": TestOutcome.IGNORED,
+}
+JSON_OUTCOMES = {
+    "ok": TestOutcome.PASSED,
+    "failed": TestOutcome.FAILED,
+    "timeout": TestOutcome.FAILED,
+    "ignored": TestOutcome.IGNORED,
+}
+
+
+class LibtestParser:
+    """
+    Parses the output of `cargo test` line by line while it is produced, in the libtest text format
+    or JSON format (-Z unstable-options --format json). Only the test results are kept, not the output.
+    """
+
+    def __init__(self, tests_to_run: list[str]) -> None:
+        self._tests_to_run = tests_to_run
+        self._tests: list[TestCaseResult] = []
+        self._failure_lines: dict[str, list[str]] = {}
+        self._section: list[str] | None = None  # lines of the current failure section
+        self._compiler_errors: list[list[str]] = []
+        self._diagnostic: list[str] | None = (
+            None  # lines of the current error diagnostic
+        )
+        self.compiled = False
+        self.compile_failed = False
+
+    def feed_line(self, line: str) -> None:
+        """
+        Parameters:
+            line (str): The next line of the output, without line break
+        """
+
+        if line.startswith("{"):
+            self._feed_json_event(line)
+            return
+
+        if not self.compiled and self._feed_diagnostic_line(line):
+            return
+
+        section = FAILURE_SECTION_REGEX.match(line)
+        if section:
+            self._section = self._failure_lines.setdefault(section.group(1), [])
+            return
+        if self._section is not None:
+            if not FAILURE_SECTION_END_REGEX.match(line):
+                if len(self._section) < MAX_FAILURE_LINES:
+                    self._section.append(line)
+                return
+            self._section = None
+
+        test = TEST_LINE_REGEX.match(line)
+        if test:
+            self._tests.append(
+                TestCaseResult(test.group(1), TEXT_OUTCOMES[test.group(2)])
+            )
+        elif RUNNING_REGEX.match(line):
+            self.compiled = True
+        elif COMPILE_FAILED_REGEX.match(line):
+            self.compile_failed = True
+
+    def result(self, timed_out: bool, output: str = "") -> CargoTestResult:
+        """
+        Parameters:
+            timed_out (bool): Whether the run was killed by the timeout
+            output (str, optional): The output, if kept by the caller
+
+        Returns:
+            CargoTestResult: The compilation status and the result of each test
+        """
+
+        for test in self._tests:
+            message = test.message or "\n".join(self._failure_lines.get(test.name, []))
+            if test.outcome != TestOutcome.FAILED:
+                continue
+            panic = PANIC_REGEX.search(message)
+            test.panicked = panic is not None
+            test.message = panic.group(1).strip() if panic else message.strip()
+
+        ran = {test.name for test in self._tests}
+        return CargoTestResult(
+            compiled=self.compiled and not self.compile_failed,
+            timed_out=timed_out,
+            output=output,
+            tests=self._tests,
+            missing=[name for name in self._tests_to_run if name not in ran],
+            compiler_errors=["\n".join(lines) for lines in self._compiler_errors],
+        )
+
+    def _feed_diagnostic_line(self, line: str) -> bool:
+        """
+        Collects the error diagnostics printed by cargo before the tests run, a diagnostic ends at a blank line.
+
+        Parameters:
+            line (str): The next line of the output, without line break
+
+        Returns:
+            bool: True if the line belongs to an error diagnostic
+        """
+
+        if COMPILE_FAILED_REGEX.match(line):
+            self._diagnostic = None
+            return False
+        if self._diagnostic is not None:
+            if line:
+                if len(self._diagnostic) < MAX_COMPILER_ERROR_LINES:
+                    self._diagnostic.append(line)
+                return True
+            self._diagnostic = None
+        if (
+            COMPILER_ERROR_REGEX.match(line)
+            and len(self._compiler_errors) < MAX_COMPILER_ERRORS
+        ):
+            self._diagnostic = [line]
+            self._compiler_errors.append(self._diagnostic)
+            return True
+        return False
+
+    def _feed_json_event(self, line: str) -> None:
+        """
+        Parameters:
+            line (str): A line which may hold a libtest JSON event
+        """
+
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            return
+        if not isinstance(event, dict) or event.get("type") != "test":
+            return
+        outcome = JSON_OUTCOMES.get(event.get("event"))
+        if outcome is None:
+            return  # "started" events
+        self._tests.append(
+            TestCaseResult(
+                name=event["name"],
+                outcome=outcome,
+                message=event.get("stdout", ""),
+                duration_seconds=event.get("exec_time"),
+            )
+        )
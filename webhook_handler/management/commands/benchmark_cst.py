@@ -0,0 +1,79 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from webhook_handler.services import Config
+from webhook_handler.services.cst_benchmark import CSTBenchmark
+
+TEST_DATA_DIR = Path(__file__).resolve().parents[2] / "test" / "test_data"
+
+
+#
+# RUN With: python manage.py benchmark_cst --baseline cst_baseline.json
+#
+class Command(BaseCommand):
+    help = "Benchmarks the CSTBuilder operations on the recorded PR payloads (offline, from BLOB_CACHE_DIR)."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--repo", help="Only benchmark the payloads of this repository"
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=5, help="How often every call is timed"
+        )
+        parser.add_argument(
+            "--baseline", help="Baseline JSON file to compare the median durations with"
+        )
+        parser.add_argument(
+            "--save-baseline",
+            action="store_true",
+            help="Write the results to the baseline file instead of comparing",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Allowed slowdown against the baseline (default: 0.2 = 20%%)",
+        )
+
+    def handle(self, *args, **options) -> None:
+        if options["save_baseline"] and not options["baseline"]:
+            raise CommandError("--save-baseline requires --baseline")
+
+        benchmark = CSTBenchmark(Config())
+        pattern = f"{options['repo']}/pr_*.json" if options["repo"] else "*/pr_*.json"
+        payloads = [
+            json.loads(payload_path.read_text(encoding="utf-8"))
+            for payload_path in sorted(TEST_DATA_DIR.glob(pattern))
+        ]
+        corpus = benchmark.load_corpus(payloads)
+        if not corpus:
+            raise CommandError(
+                "No cached PRs with Rust changes found, run profile_diffs with BLOB_CACHE_DIR set first"
+            )
+
+        results = benchmark.run(corpus, options["repeat"])
+        self.stdout.write(
+            f"{len(corpus)} PRs, {options['repeat']} repetitions\n"
+            f"{'operation':<32}{'calls':>7}{'MiB/s':>9}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'peak KiB':>10}"
+        )
+        for stats in results:
+            self.stdout.write(
+                f"{stats.name:<32}{stats.calls:>7}{stats.mib_per_second:>9.2f}"
+                f"{stats.p50_ms:>9.2f}{stats.p90_ms:>9.2f}{stats.p99_ms:>9.2f}"
+                f"{stats.peak_bytes / 1024:>10.0f}"
+            )
+
+        if not options["baseline"]:
+            return
+        baseline_path = Path(options["baseline"])
+        if options["save_baseline"] or not baseline_path.is_file():
+            CSTBenchmark.save_baseline(results, baseline_path)
+            self.stderr.write(f"Baseline written to {baseline_path}")
+            return
+
+        regressions = CSTBenchmark.compare(results, baseline_path, options["threshold"])
+        if regressions:
+            raise CommandError("Regressions:\n" + "\n".join(regressions))
+        self.stderr.write(f"No regressions against {baseline_path}")
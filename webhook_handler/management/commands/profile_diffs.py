@@ -0,0 +1,91 @@
+import csv
+import json
+import sys
+from dataclasses import asdict
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from webhook_handler.services import Config
+from webhook_handler.services.diff_profiler import DiffProfiler
+
+TEST_DATA_DIR = Path(__file__).resolve().parents[2] / "test" / "test_data"
+
+CSV_COLUMNS = [
+    "repo",
+    "number",
+    "fetch_seconds",
+    "name",
+    "category",
+    "bytes_before",
+    "bytes_after",
+    "lines_added",
+    "lines_removed",
+    "hunks",
+    "patch_bytes",
+    "diff_seconds",
+    "parse_seconds",
+]
+
+
+#
+# RUN With: python manage.py profile_diffs --repo grcov --format csv --output diff_stats.csv
+#
+class Command(BaseCommand):
+    help = "Walks the recorded PR payloads and reports diff/parse statistics per PR and per file."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--repo", help="Only profile the payloads of this repository"
+        )
+        parser.add_argument("--format", choices=["json", "csv"], default="json")
+        parser.add_argument("--output", help="Output file (default: stdout)")
+        parser.add_argument(
+            "--offline",
+            action="store_true",
+            help="Only use the blob cache in BLOB_CACHE_DIR, never query GitHub",
+        )
+
+    def handle(self, *args, **options) -> None:
+        config = Config()
+        if options["offline"]:
+            config.github_offline = True
+        profiler = DiffProfiler(config)
+
+        pattern = f"{options['repo']}/pr_*.json" if options["repo"] else "*/pr_*.json"
+        payload_paths = sorted(TEST_DATA_DIR.glob(pattern))
+
+        results = []
+        for payload_path in payload_paths:
+            payload = json.loads(payload_path.read_text(encoding="utf-8"))
+            stats = profiler.profile_payload(payload)
+            if stats.error:
+                self.stderr.write(f"{payload_path.name}: {stats.error}")
+            results.append(stats)
+
+        out = (
+            open(options["output"], "w", encoding="utf-8", newline="")
+            if options["output"]
+            else sys.stdout
+        )
+        try:
+            if options["format"] == "json":
+                json.dump([asdict(stats) for stats in results], out, indent=2)
+            else:
+                writer = csv.DictWriter(out, fieldnames=CSV_COLUMNS)
+                writer.writeheader()
+                for stats in results:
+                    for file_stats in stats.files:
+                        writer.writerow(
+                            {
+                                "repo": stats.repo,
+                                "number": stats.number,
+                                "fetch_seconds": stats.fetch_seconds,
+                                **asdict(file_stats),
+                            }
+                        )
+        finally:
+            if out is not sys.stdout:
+                out.close()
+
+        self.stderr.write(f"Profiled {len(results)} payloads")
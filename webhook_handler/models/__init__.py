@@ -1,6 +1,36 @@
+from .admission import AdmissionDecision, PullRequestSizeEstimate
+from .benchmark_stats import BenchmarkStats
+from .cargo_test_result import CargoTestResult, TestCaseResult, TestOutcome
+from .code_reduction import CodeReduction
+from .diff_hunk import DiffHunk
+from .diff_stats import FileDiffStats, PullRequestDiffStats
+from .evaluation_mode import EvaluationMode
+from .file_category import FileCategory
 from .llm_enum import LLM
 from .pipeline_inputs import PipelineInputs
 from .pr_data import PullRequestData
 from .pr_file_diff import PullRequestFileDiff
+from .step_result import StepResult
+from .symbol import Symbol, SymbolKind
 
-__all__ = ["LLM", "PullRequestData", "PullRequestFileDiff", "PipelineInputs"]
+__all__ = [
+    "AdmissionDecision",
+    "BenchmarkStats",
+    "CargoTestResult",
+    "CodeReduction",
+    "DiffHunk",
+    "EvaluationMode",
+    "FileCategory",
+    "FileDiffStats",
+    "LLM",
+    "PullRequestData",
+    "PullRequestDiffStats",
+    "PullRequestFileDiff",
+    "PipelineInputs",
+    "PullRequestSizeEstimate",
+    "StepResult",
+    "Symbol",
+    "SymbolKind",
+    "TestCaseResult",
+    "TestOutcome",
+]
@@ -0,0 +1,27 @@
+from dataclasses import dataclass
+from enum import StrEnum
+
+
+class AdmissionDecision(StrEnum):
+    """
+    Determines whether (and how) a PR enters the pipeline.
+    """
+
+    ACCEPT = "accept"
+    SLICED_ONLY = "sliced_only"  # prompt only contains the changed hunks
+    REJECT = "reject"
+
+
+@dataclass
+class PullRequestSizeEstimate:
+    """
+    Holds the estimated size of a PR, derived from the metadata of its changed files only.
+    """
+
+    source_files: int
+    additions: int
+    deletions: int
+    changes: int
+    patch_chars: int
+    estimated_prompt_chars: int
+    estimated_sliced_prompt_chars: int
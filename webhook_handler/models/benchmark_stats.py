@@ -0,0 +1,23 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class BenchmarkStats:
+    """
+    Holds the timing and memory statistics of one benchmarked CSTBuilder operation.
+    """
+
+    name: str
+    calls: int
+    input_bytes: int
+    total_seconds: float
+    p50_ms: float
+    p90_ms: float
+    p99_ms: float
+    peak_bytes: int
+
+    @property
+    def mib_per_second(self) -> float:
+        return (
+            self.input_bytes / 2**20 / self.total_seconds if self.total_seconds else 0.0
+        )
@@ -0,0 +1,64 @@
+from dataclasses import dataclass, field
+from enum import StrEnum
+
+
+class TestOutcome(StrEnum):
+    """
+    The outcome of a single test reported by libtest.
+    """
+
+    PASSED = "passed"
+    FAILED = "failed"
+    IGNORED = "ignored"
+
+
+@dataclass
+class TestCaseResult:
+    """
+    Holds the result of one test of a cargo test run.
+    """
+
+    name: str
+    outcome: TestOutcome
+    panicked: bool = False
+    message: str = ""  # the panic message or captured output of a failed test
+    duration_seconds: float | None = None  # only reported in the JSON format
+
+
+@dataclass
+class CargoTestResult:
+    """
+    Holds the parsed result of a cargo test run of the targeted tests.
+    """
+
+    compiled: bool
+    timed_out: bool
+    output: str  # empty if the output was streamed to a log file
+    tests: list[TestCaseResult] = field(default_factory=list)
+    missing: list[str] = field(default_factory=list)  # targeted tests which did not run
+    output_limit_exceeded: bool = False
+    # error diagnostics of a failed build, without the surrounding warnings
+    compiler_errors: list[str] = field(default_factory=list)
+
+    @property
+    def passed(self) -> bool:
+        """
+        True if the run completed, every targeted test ran and none of them failed.
+        """
+
+        return (
+            self.compiled
+            and not self.timed_out
+            and not self.output_limit_exceeded
+            and not self.missing
+            and any(test.outcome == TestOutcome.PASSED for test in self.tests)
+            and not self.failed
+        )
+
+    @property
+    def failed(self) -> list[str]:
+        return [test.name for test in self.tests if test.outcome == TestOutcome.FAILED]
+
+    @property
+    def panicked(self) -> list[str]:
+        return [test.name for test in self.tests if test.panicked]
@@ -0,0 +1,13 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class CodeReduction:
+    """
+    Holds a reduced source file together with how much was saved by reducing it.
+    """
+
+    name: str
+    code: str
+    bytes_saved: int
+    tokens_saved: int
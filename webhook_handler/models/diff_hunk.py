@@ -0,0 +1,15 @@
+from dataclasses import dataclass, field
+
+
+@dataclass
+class DiffHunk:
+    """
+    Holds one hunk of a unified diff together with its added and removed lines (line number, text).
+    """
+
+    old_start: int
+    old_count: int
+    new_start: int
+    new_count: int
+    added: list[tuple[int, str]] = field(default_factory=list)
+    removed: list[tuple[int, str]] = field(default_factory=list)
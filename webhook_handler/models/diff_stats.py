@@ -0,0 +1,35 @@
+from dataclasses import dataclass, field
+
+
+@dataclass
+class FileDiffStats:
+    """
+    Holds size and timing statistics of one PR-changed file.
+    """
+
+    name: str
+    category: str
+    bytes_before: int
+    bytes_after: int
+    lines_added: int
+    lines_removed: int
+    hunks: int
+    patch_bytes: int
+    diff_seconds: float
+    parse_seconds: float
+
+
+@dataclass
+class PullRequestDiffStats:
+    """
+    Holds size and timing statistics of one PR and its changed files.
+    """
+
+    repo: str
+    number: str
+    fetch_seconds: float
+    diff_seconds: float = 0.0
+    parse_seconds: float = 0.0
+    patch_bytes: int = 0
+    error: str | None = None
+    files: list[FileDiffStats] = field(default_factory=list)
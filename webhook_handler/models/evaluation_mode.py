@@ -0,0 +1,11 @@
+from enum import StrEnum
+
+
+class EvaluationMode(StrEnum):
+    """
+    Determines how the generated test is run in the pre- and post-PR codebase.
+    """
+
+    SEPARATE = "separate"  # one container per run
+    INCREMENTAL = "incremental"  # the golden patch is applied after the pre-PR run, in the same container
+    CONCURRENT = "concurrent"  # both runs at the same time in two containers
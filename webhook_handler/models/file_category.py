@@ -0,0 +1,12 @@
+from enum import StrEnum
+
+
+class FileCategory(StrEnum):
+    """
+    Determines how a PR-changed file is treated by the pipeline.
+    """
+
+    SOURCE = "source"
+    TEST = "test"
+    NON_SOURCE = "non_source"
+    OTHER = "other"
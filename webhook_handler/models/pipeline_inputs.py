@@ -16,6 +16,10 @@ class PipelineInputs:
     available_packages: str | None = None
     available_relative_imports: str | None = None
     code_sliced: list[str] | None = None
+    sliced_only: bool = False  # degraded mode for PRs too large for a full prompt
+    changed_symbols: list | None = None  # items touched by the PR, from the symbol index
+    compiler_errors: list[str] | None = None  # of the test generated in the previous attempt
+    code_before: list[str] | None = None  # source files before the PR, without test-only items
 
     def __post_init__(self):
         # ensure instance types
@@ -17,14 +17,12 @@ class PullRequestData:
     owner: str
     repo: str
     id: str = field(init=False)
-    image_tag: str = field(init=False)
 
     def __post_init__(self):
         # ensure description is never None
         if self.description is None:
             self.description = ""
         self.id = f"{self.owner}__{self.repo}-{self.number}"
-        self.image_tag = f"image_{self.id}"
 
     @classmethod
     def from_payload(cls, payload: dict) -> "PullRequestData":
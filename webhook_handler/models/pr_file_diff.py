@@ -1,17 +1,20 @@
 from dataclasses import dataclass
 
 from webhook_handler.helper import git_diff
+from webhook_handler.models.file_category import FileCategory
 
 
 @dataclass
 class PullRequestFileDiff:
     """
     Wraps the before/after contents of one PR‑changed file.
+    The category is assigned by the FileClassifier of the repository.
     """
 
     name: str
     before: str
     after: str
+    category: FileCategory = FileCategory.OTHER
 
     @property
     def is_test_file(self) -> bool:
@@ -22,16 +25,7 @@ class PullRequestFileDiff:
             bool: True if this PR changed file is test file, False otherwise
         """
 
-        is_in_test_folder = False
-        parts = self.name.split("/")
-
-        # at least one folder in the dir path starts with test
-        for part in parts[:-1]:
-            if part.startswith("test"):
-                is_in_test_folder = True
-                break
-
-        return is_in_test_folder and "spec" in parts[-1] and parts[-1].endswith("js")
+        return self.category == FileCategory.TEST
 
     @property
     def is_source_code_file(self) -> bool:
@@ -42,16 +36,7 @@ class PullRequestFileDiff:
             bool: True if this PR changed source code file is code file, False otherwise
         """
 
-        is_in_src_folder = False
-        parts = self.name.split("/")
-
-        # at least one folder in the dir path starts with src
-        for part in parts[:-1]:
-            if part.startswith("src"):
-                is_in_src_folder = True
-                break
-
-        return is_in_src_folder and parts[-1].endswith(".rs")
+        return self.category == FileCategory.SOURCE
 
     @property
     def is_non_source_code_file(self) -> bool:
@@ -62,11 +47,7 @@ class PullRequestFileDiff:
             bool: True if this PR changed non-source code file is code file, False otherwise
         """
 
-        return (
-            not self.is_source_code_file
-            and not self.is_test_file
-            and self.name.endswith(".js")
-        )
+        return self.category == FileCategory.NON_SOURCE
 
     def unified_code_diff(self) -> str:
         """
@@ -0,0 +1,12 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class StepResult:
+    """
+    Holds the outcome of one step of a run script executed in a container.
+    """
+
+    name: str
+    exit_code: int | None  # None if the step was skipped after an earlier step failed
+    output: str
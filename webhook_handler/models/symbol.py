@@ -0,0 +1,42 @@
+from dataclasses import dataclass
+from enum import StrEnum
+
+
+class SymbolKind(StrEnum):
+    """
+    The Rust items recorded in the symbol index.
+    """
+
+    FUNCTION = "function"
+    IMPL = "impl"
+    TRAIT = "trait"
+    STRUCT = "struct"
+    ENUM = "enum"
+    USE = "use"
+    TEST_MODULE = "test_module"
+
+
+@dataclass(frozen=True)
+class Symbol:
+    """
+    One item of a Rust file at a specific commit.
+    For functions, the owner is the type or trait of the surrounding impl / trait block,
+    for impl blocks it is the implemented trait (empty for inherent impls).
+    """
+
+    name: str
+    kind: SymbolKind
+    file: str
+    module: str  # e.g. "parser::tests", empty for the root module of a target
+    owner: str
+    start_line: int
+    end_line: int
+
+    @property
+    def path(self) -> str:
+        """
+        Returns:
+            str: The path of the item within its crate, e.g. crate::parser::Parser
+        """
+
+        return "::".join(part for part in ("crate", self.module, self.name) if part)
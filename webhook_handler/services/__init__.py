@@ -1,17 +1,31 @@
+from .admission_policy import AdmissionPolicy
+from .code_reducer import CodeReducer
 from .config import Config
+from .container_pool import ContainerPool
 from .cst_builder import CSTBuilder
 from .docker_service import DockerService
+from .file_classifier import FileClassifier
 from .gh_service import GitHubService
 from .llm_handler import LLMHandler
+from .parse_cache import ParseTreeCache
+from .parser_pool import ParserPool
 from .pr_diff_context import PullRequestDiffContext
+from .symbol_index import SymbolIndex
 from .test_generator import TestGenerator
 
 __all__ = [
+    "AdmissionPolicy",
     "Config",
+    "ContainerPool",
+    "CodeReducer",
     "LLMHandler",
     "GitHubService",
+    "ParseTreeCache",
+    "ParserPool",
     "PullRequestDiffContext",
     "CSTBuilder",
     "DockerService",
+    "FileClassifier",
+    "SymbolIndex",
     "TestGenerator",
 ]
@@ -0,0 +1,82 @@
+from webhook_handler.constants import (
+    AVG_CHANGED_LINE_CHARS,
+    FUNCTION_CONTEXT_FACTOR,
+    PROMPT_TEMPLATE_CHARS,
+)
+from webhook_handler.models import (
+    AdmissionDecision,
+    FileCategory,
+    PullRequestSizeEstimate,
+)
+from webhook_handler.services.config import Config
+from webhook_handler.services.file_classifier import FileClassifier
+
+
+class AdmissionPolicy:
+    """
+    Decides whether a PR is small enough to run through the pipeline, before any expensive stage runs.
+    """
+
+    def __init__(self, config: Config) -> None:
+        self._max_prompt_chars = config.admission_max_prompt_chars
+        self._full_prompt_chars = config.admission_full_prompt_chars
+        self._max_changed_lines = config.admission_max_changed_lines
+
+    @staticmethod
+    def estimate(
+        raw_files: list[dict], classifier: FileClassifier, problem_statement: str = ""
+    ) -> PullRequestSizeEstimate:
+        """
+        Estimates the size of a PR from the metadata returned by GitHubService.fetch_pr_files.
+
+        Parameters:
+            raw_files (list): The changed files of the PR
+            classifier (FileClassifier): Determines which files end up in the prompt
+            problem_statement (str, optional): The linked issue, which is part of the prompt as well
+
+        Returns:
+            PullRequestSizeEstimate: The estimated size of the PR
+        """
+
+        source_files = additions = deletions = changes = patch_chars = 0
+        for raw_file in raw_files:
+            if classifier.classify(raw_file["filename"]) != FileCategory.SOURCE:
+                continue
+            source_files += 1
+            additions += raw_file.get("additions", 0)
+            deletions += raw_file.get("deletions", 0)
+            changes += raw_file.get("changes", 0)
+            if "patch" in raw_file:
+                patch_chars += len(raw_file["patch"])
+            else:  # GitHub omits the patch of large diffs
+                patch_chars += raw_file.get("changes", 0) * AVG_CHANGED_LINE_CHARS
+
+        fixed_chars = PROMPT_TEMPLATE_CHARS + len(problem_statement)
+        return PullRequestSizeEstimate(
+            source_files=source_files,
+            additions=additions,
+            deletions=deletions,
+            changes=changes,
+            patch_chars=patch_chars,
+            estimated_prompt_chars=fixed_chars + patch_chars * FUNCTION_CONTEXT_FACTOR,
+            estimated_sliced_prompt_chars=fixed_chars + patch_chars,
+        )
+
+    def decide(self, estimate: PullRequestSizeEstimate) -> AdmissionDecision:
+        """
+        Applies the configured limits to a size estimate.
+
+        Parameters:
+            estimate (PullRequestSizeEstimate): The estimated size of the PR
+
+        Returns:
+            AdmissionDecision: Whether the PR is accepted, accepted in the degraded "sliced only" mode or rejected
+        """
+
+        if estimate.changes > self._max_changed_lines:
+            return AdmissionDecision.REJECT
+        if estimate.estimated_prompt_chars <= self._full_prompt_chars:
+            return AdmissionDecision.ACCEPT
+        if estimate.estimated_sliced_prompt_chars <= self._max_prompt_chars:
+            return AdmissionDecision.SLICED_ONLY
+        return AdmissionDecision.REJECT
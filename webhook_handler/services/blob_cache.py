@@ -0,0 +1,77 @@
+from pathlib import Path
+
+MISSING_SUFFIX = ".missing"
+
+
+class BlobCache:
+    """
+    On-disk cache for GitHub responses (file versions and PR file lists), so payloads can be replayed offline.
+    """
+
+    def __init__(self, cache_dir: Path, owner: str, repo: str) -> None:
+        self._repo_dir = Path(cache_dir, owner, repo)
+
+    def get_file_version(self, commit: str, file_name: str) -> str | None:
+        """
+        Returns the cached version of a file.
+
+        Parameters:
+            commit (str): Commit hash
+            file_name (str): File name
+
+        Returns:
+            str | None: The file contents ("" if the file does not exist at that commit), None on a cache miss
+        """
+
+        path = Path(self._repo_dir, "blobs", commit, file_name)
+        if path.is_file():
+            return path.read_bytes().decode("utf-8")  # keep line endings as fetched
+        if path.with_name(path.name + MISSING_SUFFIX).is_file():
+            return ""
+        return None
+
+    def put_file_version(
+        self, commit: str, file_name: str, content: str | None
+    ) -> None:
+        """
+        Caches a version of a file.
+
+        Parameters:
+            commit (str): Commit hash
+            file_name (str): File name
+            content (str | None): The file contents, None if the file does not exist at that commit
+        """
+
+        path = Path(self._repo_dir, "blobs", commit, file_name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if content is None:
+            path.with_name(path.name + MISSING_SUFFIX).touch()
+        else:
+            path.write_text(content, encoding="utf-8", newline="")
+
+    def get_pr_files(self, number: str) -> str | None:
+        """
+        Returns the cached file list of a PR.
+
+        Parameters:
+            number (str): The number of the PR
+
+        Returns:
+            str | None: The raw JSON response, None on a cache miss
+        """
+
+        path = Path(self._repo_dir, "pulls", f"{number}.json")
+        return path.read_text(encoding="utf-8") if path.is_file() else None
+
+    def put_pr_files(self, number: str, raw_json: str) -> None:
+        """
+        Caches the file list of a PR.
+
+        Parameters:
+            number (str): The number of the PR
+            raw_json (str): The raw JSON response
+        """
+
+        path = Path(self._repo_dir, "pulls", f"{number}.json")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(raw_json, encoding="utf-8")
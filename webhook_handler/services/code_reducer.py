@@ -0,0 +1,194 @@
+from tree_sitter import Node, Query, QueryCursor
+
+from webhook_handler.helper import general
+from webhook_handler.models import CodeReduction
+from webhook_handler.services.parser_pool import ParserPool
+
+# attributes which only compile the annotated item for tests, e.g. #[test], #[tokio::test], #[bench]
+TEST_ATTRIBUTE_NAMES = {"test", "bench", "rstest", "test_case"}
+
+
+class CodeReducer:
+    """
+    Reduces Rust source code before it is sent to the LLM.
+    """
+
+    def __init__(self, parser_pool: ParserPool) -> None:
+        self._parser_pool = parser_pool
+        self._attribute_query = Query(
+            parser_pool.language,
+            "(attribute_item) @attribute (inner_attribute_item) @inner",
+        )
+
+    def remove_test_items(self, source_code: str, name: str = "") -> CodeReduction:
+        """
+        Removes every test-only item (anything annotated with #[cfg(test)], #[test], ...) from the source code,
+        wherever it is located in the file. The remaining code is kept as is.
+
+        Parameters:
+            source_code (str): The code to reduce
+            name (str, optional): The file name, only used for reporting
+
+        Returns:
+            CodeReduction: The reduced code together with the savings
+        """
+
+        source = bytes(source_code, "utf8")
+        tree = self._parser_pool.parse(source)
+        if tree is None:  # parse timed out, keep the code as is
+            return self._reduction(name, source_code, source_code)
+        captures = QueryCursor(self._attribute_query).captures(tree.root_node)
+
+        for inner in captures.get("inner", []):
+            # #![cfg(test)] on the file level: the whole module only exists for tests
+            if inner.parent == tree.root_node and self._is_test_attribute(inner):
+                return self._reduction(name, source_code, "")
+
+        ranges: list[tuple[int, int]] = []
+        for attribute in captures.get("attribute", []):
+            if not self._is_test_attribute(attribute):
+                continue
+            item = self._get_annotated_item(attribute)
+            if item is None:
+                continue
+            start = self._get_leading_node(attribute).start_byte
+            end = item.end_byte
+            if item.next_sibling is not None and item.next_sibling.type == ",":
+                end = item.next_sibling.end_byte  # struct fields, enum variants
+            ranges.append(self._expand_to_lines(source, start, end))
+
+        kept: list[bytes] = []
+        position = 0
+        for start, end in sorted(ranges):
+            if end <= position:
+                continue  # nested in an item which has already been removed
+            kept.append(source[position : max(start, position)])
+            position = end
+        kept.append(source[position:])
+
+        return self._reduction(name, source_code, b"".join(kept).decode("utf8"))
+
+    @staticmethod
+    def _reduction(name: str, before: str, after: str) -> CodeReduction:
+        return CodeReduction(
+            name=name,
+            code=after,
+            bytes_saved=len(before.encode("utf8")) - len(after.encode("utf8")),
+            tokens_saved=general.estimate_tokens(before)
+            - general.estimate_tokens(after),
+        )
+
+    @staticmethod
+    def _is_test_attribute(node: Node) -> bool:
+        """
+        Checks whether an attribute restricts its item to tests.
+
+        Parameters:
+            node (Node): The attribute item
+
+        Returns:
+            bool: True for #[test]-like attributes and #[cfg(test)] / #[cfg(all(test, ...))]
+        """
+
+        attribute = next(
+            (c for c in node.named_children if c.type == "attribute"), None
+        )
+        if attribute is None or not attribute.named_children:
+            return False
+
+        path = attribute.named_children[0]
+        if path.type == "scoped_identifier":  # e.g. tokio::test
+            path = path.child_by_field_name("name")
+        attribute_name = path.text.decode("utf-8") if path else ""
+        if attribute_name in TEST_ATTRIBUTE_NAMES:
+            return True
+        if attribute_name != "cfg":
+            return False
+
+        arguments = next(
+            (c for c in attribute.children if c.type == "token_tree"), None
+        )
+        if arguments is None:
+            return False
+        predicate = arguments.named_children
+        if len(predicate) == 1 and predicate[0].text == b"test":
+            return True
+        if (
+            len(predicate) == 2
+            and predicate[0].text == b"all"
+            and predicate[1].type == "token_tree"
+        ):
+            return any(c.text == b"test" for c in predicate[1].named_children)
+        return False
+
+    @staticmethod
+    def _get_annotated_item(attribute: Node) -> Node | None:
+        """
+        Returns the item an attribute belongs to, skipping further attributes and comments.
+
+        Parameters:
+            attribute (Node): The attribute item
+
+        Returns:
+            Node | None: The annotated item
+        """
+
+        sibling = attribute.next_sibling
+        while sibling is not None and sibling.type in {
+            "attribute_item",
+            "line_comment",
+            "block_comment",
+        }:
+            sibling = sibling.next_sibling
+        return sibling if sibling is not None and sibling.is_named else None
+
+    @staticmethod
+    def _get_leading_node(attribute: Node) -> Node:
+        """
+        Returns the first node belonging to the annotated item, i.e. the first of the attributes
+        and doc comments directly above it.
+
+        Parameters:
+            attribute (Node): The attribute item
+
+        Returns:
+            Node: The first attribute or doc comment of the item
+        """
+
+        leading = attribute
+        prev = attribute.prev_sibling
+        while prev is not None and (
+            prev.type == "attribute_item"
+            or (
+                prev.type in {"line_comment", "block_comment"}
+                and prev.child_by_field_name("outer") is not None
+            )
+        ):
+            leading = prev
+            prev = prev.prev_sibling
+        return leading
+
+    @staticmethod
+    def _expand_to_lines(source: bytes, start: int, end: int) -> tuple[int, int]:
+        """
+        Expands a byte range to whole lines, as long as it does not share them with other code.
+
+        Parameters:
+            source (bytes): The source code
+            start (int): Start byte of the range
+            end (int): End byte of the range
+
+        Returns:
+            tuple: The expanded start and end byte
+        """
+
+        line_start = source.rfind(b"\n", 0, start) + 1
+        if not source[line_start:start].strip():
+            start = line_start
+
+        line_end = source.find(b"\n", end)
+        line_end = len(source) if line_end == -1 else line_end + 1
+        if not source[end:line_end].strip():
+            end = line_end
+
+        return start, end
@@ -3,11 +3,9 @@ import os
 from datetime import datetime
 from pathlib import Path
 
-import tree_sitter_rust
 from dotenv import load_dotenv
-from tree_sitter import Language
 
-from webhook_handler.models import LLM
+from webhook_handler.models import LLM, EvaluationMode
 
 
 class Config:
@@ -19,6 +17,22 @@ class Config:
         self.github_token = os.getenv("GITHUB_TOKEN")
         self.openai_key = os.getenv("OPENAI_API_KEY")
         self.groq_key = os.getenv("GROQ_API_KEY")
+        self.file_rules_path = os.getenv("FILE_RULES_PATH")  # overrides built-in rules
+
+        # GitHub responses are cached in BLOB_CACHE_DIR (if set), offline runs only use the cache
+        self.blob_cache_dir = os.getenv("BLOB_CACHE_DIR")
+        self.github_offline = os.getenv("GITHUB_OFFLINE", "").lower() in {"1", "true"}
+
+        # Admission control, applied before any file contents are fetched
+        self.admission_max_prompt_chars = int(
+            os.getenv("ADMISSION_MAX_PROMPT_CHARS") or 1048576  # gpt4o limit
+        )
+        self.admission_full_prompt_chars = int(
+            os.getenv("ADMISSION_FULL_PROMPT_CHARS") or 262144
+        )
+        self.admission_max_changed_lines = int(
+            os.getenv("ADMISSION_MAX_CHANGED_LINES") or 5000
+        )
 
         self.HEADER = {
             "Accept": "application/vnd.github.v3+json",
@@ -31,7 +45,42 @@ class Config:
         self.generated_tests_dir = Path(self.root_dir, "generated_tests")
         self.is_server = Path("/home/runner").is_dir()
 
-        self.parsing_language = Language(tree_sitter_rust.language())
+        # parsers of the shared ParserPool (the most concurrent parses), parses exceeding the timeout are given up (0 for no limit)
+        self.parser_pool_size = int(
+            os.getenv("PARSER_POOL_SIZE") or os.cpu_count() or 1
+        )
+        self.parse_timeout_seconds = float(os.getenv("PARSE_TIMEOUT_SECONDS") or 0)
+        self.parse_cache_max_bytes = int(
+            os.getenv("PARSE_CACHE_MAX_BYTES") or 64 * 2**20
+        )
+        # worker processes slicing the changed files of a PR in parallel, 0 slices in-process
+        self.slicing_workers = int(os.getenv("SLICING_WORKERS") or 0)
+        # SQLite symbol index of the target repositories (one snapshot per commit), disabled if not set
+        self.symbol_index_path = os.getenv("SYMBOL_INDEX_PATH")
+        # cargo test runs exceeding the timeout are killed, JSON output needs a nightly toolchain in the images
+        self.test_timeout_seconds = int(os.getenv("TEST_TIMEOUT_SECONDS") or 300)
+        self.libtest_json = os.getenv("LIBTEST_JSON", "").lower() in {"1", "true"}
+        # candidates are built with cargo test --no-run first, so tests which do not compile skip the test runs
+        compile_check = os.getenv("COMPILE_CHECK") or "true"
+        self.compile_check = compile_check.lower() in {"1", "true"}
+        # runs writing more test output than this are killed, the output is streamed to before.txt/after.txt
+        self.test_output_max_bytes = int(
+            os.getenv("TEST_OUTPUT_MAX_BYTES") or 16 * 2**20
+        )
+        # how the test is run pre- and post-PR, incremental and concurrent runs are opt-in
+        self.evaluation_mode = EvaluationMode(
+            os.getenv("EVALUATION_MODE") or EvaluationMode.SEPARATE
+        )
+        # warm test containers kept over all images, idle ones are removed after the timeout
+        self.container_pool_size = int(os.getenv("CONTAINER_POOL_SIZE") or 4)
+        self.container_idle_timeout_seconds = float(
+            os.getenv("CONTAINER_IDLE_TIMEOUT_SECONDS") or 600
+        )
+        # volumes sharing the cargo target dir of each image across containers (two per image, pre- and post-PR), 0 disables them
+        self.target_cache_max_volumes = int(os.getenv("TARGET_CACHE_MAX_VOLUMES") or 0)
+        self.target_cache_max_bytes = int(
+            os.getenv("TARGET_CACHE_MAX_BYTES") or 20 * 2**30
+        )
 
         if self.is_server:
             self.webhook_raw_log_dir = Path("home", "ubuntu", "logs", "raw")
@@ -0,0 +1,301 @@
+import atexit
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+import docker
+from docker.errors import APIError, NotFound
+from docker.models.containers import Container
+
+from webhook_handler.services.target_cache import TargetCache
+
+# restores the tracked files and removes untracked ones, ignored files (e.g. target/) are kept
+RESET_COMMAND = "/bin/sh -c 'cd /app/testbed && git checkout -- . && git clean -fdq'"
+# label marking the containers created by a ContainerPool, its value is the owning process (host:pid)
+CONTAINER_POOL_LABEL = "webhook_handler.container_pool"
+# how often idle containers are checked for the idle timeout
+REAP_INTERVAL_SECONDS = 30.0
+
+
+class ContainerPool:
+    """
+    Pool of running containers per image and target volume. A container is reset to the image's checkout after every use,
+    so the next run gets a warm container instead of creating and starting a new one.
+    Idle containers are removed after the idle timeout, or when more than max_size of them are idle.
+    All containers are labeled with the owning process, the idle ones are removed when the process exits
+    and those left behind by a process which no longer runs are removed when the next pool starts.
+    """
+
+    _shared: "ContainerPool | None" = None
+    _shared_lock = threading.Lock()
+
+    def __init__(
+        self,
+        max_size: int,
+        idle_timeout_seconds: float,
+        target_cache_max_volumes: int = 0,
+        target_cache_max_bytes: int = 0,
+    ) -> None:
+        """
+        Parameters:
+            max_size (int): The maximum number of idle containers kept over all images
+            idle_timeout_seconds (float): Idle containers older than this are removed
+            target_cache_max_volumes (int, optional): The maximum number of shared target volumes (0 disables them)
+            target_cache_max_bytes (int, optional): The maximum total size of the target volumes (0 for no limit)
+        """
+
+        self._client = docker.from_env()
+        self._target_cache = (
+            TargetCache(self._client, target_cache_max_volumes, target_cache_max_bytes)
+            if target_cache_max_volumes > 0
+            else None
+        )
+        self._max_size = max_size
+        self._idle_timeout_seconds = idle_timeout_seconds
+        # (returned at, (image, target variant), container), most recently returned last
+        self._idle: list[tuple[float, tuple[str, str], Container]] = []
+        self._lock = threading.Lock()
+        self._owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._closed = threading.Event()
+
+        self._remove_leftovers()
+        threading.Thread(target=self._reap_periodically, daemon=True).start()
+        atexit.register(self.close)
+
+    @classmethod
+    def shared(
+        cls,
+        max_size: int,
+        idle_timeout_seconds: float,
+        target_cache_max_volumes: int = 0,
+        target_cache_max_bytes: int = 0,
+    ) -> "ContainerPool":
+        """
+        Returns the container pool of this process, creating it on first use (later arguments are ignored).
+
+        Parameters:
+            max_size (int): The maximum number of idle containers kept over all images
+            idle_timeout_seconds (float): Idle containers older than this are removed
+            target_cache_max_volumes (int, optional): The maximum number of shared target volumes (0 disables them)
+            target_cache_max_bytes (int, optional): The maximum total size of the target volumes (0 for no limit)
+
+        Returns:
+            ContainerPool: The shared container pool
+        """
+
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = ContainerPool(
+                    max_size,
+                    idle_timeout_seconds,
+                    target_cache_max_volumes,
+                    target_cache_max_bytes,
+                )
+            return cls._shared
+
+    @contextmanager
+    def checkout(self, image_tag: str, target_variant: str = "") -> Iterator[Container]:
+        """
+        Lends a running container of the image to the caller for the duration of the with-block.
+
+        Parameters:
+            image_tag (str): The image of the container
+            target_variant (str, optional): The variant of the image's target volume mounted by the container
+
+        Returns:
+            Iterator: The container, exclusively used by the caller
+        """
+
+        key = (image_tag, target_variant)
+        container = self._take_idle(key)
+        if container is None:
+            print("Creating container...")
+            container = self._client.containers.create(
+                image=image_tag,
+                command="/bin/sh -c 'sleep infinity'",  # keep the container running
+                tty=True,  # allocate a TTY for interactive use
+                detach=True,
+                labels={CONTAINER_POOL_LABEL: self._owner},
+                volumes=(
+                    self._target_cache.get_volume(image_tag, target_variant)
+                    if self._target_cache is not None
+                    else None
+                ),
+            )
+            container.start()
+            print(f"Container {container.short_id} started")
+        else:
+            print(f"Reusing container {container.short_id}")
+
+        try:
+            yield container
+        finally:
+            self._give_back(key, container)
+
+    def close(self) -> None:
+        """
+        Removes all idle containers, containers still in use are removed when they are returned.
+        """
+
+        self._closed.set()
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for _, _, container in idle:
+            self._remove(container)
+
+    def _take_idle(self, key: tuple[str, str]) -> Container | None:
+        """
+        Returns the most recently used healthy idle container of the image, removing expired and unhealthy ones.
+
+        Parameters:
+            key (tuple): The image of the container and the variant of its target volume
+
+        Returns:
+            Container | None: An idle container, None if there is none
+        """
+
+        while True:
+            self._reap_expired()
+            with self._lock:
+                candidate = next(
+                    (entry for entry in reversed(self._idle) if entry[1] == key),
+                    None,
+                )
+                if candidate is not None:
+                    self._idle.remove(candidate)
+
+            if candidate is None:
+                return None
+            if self._is_healthy(candidate[2]):
+                return candidate[2]
+            print(f"Container {candidate[2].short_id} is unhealthy")
+            self._remove(candidate[2])
+
+    def _give_back(self, key: tuple[str, str], container: Container) -> None:
+        """
+        Resets the container and makes it available again, it is removed if the reset fails or the pool is full.
+
+        Parameters:
+            key (tuple): The image of the container and the variant of its target volume
+            container (Container): The container returned by the caller
+        """
+
+        try:
+            reset = container.exec_run(RESET_COMMAND)
+            reusable = reset.exit_code == 0
+        except APIError:
+            reusable = False
+        if not reusable or self._closed.is_set():
+            self._remove(container)
+            return
+
+        self._reap_expired()
+        with self._lock:
+            self._idle.append((time.monotonic(), key, container))
+            surplus = self._idle[: max(len(self._idle) - self._max_size, 0)]
+            del self._idle[: len(surplus)]
+        for _, _, evicted in surplus:
+            self._remove(evicted)
+
+    def _reap_expired(self) -> None:
+        """
+        Removes the idle containers which exceeded the idle timeout.
+        """
+
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                entry
+                for entry in self._idle
+                if now - entry[0] > self._idle_timeout_seconds
+            ]
+            self._idle = [entry for entry in self._idle if entry not in expired]
+        for _, _, container in expired:
+            self._remove(container)
+
+    def _reap_periodically(self) -> None:
+        """
+        Reaps expired idle containers until the pool is closed, so they do not wait for the next checkout.
+        """
+
+        interval = min(max(self._idle_timeout_seconds, 1.0), REAP_INTERVAL_SECONDS)
+        while not self._closed.wait(interval):
+            self._reap_expired()
+
+    def _remove_leftovers(self) -> None:
+        """
+        Removes the labeled containers of processes on this host which no longer run (e.g. after a crash).
+        Containers of running processes and of other hosts sharing the Docker daemon are kept.
+        """
+
+        try:
+            containers = self._client.containers.list(
+                all=True, filters={"label": CONTAINER_POOL_LABEL}
+            )
+        except APIError as e:
+            print(f"Failed to list pooled containers: {e}")
+            return
+        hostname = socket.gethostname()
+        for container in containers:
+            host, _, pid = container.labels.get(CONTAINER_POOL_LABEL, "").rpartition(
+                ":"
+            )
+            if host == hostname and pid.isdigit() and not self._is_running(int(pid)):
+                self._remove(container)
+
+    @staticmethod
+    def _is_running(pid: int) -> bool:
+        """
+        Parameters:
+            pid (int): A process ID on this host
+
+        Returns:
+            bool: True if the process exists
+        """
+
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True  # owned by another user
+        return True
+
+    @staticmethod
+    def _is_healthy(container: Container) -> bool:
+        """
+        Parameters:
+            container (Container): An idle container
+
+        Returns:
+            bool: True if the container is running and executes commands
+        """
+
+        try:
+            container.reload()
+            return (
+                container.status == "running"
+                and container.exec_run("true").exit_code == 0
+            )
+        except APIError:
+            return False
+
+    @staticmethod
+    def _remove(container: Container) -> None:
+        """
+        Removes a container without waiting for the stop grace period.
+
+        Parameters:
+            container (Container): The container to remove
+        """
+
+        try:
+            container.remove(force=True)
+            print(f"Container {container.short_id} removed")
+        except NotFound:
+            pass
+        except APIError as e:
+            print(f"Failed to remove container {container.short_id}: {e}")
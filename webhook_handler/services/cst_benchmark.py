@@ -0,0 +1,271 @@
+import contextlib
+import io
+import json
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+from webhook_handler.models import BenchmarkStats, PullRequestData
+from webhook_handler.services.config import Config
+from webhook_handler.services.cst_builder import CSTBuilder
+from webhook_handler.services.file_classifier import FileClassifier
+from webhook_handler.services.gh_service import GitHubService
+from webhook_handler.services.parser_pool import ParserPool
+from webhook_handler.services.pr_diff_context import PullRequestDiffContext
+
+# test appended by the append_function benchmark
+BENCHMARK_TEST_FUNCTION = """#[test]
+fn benchmark_appended_test() {
+    assert_eq!(1 + 1, 2);
+}
+"""
+
+
+class CSTBenchmark:
+    """
+    Times the CSTBuilder operations on the recorded PR payloads, replayed offline from the blob cache.
+    Parse trees are never cached, so every call measures a cold parse.
+    """
+
+    def __init__(self, config: Config) -> None:
+        self._config = config
+        self._parser_pool = ParserPool.shared(
+            config.parser_pool_size, config.parse_timeout_seconds
+        )
+        self._cst_builder = CSTBuilder(self._parser_pool)
+
+    def load_corpus(self, payloads: list[dict]) -> list[PullRequestDiffContext]:
+        """
+        Loads the file versions of the payloads from the blob cache, payloads missing from the cache are skipped.
+
+        Parameters:
+            payloads (list): The pull request payloads
+
+        Returns:
+            list: The diff contexts of the PRs with at least one changed Rust file
+        """
+
+        self._config.github_offline = True
+        corpus = []
+        skipped = 0
+        for payload in payloads:
+            pr_data = PullRequestData.from_payload(payload)
+            try:
+                pr_diff_ctx = PullRequestDiffContext(
+                    pr_data.base_commit,
+                    pr_data.head_commit,
+                    GitHubService(self._config, pr_data),
+                    FileClassifier.for_repository(
+                        pr_data.repo, self._config.file_rules_path
+                    ),
+                )
+            except Exception:
+                skipped += 1
+                continue
+            if any(diff.name.endswith(".rs") for diff in pr_diff_ctx.file_diffs):
+                corpus.append(pr_diff_ctx)
+        if skipped:
+            print(f"Skipped {skipped} payloads missing from the blob cache")
+        return corpus
+
+    def run(
+        self, corpus: list[PullRequestDiffContext], repeat: int = 5
+    ) -> list[BenchmarkStats]:
+        """
+        Benchmarks every operation on all files of the corpus.
+
+        Parameters:
+            corpus (list): The diff contexts returned by load_corpus
+            repeat (int, optional): How often every call is timed
+
+        Returns:
+            list: The statistics of each operation
+        """
+
+        builder = self._cst_builder
+        rust_diffs = [
+            diff
+            for pr_diff_ctx in corpus
+            for diff in pr_diff_ctx.file_diffs
+            if diff.name.endswith(".rs")
+        ]
+        code_diffs = [
+            diff
+            for pr_diff_ctx in corpus
+            for diff in pr_diff_ctx.source_code_file_diffs
+            if diff.name.endswith(".rs")
+        ]
+
+        scope_map_cases = [
+            (diff.before, diff.after, diff.unified_code_diff()) for diff in code_diffs
+        ]
+        slice_cases = []
+        for before, after, patch in scope_map_cases:
+            before_map, after_map = builder._build_changed_lines_scope_map(
+                before, after, patch
+            )
+            if before_map or after_map:
+                slice_cases.append(
+                    (before, *builder._get_slicing_targets(before_map, after_map))
+                )
+
+        operations = {
+            "_parse": (
+                builder._parse,
+                [
+                    (source,)
+                    for diff in rust_diffs
+                    for source in (diff.before, diff.after)
+                ],
+            ),
+            "_build_changed_lines_scope_map": (
+                builder._build_changed_lines_scope_map,
+                scope_map_cases,
+            ),
+            "_slice_rust_code": (builder._slice_rust_code, slice_cases),
+            "get_sliced_code_files": (
+                lambda pr_diff_ctx: CSTBuilder(
+                    self._parser_pool, pr_diff_ctx
+                ).get_sliced_code_files(),
+                [(pr_diff_ctx,) for pr_diff_ctx in corpus if pr_diff_ctx.code_names],
+            ),
+            "append_function": (
+                builder.append_function,
+                [(diff.after, BENCHMARK_TEST_FUNCTION) for diff in rust_diffs],
+            ),
+            "extract_changed_tests": (
+                builder.extract_changed_tests,
+                [(diff,) for diff in rust_diffs],
+            ),
+        }
+
+        return [
+            self._measure(name, function, cases, repeat)
+            for name, (function, cases) in operations.items()
+        ]
+
+    @staticmethod
+    def _measure(
+        name: str, function: Callable, cases: list[tuple], repeat: int
+    ) -> BenchmarkStats:
+        """
+        Times every case repeat times, then runs all cases once more under tracemalloc for the peak memory.
+        tracemalloc only sees Python allocations, the syntax trees allocated by tree-sitter are not included.
+
+        Parameters:
+            name (str): The name of the operation
+            function (Callable): The operation
+            cases (list): The arguments of each call
+            repeat (int): How often every call is timed
+
+        Returns:
+            BenchmarkStats: The statistics of the operation
+        """
+
+        durations = []
+        with contextlib.redirect_stdout(io.StringIO()):  # the pipeline prints progress
+            for _ in range(repeat):
+                for args in cases:
+                    start = time.perf_counter()
+                    function(*args)
+                    durations.append(time.perf_counter() - start)
+
+            tracemalloc.start()
+            try:
+                for args in cases:
+                    function(*args)
+                _, peak_bytes = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+        quantiles = (
+            statistics.quantiles(durations, n=100, method="inclusive")
+            if len(durations) > 1
+            else durations * 99
+        )
+        return BenchmarkStats(
+            name=name,
+            calls=len(durations),
+            input_bytes=repeat * sum(CSTBenchmark._input_bytes(args) for args in cases),
+            total_seconds=sum(durations),
+            p50_ms=quantiles[49] * 1000 if quantiles else 0.0,
+            p90_ms=quantiles[89] * 1000 if quantiles else 0.0,
+            p99_ms=quantiles[98] * 1000 if quantiles else 0.0,
+            peak_bytes=peak_bytes,
+        )
+
+    @staticmethod
+    def _input_bytes(args: tuple) -> int:
+        """
+        Parameters:
+            args (tuple): The arguments of one call
+
+        Returns:
+            int: The size of the source code processed by the call
+        """
+
+        arg = args[0]
+        if isinstance(arg, str):
+            return len(arg.encode("utf8"))
+        if isinstance(arg, PullRequestDiffContext):
+            return sum(len(code.encode("utf8")) for code in arg.code_before)
+        return len(arg.before.encode("utf8")) + len(arg.after.encode("utf8"))
+
+    @staticmethod
+    def compare(
+        results: list[BenchmarkStats], baseline_path: Path, threshold: float
+    ) -> list[str]:
+        """
+        Compares the median durations with a stored baseline.
+
+        Parameters:
+            results (list): The statistics of the current run
+            baseline_path (Path): JSON file written by save_baseline
+            threshold (float): Allowed slowdown, e.g. 0.1 for 10%
+
+        Returns:
+            list: A description of each operation slower than allowed
+        """
+
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+        regressions = []
+        for stats in results:
+            reference = baseline.get(stats.name)
+            if not reference or not reference["p50_ms"]:
+                continue
+            slowdown = stats.p50_ms / reference["p50_ms"] - 1
+            if slowdown > threshold:
+                regressions.append(
+                    f"{stats.name}: p50 {stats.p50_ms:.2f} ms vs. {reference['p50_ms']:.2f} ms "
+                    f"(+{slowdown:.0%}, allowed +{threshold:.0%})"
+                )
+        return regressions
+
+    @staticmethod
+    def save_baseline(results: list[BenchmarkStats], baseline_path: Path) -> None:
+        """
+        Stores the statistics of a run as the baseline for later comparisons.
+
+        Parameters:
+            results (list): The statistics of the run
+            baseline_path (Path): The JSON file to write
+        """
+
+        baseline_path.write_text(
+            json.dumps(
+                {
+                    stats.name: {
+                        "calls": stats.calls,
+                        "p50_ms": stats.p50_ms,
+                        "p90_ms": stats.p90_ms,
+                        "p99_ms": stats.p99_ms,
+                        "peak_bytes": stats.peak_bytes,
+                    }
+                    for stats in results
+                },
+                indent=2,
+            ),
+            encoding="utf-8",
+        )
@@ -1,22 +1,298 @@
+import multiprocessing
 import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
-from tree_sitter import Language, Node, Parser, Tree
+from tree_sitter import Node, Tree
 
-from webhook_handler.helper import git_diff
+from webhook_handler.helper import general, git_diff
+from webhook_handler.models import DiffHunk, Symbol
+from webhook_handler.services.line_ranges import LineRangeSet
+from webhook_handler.services.parse_cache import ParseTreeCache
+from webhook_handler.services.parser_pool import ParserPool
 from webhook_handler.services.pr_diff_context import PullRequestDiffContext
+from webhook_handler.services.scope_index import ScopeIntervalIndex
+from webhook_handler.services.symbol_index import SymbolIndex
+
+# annotated lines of sliced code, e.g. "12 @decorator", "12 function foo() {" or "12 "
+DECORATOR_START_REGEX = re.compile(r"^\s*\d*\s*@")
+FUNCTION_OR_CLASS_START_REGEX = re.compile(
+    r"^\s*\d*\s*(?:(?:async\s+)?function\b|class\b|(?:async\s+)?[A-Za-z_$][A-Za-z0-9:$]*\s*\()"
+)
+EMPTY_ANNOTATED_LINE_REGEX = re.compile(r"\d+ ")
+
+# items whose decorators and doc comments are kept together with them when slicing
+DECORATED_ITEM_TYPES = {"mod_item", "function_item", "method_definition"}
+
+# items which open a new scope, with the name used if the item has none
+SCOPE_ITEM_FALLBACK_NAMES = {
+    "mod_item": "<module>",
+    "function_item": "<function>",
+    "attribute_item": "<attribute>",
+    "macro_definition": "<macro>",
+    "struct_item": "<struct>",
+    "impl_item": "<impl>",
+    "enum_item": "<enum>",
+    "use_declaration": "<attribute>",
+    "static_item": "<attribute>",
+}
+
+
+# CSTBuilder of a slicing worker process, created by _init_slicing_worker
+_worker_cst_builder = None
+
+
+def _init_slicing_worker(
+    parse_cache_max_bytes: int, parse_timeout_seconds: float
+) -> None:
+    """
+    Sets up the parser (and parse cache) of a slicing worker process once, they are reused for all its jobs.
+
+    Parameters:
+        parse_cache_max_bytes (int): The memory budget of the worker's parse cache, 0 to disable it
+        parse_timeout_seconds (float): Parses taking longer are given up (0 for no limit)
+    """
+
+    global _worker_cst_builder
+    parse_cache = (
+        ParseTreeCache(parse_cache_max_bytes) if parse_cache_max_bytes else None
+    )
+    _worker_cst_builder = CSTBuilder(
+        ParserPool(ParserPool.rust_language(), timeout_seconds=parse_timeout_seconds),
+        parse_cache=parse_cache,
+    )
+
+
+def _slice_file_in_worker(before: str, after: str, diff: str) -> str:
+    return _worker_cst_builder._slice_file(before, after, diff)
 
 
 class CSTBuilder:
-    def __init__(self, language: Language, pr_diff_ctx: PullRequestDiffContext) -> None:
-        self._parser = Parser(language)
+    # process pool shared by all instances (i.e. all PRs), created on first use
+    _slicing_pool: ProcessPoolExecutor | None = None
+    _slicing_pool_lock = threading.Lock()
+
+    def __init__(
+        self,
+        parser_pool: ParserPool,
+        pr_diff_ctx: PullRequestDiffContext | None = None,
+        parse_cache: ParseTreeCache | None = None,
+        slicing_workers: int = 0,
+        symbol_index: SymbolIndex | None = None,
+    ) -> None:
+        self._parser_pool = parser_pool
         self._pr_diff_ctx = pr_diff_ctx
+        self._parse_cache = parse_cache
+        self._slicing_workers = slicing_workers
+        self._symbol_index = symbol_index
 
     def _parse(self, source_code: str) -> Tree:
+        source = bytes(source_code, "utf8")
         try:
-            return self._parser.parse(bytes(source_code, "utf8"))
+            if self._parse_cache is not None:
+                return self._parse_cache.get_or_parse(source, self._parser_pool.parse)
+            return self._parser_pool.parse(source)
         except SyntaxError:
             raise ValueError("Failed to parse source code")
 
+    def _reparse(
+        self, old_code: str, new_code: str, hunks: list[DiffHunk] | None = None
+    ) -> Tree | None:
+        """
+        Parses new_code incrementally by editing the (cached) tree of old_code, so only the changed regions are reparsed.
+        The edits are derived from the diff hunks if given, otherwise from the common prefix and suffix
+        of both versions (e.g. a function inserted by append_function).
+
+        Parameters:
+            old_code (str): The previous version of the code
+            new_code (str): The code to parse
+            hunks (list, optional): The hunks of the diff between both versions
+
+        Returns:
+            Tree | None: The syntax tree of new_code, None if the parse timed out
+        """
+
+        old_source = bytes(old_code, "utf8")
+        new_source = bytes(new_code, "utf8")
+        if self._parse_cache is None or old_source == new_source:
+            return self._parse(
+                new_code
+            )  # without a cache there is no old tree to reuse
+
+        def _parse_incrementally(source: bytes) -> Tree:
+            edits = (
+                self._derive_edits_from_hunks(old_source, source, hunks)
+                if hunks is not None
+                else None
+            ) or [self._derive_edit_from_affixes(old_source, source)]
+
+            old_tree = self._parse(old_code)
+            if old_tree is None:  # the old version timed out, nothing to reuse
+                return self._parser_pool.parse(source)
+            old_tree = old_tree.copy()  # cached trees must not be edited
+            for edit in edits:
+                old_tree.edit(*edit)
+            return self._parser_pool.parse(source, old_tree)
+
+        try:
+            return self._parse_cache.get_or_parse(new_source, _parse_incrementally)
+        except SyntaxError:
+            raise ValueError("Failed to parse source code")
+
+    @staticmethod
+    def _derive_edits_from_hunks(
+        old_source: bytes, new_source: bytes, hunks: list[DiffHunk]
+    ) -> list[tuple] | None:
+        """
+        Translates diff hunks into tree-sitter edits. The edits are ordered bottom-up, so each of them
+        can be expressed in the coordinates of the old source.
+
+        Parameters:
+            old_source (bytes): The previous version of the code
+            new_source (bytes): The new version of the code
+            hunks (list): The hunks of the diff between both versions
+
+        Returns:
+            list | None: Arguments for Tree.edit, None if the hunks do not match the sources
+        """
+
+        old_offsets = CSTBuilder._get_line_offsets(old_source)
+        new_offsets = CSTBuilder._get_line_offsets(new_source)
+
+        edits = []
+        old_position = new_position = 0
+        for hunk in hunks:
+            # a hunk without old (new) lines starts after the given line
+            old_row = hunk.old_start - 1 if hunk.old_count else hunk.old_start
+            new_row = hunk.new_start - 1 if hunk.new_count else hunk.new_start
+            old_end_row = old_row + hunk.old_count
+            new_end_row = new_row + hunk.new_count
+            if old_end_row >= len(old_offsets) or new_end_row >= len(new_offsets):
+                return None
+
+            start_byte = old_offsets[old_row]
+            old_end_byte = old_offsets[old_end_row]
+            new_start_byte = new_offsets[new_row]
+            new_end_byte = new_offsets[new_end_row]
+
+            # the code between two hunks must be unchanged
+            if (
+                old_source[old_position:start_byte]
+                != new_source[new_position:new_start_byte]
+            ):
+                return None
+            old_position, new_position = old_end_byte, new_end_byte
+
+            # the hunks above have not been applied yet, so rows are shifted back to the old source
+            start_point = CSTBuilder._get_point(old_source, start_byte)
+            new_start_point = CSTBuilder._get_point(new_source, new_start_byte)
+            new_end_point = CSTBuilder._get_point(new_source, new_end_byte)
+            edits.append(
+                (
+                    start_byte,
+                    old_end_byte,
+                    start_byte + new_end_byte - new_start_byte,
+                    start_point,
+                    CSTBuilder._get_point(old_source, old_end_byte),
+                    (
+                        start_point[0] + new_end_point[0] - new_start_point[0],
+                        (
+                            new_end_point[1]
+                            if new_end_point[0] != new_start_point[0]
+                            else start_point[1] + new_end_point[1] - new_start_point[1]
+                        ),
+                    ),
+                )
+            )
+
+        if old_source[old_position:] != new_source[new_position:]:
+            return None
+        return list(reversed(edits))
+
+    @staticmethod
+    def _derive_edit_from_affixes(old_source: bytes, new_source: bytes) -> tuple:
+        """
+        Derives a single tree-sitter edit covering everything between the common prefix and suffix of both versions.
+
+        Parameters:
+            old_source (bytes): The previous version of the code
+            new_source (bytes): The new version of the code
+
+        Returns:
+            tuple: Arguments for Tree.edit
+        """
+
+        # binary search on slice comparisons, which run in C
+        low, high = 0, min(len(old_source), len(new_source))
+        while low < high:
+            mid = (low + high + 1) // 2
+            if old_source[:mid] == new_source[:mid]:
+                low = mid
+            else:
+                high = mid - 1
+        prefix = low
+
+        low, high = 0, min(len(old_source), len(new_source)) - prefix
+        while low < high:
+            mid = (low + high + 1) // 2
+            if (
+                old_source[len(old_source) - mid :]
+                == new_source[len(new_source) - mid :]
+            ):
+                low = mid
+            else:
+                high = mid - 1
+        suffix = low
+
+        old_end_byte = len(old_source) - suffix
+        new_end_byte = len(new_source) - suffix
+        return (
+            prefix,
+            old_end_byte,
+            new_end_byte,
+            CSTBuilder._get_point(old_source, prefix),
+            CSTBuilder._get_point(old_source, old_end_byte),
+            CSTBuilder._get_point(new_source, new_end_byte),
+        )
+
+    @staticmethod
+    def _get_line_offsets(source: bytes) -> list[int]:
+        """
+        Returns the byte offset at which each line starts, followed by the length of the source.
+
+        Parameters:
+            source (bytes): The source code
+
+        Returns:
+            list: Byte offsets of all lines
+        """
+
+        offsets = [0]
+        position = source.find(b"\n")
+        while position != -1:
+            offsets.append(position + 1)
+            position = source.find(b"\n", position + 1)
+        if offsets[-1] != len(source):
+            offsets.append(len(source))
+        return offsets
+
+    @staticmethod
+    def _get_point(source: bytes, byte: int) -> tuple[int, int]:
+        """
+        Converts a byte offset into a tree-sitter point (row, column in bytes).
+
+        Parameters:
+            source (bytes): The source code
+            byte (int): The byte offset
+
+        Returns:
+            tuple: The row and column of the offset
+        """
+
+        row = source.count(b"\n", 0, byte)
+        return row, byte - (source.rfind(b"\n", 0, byte) + 1)
+
     def get_sliced_code_files(self):
         """
         Detects which files have been modified to call slice_javascript_code.
@@ -39,153 +315,220 @@ class CSTBuilder:
             "diff --git" + x
             for x in self._pr_diff_ctx.golden_code_patch.split("diff --git")[1:]
         ]
-        result = []
-
-        for before, after, diff in zip(
-            self._pr_diff_ctx.code_before, code_after, patches
-        ):
-            # before_map is lines removed, after_map is lines added
-            before_map, after_map = self._build_changed_lines_scope_map(
-                before, after, diff
-            )
-            # print("--- Before Map ---")
-            # print(before_map)
-            # if no changes, keep original code
-            if not before_map and not after_map:
-                result.append(before)
-                continue
+        jobs = list(zip(self._pr_diff_ctx.code_before, code_after, patches))
+
+        if self._slicing_workers > 0 and len(jobs) > 1:
+            # only the sources and the sliced code cross the process boundary, results keep the file order
+            pool = self._get_slicing_pool()
+            try:
+                return list(pool.map(_slice_file_in_worker, *zip(*jobs)))
+            except BrokenProcessPool:
+                with CSTBuilder._slicing_pool_lock:
+                    if CSTBuilder._slicing_pool is pool:
+                        CSTBuilder._slicing_pool = None  # recreated by the next call
+                raise
+
+        return [self._slice_file(before, after, diff) for before, after, diff in jobs]
+
+    def _slice_file(self, before: str, after: str, diff: str) -> str:
+        """
+        Slices one changed file down to the items touched by its diff.
+
+        Parameters:
+            before (str): The file content before the PR
+            after (str): The file content after the PR
+            diff (str): The diff of the file
+
+        Returns:
+            str: The sliced code, the original code if no item was changed
+        """
+
+        # before_map is lines removed, after_map is lines added
+        before_map, after_map = self._build_changed_lines_scope_map(before, after, diff)
+        # print("--- Before Map ---")
+        # print(before_map)
+        # if no changes, keep original code
+        if not before_map and not after_map:
+            return before
+
+        global_funcs, class2methods = self._get_slicing_targets(before_map, after_map)
+        sliced = self._slice_rust_code(before, global_funcs, class2methods)
+        # print("--- Sliced Code ---")
+        # print(sliced)
+        return sliced
+
+    def _get_slicing_targets(
+        self, before_map: list[dict[str, str]], after_map: list[dict[str, str]]
+    ) -> tuple[list[str], dict]:
+        """
+        Determines which items _slice_rust_code keeps, given the scopes of the changed lines.
 
-            funcs_before = [list(x.values())[0] for x in before_map]
-            # print("--- funcs before ---")
-            # print(funcs_before)
-            funcs_after = [list(x.values())[0] for x in after_map]
+        Parameters:
+            before_map (list): Mapping of each removed line to its scope
+            after_map (list): Mapping of each added line to its scope
+
+        Returns:
+            list: The changed functions with a 'global' scope
+            dict: The changed methods of each class
+        """
 
-            map_cls = self._build_function_class_maps(
-                funcs_before
-            ) + self._build_function_class_maps(funcs_after)
+        funcs_before = [list(x.values())[0] for x in before_map]
+        # print("--- funcs before ---")
+        # print(funcs_before)
+        funcs_after = [list(x.values())[0] for x in after_map]
 
-            # print("--- Function-Class Maps ---")
-            # print(map_cls)
+        map_cls = self._build_function_class_maps(
+            funcs_before
+        ) + self._build_function_class_maps(funcs_after)
 
-            class2methods = {}
-            for m2c in map_cls:
-                for k, v in m2c.items():
-                    class2methods[v] = class2methods.get(v, []) + [k]
+        # print("--- Function-Class Maps ---")
+        # print(map_cls)
 
-            global_funcs = class2methods.pop("global", [])
+        class2methods = {}
+        for m2c in map_cls:
+            for k, v in m2c.items():
+                class2methods[v] = class2methods.get(v, []) + [k]
 
-            sliced = self._slice_rust_code(before, global_funcs, class2methods)
-            # print("--- Sliced Code ---")
-            # print(sliced)
-            result.append(sliced)
-        return result
+        global_funcs = class2methods.pop("global", [])
+        return global_funcs, class2methods
 
-    def extract_changed_tests(self, pr_file_diff) -> list:
+    def _get_slicing_pool(self) -> ProcessPoolExecutor:
         """
-        Analyzes the file for both pre- and post-PR, determines the changed tests and extracts their descriptions
+        Returns the shared slicing pool, creating it on first use.
 
-        Parameters:
-            pr_file_diff (PullRequestFileDiff): The file diff including the file name and content of pre- and post-PR
+        Returns:
+            ProcessPoolExecutor: The process pool
+        """
+
+        with CSTBuilder._slicing_pool_lock:
+            if CSTBuilder._slicing_pool is None:
+                parse_cache_max_bytes = (
+                    self._parse_cache.max_bytes if self._parse_cache is not None else 0
+                )
+                CSTBuilder._slicing_pool = ProcessPoolExecutor(
+                    max_workers=self._slicing_workers,
+                    # forking the (multithreaded) web server is unsafe
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_slicing_worker,
+                    initargs=(
+                        parse_cache_max_bytes,
+                        self._parser_pool.timeout_seconds,
+                    ),
+                )
+            return CSTBuilder._slicing_pool
+
+    def get_changed_symbols(self) -> list[Symbol]:
+        """
+        Looks up the items touched by the source code changes of the PR in the symbol index
+        of the base commit, without parsing any file.
 
         Returns:
-            list: All descriptions of changed tests
+            list: The touched items (outermost first per file), empty if there is no symbol index
         """
 
-        tests_old = self._build_test_scope_map(self._parse(pr_file_diff.before))
-        tests_new = self._build_test_scope_map(self._parse(pr_file_diff.after))
+        if self._symbol_index is None:
+            return []
 
-        if tests_new:
-            if tests_old:
-                contributing_tests = self._find_changed_tests(tests_old, tests_new)
-            else:
-                contributing_tests = list(tests_new.keys())
+        symbols: dict[Symbol, None] = {}  # ordered set
+        for pr_file_diff in self._pr_diff_ctx.source_code_file_diffs:
+            for hunk in git_diff.parse_hunks(pr_file_diff.unified_test_diff()):
+                if hunk.removed:
+                    start_line, end_line = hunk.removed[0][0], hunk.removed[-1][0]
+                elif hunk.added:  # the lines around the insertion point
+                    start_line = hunk.old_start + hunk.added[0][0] - hunk.new_start - 1
+                    end_line = start_line + 1
+                else:
+                    continue
+                for symbol in self._symbol_index.find_overlapping(
+                    pr_file_diff.name, start_line, end_line
+                ):
+                    symbols[symbol] = None
+        return list(symbols)
 
-            return [
-                (
-                    desc
-                    if tests_new[desc]["scope"] == "global"
-                    else f"{tests_new[desc]['scope']} {desc}"
-                )
-                for desc in contributing_tests
-            ]
+    def extract_changed_tests(self, pr_file_diff) -> list[str]:
+        """
+        Analyzes the file for both pre- and post-PR, determines the new or changed test functions and
+        returns their full paths, which select exactly these tests with `cargo test -- --exact`.
 
-        return []
+        Parameters:
+            pr_file_diff (PullRequestFileDiff): The file diff including the file name and content of pre- and post-PR
 
-    def append_function(self, file_content: str, new_function: str) -> str:
+        Returns:
+            list: The paths of all changed tests (e.g. parser::tests::nested::test_x)
+        """
+
+        module_path = general.get_module_path(pr_file_diff.name)
+        tests_old = self._build_test_scope_map(
+            self._parse(pr_file_diff.before), pr_file_diff.before, module_path
+        )
+        tests_new = self._build_test_scope_map(
+            self._reparse(pr_file_diff.before, pr_file_diff.after),
+            pr_file_diff.after,
+            module_path,
+        )
+        return self._find_changed_tests(tests_old, tests_new)
+
+    def append_function(self, file_content: str, new_function: str) -> str | None:
         """
-        Inserts new_function at the bottom of the file_content.
+        Inserts new_function at the end of the file's test module (the last top-level module marked
+        with #[cfg(test)] or named 'tests'), or at the bottom of the file if there is none.
 
         Parameters:
             file_content (str): The file content where the function will be inserted
             new_function (str): The new function to be inserted
 
         Returns:
-            str: The new file content with the inserted function
+            str | None: The new file content with the inserted function, None if the file could not be parsed
         """
 
         tree = self._parse(file_content)
 
         if tree is not None:
-            top_level_items: list[Node] = []
-
+            source = bytes(file_content, "utf8")
+            test_module = None
             for root_child in tree.root_node.children:
-                if root_child.type == "expression_statement":
-                    top_level_items.append(root_child)
-
-            if not top_level_items:
-                raise ValueError("No top-level blocks found in the file content!")
-
-            # find the last top-level item
-            last_item = top_level_items[-1]
-
-            if (
-                self._get_call_expression_type(last_item) == "describe"
-            ):  # last block was 'describe'
-                last_method = None
-                for child in self._get_call_expression_content(last_item):
-                    if child.type == "expression_statement":
-                        last_method = child
-
-                if not last_method:
-                    raise ValueError(
-                        f"No nested blocks found in the describe block '{self._get_call_expression_description(last_item)}'!"
+                if root_child.type == "mod_item" and (
+                    self._get_node_name(root_child) == "tests"
+                    or any(
+                        self._starts_with(source, attribute, b"#[cfg(test)]")
+                        for attribute in self._get_attributes(root_child)
                     )
+                ):
+                    test_module = root_child
 
-                # determine indentation
-                last_func_line = last_method.start_point[
-                    0
-                ]  # line before the last block
-                last_code_line = (
-                    last_method.end_point[0] + 1
-                )  # last code line of the above block
-
-            else:  # last function was a function in the top-level, not inside a class
-                last_func_line = last_item.start_point[0]  # line before the last block
-                last_code_line = (
-                    last_item.end_point[0] + 1
-                )  # last code line of the above block
-
-            # extract indentation
-            lines = file_content.splitlines()
-            last_func_line_content = lines[last_func_line]
-            indentation = len(last_func_line_content) - len(
-                last_func_line_content.lstrip()
+            body = test_module.child_by_field_name("body") if test_module else None
+            closing_line_start = (
+                source.rfind(b"\n", 0, body.end_byte - 1) + 1 if body else 0
             )
+            if (
+                body is not None
+                and not source[closing_line_start : body.end_byte - 1].strip()
+            ):  # closing brace on its own line
+                insert_at = closing_line_start
+                if body.named_children:
+                    indentation = self._get_indentation(source, body.named_children[-1])
+                else:
+                    indentation = self._get_indentation(source, test_module) + "    "
+            else:  # no test module, test functions are valid in any module
+                insert_at = len(source)
+                indentation = ""
+                if source and not source.endswith(b"\n"):
+                    source += b"\n"
+                    insert_at += 1
 
             # add the new function
             indented_new_function = "\n".join(
-                " " * indentation + line if line.strip() else ""
+                indentation + line if line.strip() else ""
                 for line in new_function.splitlines()
             )
 
-            updated_lines = (
-                lines[:last_code_line]
-                + ["\n" + indented_new_function]
-                + lines[last_code_line:]
-            )
-            return "\n".join(updated_lines)
+            return (
+                source[:insert_at]
+                + bytes(f"\n{indented_new_function}\n", "utf8")
+                + source[insert_at:]
+            ).decode("utf-8")
 
-        return ""
+        return None
 
     def _build_changed_lines_scope_map(
         self, before: str, after: str, diff: str
@@ -203,250 +546,92 @@ class CSTBuilder:
             list: Mapping of each line after to its scope
         """
 
-        def _build_line_scope_map(tree: Tree) -> dict[int, str]:
-            line_scope_map: dict[int, str] = {}
-
-            def _add_scope(node: Node, scope_name: str) -> None:
-                if any(
-                    [
-                        node.start_point is None,
-                        node.end_point is None,
-                        node.start_point[0] is None,
-                        node.end_point[0] is None,
-                    ]
-                ):
-                    return
+        def _build_line_scope_map(tree: Tree, source: bytes) -> ScopeIntervalIndex:
+            intervals: list[tuple[int, int, str]] = []
 
-                start_line = node.start_point[0] + 1
-                end_line = node.end_point[0] + 1
-                for ln in range(start_line, end_line + 1):
-                    line_scope_map[ln] = scope_name
+            # iterative pre-order walk, so nested items are added after (and win over) their parents
+            stack = [(child, "global") for child in reversed(tree.root_node.children)]
+            while stack:
+                node, scope_name = stack.pop()
+                fallback_name = SCOPE_ITEM_FALLBACK_NAMES.get(node.type)
 
-            def _handle_decorators(node: Node, scope_name: str) -> None:
-                prev = node.prev_sibling
-                if prev:
-                    txt = prev.text.decode("utf-8")
-                    # Handle decorators and JSDocs
-                    if all(
-                        [
-                            (txt.startswith("@") or txt.startswith("/**")),
-                            node.start_point[0] - 1 == prev.end_point[0],
-                        ]
+                if fallback_name is None:
+                    if not (
+                        scope_name == "global"
+                        and node.type == "comment"
+                        and not self._starts_with(source, node, b"/**")
                     ):
-                        _add_scope(prev, scope_name)
-                        _handle_decorators(prev, scope_name)
-
-            def _visit_body(node: Node, scope_name: str) -> None:
-                for child in self._get_node_body(node):
-                    _visit_node(child, scope_name)
-
-            def _visit_node(node: Node, scope_name: str = "global") -> None:
+                        intervals.append(
+                            (node.start_point[0] + 1, node.end_point[0] + 1, scope_name)
+                        )
+                    continue
 
+                name = self._get_node_name(node, fallback_name)
                 if node.type == "mod_item":
-                    new_scope = self._get_node_name(node, "<module>")
-                    scope_name = f"{scope_name}:{new_scope}"  # concatenate with colon for modules
-
-                    _handle_decorators(node, scope_name)
-                    _add_scope(node, scope_name)
-                    _visit_body(node, scope_name)
-
+                    # concatenate with colon for modules
+                    scope_name = f"{scope_name}:{name}"
+                    new_scope = scope_name
+                elif scope_name == "global":
+                    new_scope = name
                 elif node.type == "function_item":
-                    new_scope = self._get_node_name(node, "<function>")
-                    if scope_name != "global":
-                        new_scope = f"{scope_name}.{new_scope}"  # concatenate with dot for functions
-
-                    _handle_decorators(node, scope_name)
-                    _add_scope(node, scope_name)
-                    _visit_body(node, new_scope)
-
-                elif node.type == "attribute_item":
-                    new_scope = self._get_node_name(node, "<attribute>")
-                    if scope_name != "global":
-                        new_scope = f"{scope_name}:{new_scope}"  # concatenate with colon for classes
-
-                    _handle_decorators(node, scope_name)
-                    _add_scope(node, scope_name)
-                    _visit_body(node, new_scope)
-
-                elif node.type == "macro_definition":
-                    new_scope = self._get_node_name(node, "<macro>")
-                    if scope_name != "global":
-                        new_scope = f"{scope_name}:{new_scope}"  # concatenate with colon for classes
-
-                    _handle_decorators(node, scope_name)
-                    _add_scope(node, scope_name)
-                    _visit_body(node, new_scope)
-
-                elif node.type == "inner-attribute_item":
-                    new_scope = self._get_node_name(node, "<inner-attribute>")
-                    if scope_name != "global":
-                        new_scope = f"{scope_name}:{new_scope}"  # concatenate with colon for classes
-
-                    _handle_decorators(node, scope_name)
-                    _add_scope(node, scope_name)
-                    _visit_body(node, new_scope)
-
-                elif node.type == "struct_item":
-                    new_scope = self._get_node_name(node, "<struct>")
-                    if scope_name != "global":
-                        new_scope = f"{scope_name}:{new_scope}"  # concatenate with colon for classes
-
-                    _handle_decorators(node, scope_name)
-                    _add_scope(node, scope_name)
-                    _visit_body(node, new_scope)
-
-                elif node.type == "impl_item":
-                    new_scope = self._get_node_name(node, "<impl>")
-                    if scope_name != "global":
-                        new_scope = f"{scope_name}:{new_scope}"  # concatenate with colon for classes
-
-                    _handle_decorators(node, scope_name)
-                    _add_scope(node, scope_name)
-                    _visit_body(node, new_scope)
-
-                elif node.type == "enum_item":
-                    new_scope = self._get_node_name(node, "<enum>")
-                    if scope_name != "global":
-                        new_scope = f"{scope_name}:{new_scope}"  # concatenate with colon for classes
-
-                    _handle_decorators(node, scope_name)
-                    _add_scope(node, scope_name)
-                    _visit_body(node, new_scope)
-
-                elif node.type == "use_declaration":
-                    new_scope = self._get_node_name(node, "<attribute>")
-                    if scope_name != "global":
-                        new_scope = f"{scope_name}:{new_scope}"  # concatenate with colon for classes
-
-                    _handle_decorators(node, scope_name)
-                    _add_scope(node, scope_name)
-                    _visit_body(node, new_scope)
-
-                elif node.type == "static_item":
-                    new_scope = self._get_node_name(node, "<attribute>")
-                    if scope_name != "global":
-                        new_scope = f"{scope_name}:{new_scope}"  # concatenate with colon for classes
-
-                    _handle_decorators(node, scope_name)
-                    _add_scope(node, scope_name)
-                    _visit_body(node, new_scope)
-
+                    new_scope = (
+                        f"{scope_name}.{name}"  # concatenate with dot for functions
+                    )
                 else:
-                    if any(
-                        [
-                            node.start_point is None,
-                            node.end_point is None,
-                            node.start_point[0] is None,
-                            node.end_point[0] is None,
-                            all(
-                                [
-                                    scope_name == "global",
-                                    node.type == "comment",
-                                    not node.text.decode("utf-8").startswith("/**"),
-                                ]
-                            ),
-                        ]
-                    ):
-                        pass
-                    else:
-                        _add_scope(node, scope_name)
+                    new_scope = (
+                        f"{scope_name}:{name}"  # concatenate with colon for classes
+                    )
 
-            for root_child in tree.root_node.children:
-                _visit_node(root_child)
+                # decorators and doc comments directly above the item
+                decorated = node
+                prev = node.prev_sibling
+                while (
+                    prev is not None
+                    and (
+                        self._starts_with(source, prev, b"@")
+                        or self._starts_with(source, prev, b"/**")
+                    )
+                    and decorated.start_point[0] - 1 == prev.end_point[0]
+                ):
+                    intervals.append(
+                        (prev.start_point[0] + 1, prev.end_point[0] + 1, scope_name)
+                    )
+                    decorated, prev = prev, prev.prev_sibling
 
-            # print("--- Line Scope Map ---")
-            # print(line_scope_map)
+                intervals.append(
+                    (node.start_point[0] + 1, node.end_point[0] + 1, scope_name)
+                )
+                stack.extend(
+                    (child, new_scope) for child in reversed(self._get_node_body(node))
+                )
 
-            # print("--- Diff ---")
-            # print(diff)
-            return line_scope_map
+            return ScopeIntervalIndex(intervals)
 
-        # extract all the added and removed lines from the diff together with their line numbers
-        added, removed = self._get_added_removed_lines(diff)
+        # extract all the hunks from the diff together with their added and removed lines
+        hunks = git_diff.parse_hunks(diff)
 
-        tree_after = self._parse(after)
+        tree_after = self._reparse(before, after, hunks)
         after_map: list[dict[str, str]] = []
         if tree_after is not None:
-            line_scope_map_after = _build_line_scope_map(tree_after)
-            for added_line_number, added_line_text in added:
-                scope = line_scope_map_after.get(added_line_number, "global")
-                after_map.append({added_line_text: scope})
+            scope_index_after = _build_line_scope_map(tree_after, bytes(after, "utf8"))
+            for hunk in hunks:
+                scopes = scope_index_after.scopes_of([ln for ln, _ in hunk.added])
+                for (_, added_line_text), scope in zip(hunk.added, scopes):
+                    after_map.append({added_line_text: scope})
 
         tree_before = self._parse(before)
         before_map: list[dict[str, str]] = []
         if tree_before is not None:
-            line_scope_map_before = _build_line_scope_map(tree_before)
-            for removed_line_number, removed_line_text in removed:
-                scope = line_scope_map_before.get(removed_line_number, "global")
-                before_map.append({removed_line_text: scope})
+            scope_index_before = _build_line_scope_map(
+                tree_before, bytes(before, "utf8")
+            )
+            for hunk in hunks:
+                scopes = scope_index_before.scopes_of([ln for ln, _ in hunk.removed])
+                for (_, removed_line_text), scope in zip(hunk.removed, scopes):
+                    before_map.append({removed_line_text: scope})
 
         return before_map, after_map
 
-    @staticmethod
-    def _get_added_removed_lines(
-        diff: str,
-    ) -> tuple[list[tuple[int, str]], list[tuple[int, str]]]:
-        """
-        Analyzes diff to extract which lines have been changed.
-
-        Parameters:
-            diff (str): The diff to analyze
-
-        Returns:
-            list: Added lines
-            list: Removed lines
-        """
-
-        added: list[tuple[int, str]] = []
-        removed: list[tuple[int, str]] = []
-
-        hunk_header_regex = re.compile(
-            r"^@@ -(\d+)(?:,\d+)? \+(\d+)(?:,\d+)? @@"
-        )  # matches "@@ -10,7 +10,8 @@", but captures only 10 and 8
-        diff_lines = diff.splitlines()
-        i = 0
-
-        while i < len(diff_lines):
-            line = diff_lines[i]
-            match = hunk_header_regex.match(line)
-            if match:
-                # start lines
-                old_start = int(match.group(1))  # first group: original file start line
-                new_start = int(match.group(2))  # second group: new file start line
-
-                # line counters
-                current_line_original = old_start - 1
-                current_line_updated = new_start - 1
-                i += 1
-
-                while i < len(diff_lines) and not diff_lines[i].startswith("@@"):
-                    patch_line = diff_lines[i]
-
-                    # lines that begin with '+' but not "+++" are added lines
-                    if patch_line.startswith("+") and not patch_line.startswith("+++"):
-                        current_line_updated += 1
-                        added_text = patch_line[1:]  # remove leading '+'
-                        added.append((current_line_updated, added_text))
-
-                    # lines that begin with '-' but not "---" are removed lines
-                    elif patch_line.startswith("-") and not patch_line.startswith(
-                        "---"
-                    ):
-                        current_line_original += 1
-                        removed_text = patch_line[1:]  # remove leading '-'
-                        removed.append((current_line_original, removed_text))
-
-                    else:
-                        # skip other lines
-                        current_line_original += 1
-                        current_line_updated += 1
-
-                    i += 1
-            else:
-                i += 1
-
-        return added, removed
-
     def _slice_rust_code(
         self, source_code: str, global_funcs: list[str], class2methods: dict
     ) -> str:
@@ -475,20 +660,18 @@ class CSTBuilder:
         """
 
         tree = self._parse(source_code)
-        lines_to_skip: set[int] = set()
+        source = bytes(source_code, "utf8")
+        lines_to_skip = LineRangeSet()
         source_lines = source_code.splitlines(keepends=True)
 
         def _is_jsdoc(node: Node) -> bool:
-            return node.type == "comment" and node.text.decode("utf-8").startswith(
-                "/**"
-            )
+            return node.type == "comment" and self._starts_with(source, node, b"/**")
 
         def _skip_lines(start: int, end: int) -> None:
-            for ln in range(start, end + 1):
-                lines_to_skip.add(ln)
+            lines_to_skip.add(start, end)
 
         def _keep_lines(start: int, end: int) -> None:
-            lines_to_skip.difference_update(list(range(start, end + 1)))
+            lines_to_skip.remove(start, end)
 
         def _keep_top_level_node(node: Node) -> bool:
             # print(f"Top-level node type: {node.type}")
@@ -530,70 +713,102 @@ class CSTBuilder:
             return False
 
         def _handle_decorators(node: Node) -> None:
+            # decorators and doc comments never contain items themselves, keeping their lines suffices
             prev = node.prev_sibling
-            if prev:
-                txt = prev.text.decode("utf-8")
-                if all(
-                    [
-                        (txt.startswith("@") or txt.startswith("/**")),
-                        node.start_point[0] - 1 == prev.end_point[0],
-                    ]
-                ):
-                    _mark_lines(prev, True)
-                    _handle_decorators(prev)
-
-        def _mark_lines(node: Node, keep: bool) -> None:
-            if any(
-                [
-                    node.start_point is None,
-                    node.end_point is None,
-                    node.start_point[0] is None,
-                    node.end_point[0] is None,
-                ]
+            while (
+                prev is not None
+                and (
+                    self._starts_with(source, prev, b"@")
+                    or self._starts_with(source, prev, b"/**")
+                )
+                and node.start_point[0] - 1 == prev.end_point[0]
             ):
-                return
+                _keep_lines(prev.start_point[0] + 1, prev.end_point[0] + 1)
+                node, prev = prev, prev.prev_sibling
+
+        def _mark_lines(root_children: list[Node]) -> None:
+            # iterative pre-order walk, children are marked after their parent
+            stack = [
+                (child, _keep_top_level_node(child))
+                for child in reversed(root_children)
+            ]
+            while stack:
+                node, keep = stack.pop()
+                start_line = node.start_point[0] + 1
+                end_line = node.end_point[0] + 1
+                if not keep:
+                    _skip_lines(start_line, end_line)
+                    continue
 
-            start_line = node.start_point[0] + 1
-            end_line = node.end_point[0] + 1
-            if keep:
                 _keep_lines(start_line, end_line)
-            else:
-                _skip_lines(start_line, end_line)
-                return
-
-            if node.type in {
-                "mod_item",
-                "function_item",
-                "method_definition",
-            }:
-                _handle_decorators(node)
-            if node.type == "mod_item":
-                for child in self._get_node_body(node):
-                    child_keep = _keep_class_child(child, self._get_node_name(node))
-                    _mark_lines(child, child_keep)
+                if node.type in DECORATED_ITEM_TYPES:
+                    _handle_decorators(node)
+                if node.type == "mod_item":
+                    module_name = self._get_node_name(node)
+                    stack.extend(
+                        (child, _keep_class_child(child, module_name))
+                        for child in reversed(self._get_node_body(node))
+                    )
 
         if tree is not None:
-            for root_child in tree.root_node.children:
-                keep_flag = _keep_top_level_node(root_child)
-                _mark_lines(root_child, keep_flag)
+            _mark_lines(tree.root_node.children)
+            return self._emit_sliced_lines(source_lines, lines_to_skip)
 
-            result_lines = []
-            for i, original_line in enumerate(source_lines, start=1):
-                if i not in lines_to_skip:
-                    stripped_line = original_line.rstrip("\n")
-                    annotated_line = f"{i} {stripped_line}\n"
-                    result_lines.append(annotated_line)
+        return ""
 
-            # print("--- REsult lines ---")
-            # print(result_lines)
-            # print("--- End Result lines ---")
+    def _emit_sliced_lines(
+        self, source_lines: list[str], lines_to_skip: LineRangeSet
+    ) -> str:
+        """
+        Annotates the kept lines with their original line numbers in a single pass, dropping
+        decorators which don't belong to a function or class and collapsing runs of empty lines.
 
-            res = "".join(result_lines)
-            res_cln = self._filter_stray_decorators(res)
-            res_cln = re.sub(r"(^\d+ \n)(\d+ \n)+", r"\1", res_cln, flags=re.MULTILINE)
-            return res_cln
+        Parameters:
+            source_lines (list): The lines of the source code, including line endings
+            lines_to_skip (LineRangeSet): The lines removed by slicing
 
-        return ""
+        Returns:
+            str: The annotated sliced code
+        """
+
+        result: list[str] = []
+        pending_decorators: list[str] = []  # kept once the decorated item shows up
+        open_brackets = 0  # of the current decorator, which may span several lines
+        previous_blank = False
+        held_blank = None  # the last empty line of a run is kept if it ends the output
+
+        def _emit(line: str) -> None:
+            nonlocal previous_blank, held_blank
+            blank = EMPTY_ANNOTATED_LINE_REGEX.fullmatch(line) is not None
+            if blank and previous_blank:
+                held_blank = line
+            else:
+                held_blank = None
+                result.append(line)
+            previous_blank = blank
+
+        for start, end in lines_to_skip.gaps(1, len(source_lines)):
+            for i in range(start, end + 1):
+                stripped_line = source_lines[i - 1].rstrip("\n")
+                # stray line breaks (\r, \f, ...) end a line as well
+                for line in f"{i} {stripped_line}\n".splitlines():
+                    if open_brackets != 0:
+                        pending_decorators.append(line)
+                        open_brackets += line.count("(") - line.count(")")
+                    elif self._is_decorator_start(line):
+                        pending_decorators.append(line)
+                        open_brackets = line.count("(") - line.count(")")
+                    else:
+                        if pending_decorators:
+                            if self._is_function_or_class_start(line):
+                                for decorator in pending_decorators:
+                                    _emit(decorator)
+                            pending_decorators.clear()
+                        _emit(line)
+
+        if held_blank is not None:
+            result.append(held_blank)
+        return "\n".join(result)
 
     @staticmethod
     def _build_function_class_maps(function_list: list[str]) -> list[dict[str, str]]:
@@ -624,51 +839,54 @@ class CSTBuilder:
                 results.append({item: segments[-1][0]})
         return results
 
-    def _build_test_scope_map(self, tree: Tree) -> dict:
+    def _build_test_scope_map(
+        self, tree: Tree, source_code: str, module_path: list[str] | None = None
+    ) -> dict[str, str]:
         """
-        Builds a scope map for each call expression (test). A scope is structured using the expression descriptions.
-        Each test is saved together with its scope and content.
-
+        Collects the test functions (#[test], #[tokio::test], ...) of a Rust file, including those in
+        nested modules. Each test is saved under its full path together with its content.
 
         Parameters:
             tree (Tree): The concrete syntax tree to build a scope map from
+            source_code (str): The source code the tree was parsed from
+            module_path (list, optional): The module path of the file within its crate
 
         Returns:
-            dict: A mapping of call expressions to their scopes and content
+            dict: A mapping of test paths (e.g. parser::tests::test_x) to their content (attributes included)
         """
 
-        expression_map = {}
-
-        def _visit_body(node: Node, scope_name: str) -> None:
-            for child in self._get_call_expression_content(node):
-                _visit_node(child, scope_name)
+        test_map = {}
+        if tree is None:
+            return test_map
 
-        def _visit_node(node: Node, scope_name: str = "global") -> None:
-            expression_type = self._get_call_expression_type(node)
-            if expression_type == "it":
-                desc = self._get_call_expression_description(node, "<it>")
-                expression_map[desc] = {
-                    "scope": scope_name,
-                    "content": node.text.decode("utf-8"),
-                }
-
-            elif expression_type == "describe":
-                desc = self._get_call_expression_description(node, "<describe>")
-                if scope_name != "global":
-                    desc = f"{scope_name} {desc}"
-
-                _visit_body(node, desc)
-
-        if tree is not None:
-            for root_child in tree.root_node.children:
-                _visit_node(root_child)
+        source = bytes(source_code, "utf8")
+        # iterative pre-order walk over the modules, libtest only collects tests from module scopes
+        stack = [
+            (child, module_path or []) for child in reversed(tree.root_node.children)
+        ]
+        while stack:
+            node, path = stack.pop()
+            if node.type == "mod_item":
+                nested_path = path + [self._get_node_name(node, "<module>")]
+                stack.extend(
+                    (child, nested_path)
+                    for child in reversed(self._get_node_body(node))
+                )
+            elif node.type == "function_item":
+                attributes = self._get_attributes(node)
+                if any(self._is_test_attribute(attribute) for attribute in attributes):
+                    start_byte = (attributes[-1] if attributes else node).start_byte
+                    test_path = "::".join(path + [self._get_node_name(node)])
+                    test_map[test_path] = source[start_byte : node.end_byte].decode(
+                        "utf-8"
+                    )
 
-        return expression_map
+        return test_map
 
     @staticmethod
     def _find_changed_tests(tests_old: dict, tests_new: dict) -> list[str]:
         """
-        Finds tests that have changed between two versions of a Javascript file.
+        Finds tests that have changed between two versions of a Rust file.
 
         Parameters:
             tests_old (dict): The tests in the pre-PR version of the file
@@ -680,65 +898,61 @@ class CSTBuilder:
 
         changed_tests = []
 
-        for desc, body_new in tests_new.items():
-            body_old = tests_old.get(desc)
-            if body_old is None:  # function is new
-                changed_tests.append(desc)
-                continue
-
-            content_new = body_new["content"]
-            content_old = body_old["content"]
-            if content_old != content_new:  # function exists but has changed
-                diff = list(
-                    difflib.unified_diff(
-                        content_old.splitlines(), content_new.splitlines()
-                    )
-                )
-                if diff:
-                    changed_tests.append(desc)
+        for test_path, content_new in tests_new.items():
+            content_old = tests_old.get(test_path)
+            if content_old is None:  # function is new
+                changed_tests.append(test_path)
+            elif content_old.splitlines() != content_new.splitlines():
+                changed_tests.append(test_path)  # function exists but has changed
 
         return changed_tests
 
-    def _filter_stray_decorators(self, file_content: str) -> str:
+    @staticmethod
+    def _get_attributes(node: Node) -> list[Node]:
         """
-        Removes any decorators which don't belong to a function or class.
+        Returns the attributes (#[...]) directly above an item, skipping comments in between.
 
         Parameters:
-            file_content (str): The content to filter
+            node (Node): The item
 
         Returns:
-            str: Code without stray decorators
+            list: The attribute items, closest first
         """
 
-        lines = file_content.splitlines()
-        kept = []
-        i = 0
-        n = len(lines)
-
-        while i < n:
-            line = lines[i]
+        attributes = []
+        prev = node.prev_sibling
+        while prev is not None and prev.type in {
+            "attribute_item",
+            "line_comment",
+            "block_comment",
+        }:
+            if prev.type == "attribute_item":
+                attributes.append(prev)
+            prev = prev.prev_sibling
+        return attributes
 
-            if self._is_decorator_start(line):
-                decorator_blocks = []
+    @staticmethod
+    def _is_test_attribute(node: Node) -> bool:
+        """
+        Checks whether an attribute marks a test function, i.e. #[test] or a runtime's variant of it (#[tokio::test]).
 
-                while i < n and self._is_decorator_start(lines[i]):
-                    block_start = i
-                    block_end = self._get_decorator_end(lines, block_start)
-                    block_lines = lines[block_start : block_end + 1]
-                    decorator_blocks.append(block_lines)
-                    i = block_end + 1
+        Parameters:
+            node (Node): The attribute item
 
-                if i < n and self._is_function_or_class_start(lines[i]):
-                    for block in decorator_blocks:
-                        kept.extend(block)
-                else:
-                    pass
+        Returns:
+            bool: True if the attribute marks a test function, False otherwise
+        """
 
-            else:
-                kept.append(line)
-                i += 1
+        attribute = next(
+            (c for c in node.named_children if c.type == "attribute"), None
+        )
+        if attribute is None or not attribute.named_children:
+            return False
 
-        return "\n".join(kept)
+        path = attribute.named_children[0]
+        if path.type == "scoped_identifier":
+            path = path.child_by_field_name("name")
+        return path is not None and path.type == "identifier" and path.text == b"test"
 
     @staticmethod
     def _is_decorator_start(line: str) -> bool:
@@ -753,7 +967,7 @@ class CSTBuilder:
             bool: True if the line is a decorator, False otherwise
         """
 
-        return bool(re.match(r"^\s*\d*\s*@", line))
+        return DECORATOR_START_REGEX.match(line) is not None
 
     @staticmethod
     def _is_function_or_class_start(line: str) -> bool:
@@ -772,46 +986,43 @@ class CSTBuilder:
             bool: True if the line is a function or class, False otherwise
         """
 
-        return bool(
-            re.match(
-                r"^\s*\d*\s*(?:(?:async\s+)?function\b|class\b|(?:async\s+)?[A-Za-z_$][A-Za-z0-9:$]*\s*\()",
-                line,
-            )
-        )
+        return FUNCTION_OR_CLASS_START_REGEX.match(line) is not None
 
     @staticmethod
-    def _get_decorator_end(lines: list, start_index: int) -> int:
+    def _starts_with(source: bytes, node: Node, prefix: bytes) -> bool:
         """
-        Retrieves the last line index which still belongs to the decorator. Namely, if there
-        are any brackets present which need to be included
+        Checks the beginning of a node without copying its (possibly large) text.
 
         Parameters:
-            lines (list): The lines to search
-            start_index (int): The index of the first line to search
+            source (bytes): The source code the node was parsed from
+            node (Node): The node to check
+            prefix (bytes): The expected beginning of the node
 
         Returns:
-            int: The index of the last line which still belongs to the decorator
+            bool: True if the node starts with the prefix, False otherwise
         """
 
-        open_brackets = 0
-        end_index = start_index
-        i = start_index
+        return (
+            node.end_byte - node.start_byte >= len(prefix)
+            and source[node.start_byte : node.start_byte + len(prefix)] == prefix
+        )
 
-        while i < len(lines):
-            line = lines[i]
-            for char in line:
-                if char == "(":
-                    open_brackets += 1
-                elif char == ")":
-                    open_brackets -= 1
+    @staticmethod
+    def _get_indentation(source: bytes, node: Node) -> str:
+        """
+        Returns the indentation of the line a node starts on.
 
-            end_index = i
-            i += 1
+        Parameters:
+            source (bytes): The source code the node was parsed from
+            node (Node): The node
 
-            if open_brackets == 0:
-                break
+        Returns:
+            str: The leading whitespace of the line
+        """
 
-        return end_index
+        line_start = source.rfind(b"\n", 0, node.start_byte) + 1
+        line = source[line_start : node.start_byte]
+        return line[: len(line) - len(line.lstrip())].decode("utf-8")
 
     @staticmethod
     def _get_node_body(node: Node) -> list | None:
@@ -843,109 +1054,3 @@ class CSTBuilder:
 
         identifier = node.child_by_field_name("name")
         return identifier.text.decode("utf-8") if identifier else fallback
-
-    def _get_call_expression_content(self, node: Node) -> list:
-        """
-        Returns the child nodes of a call expression.
-
-        Parameters:
-            node (Node): The node to extract its children from
-
-        Returns:
-            list: The child nodes of a call expression
-        """
-
-        call_expression = self._get_call_expression(node)
-        if not call_expression:
-            return []
-        args = call_expression.child_by_field_name("arguments")
-        content = next(
-            (
-                child
-                for child in args.named_children
-                if child.type in {"function_expression", "arrow_function"}
-            ),
-            None,
-        )
-        body = content.child_by_field_name("body")
-        return body.named_children if body else []
-
-    @staticmethod
-    def _get_call_expression(node: Node) -> Node:
-        """
-        Returns the call expression of an expression statement.
-
-        Parameters:
-            node (Node): The node to extract the call expression from
-
-        Returns:
-            Node: The call expression
-        """
-
-        call_expression = next(
-            (child for child in node.named_children if child.type == "call_expression"),
-            None,
-        )
-        return call_expression
-
-    def _get_call_expression_type(self, node: Node, fallback: str = "") -> str:
-        """
-        Returns the type of call expression (i.e., 'describe', 'it')
-
-        Parameters:
-            node (Node): The node to determine the type of
-            fallback (str, optional): The fallback type to return
-
-        Returns:
-            str: The type of call expression
-        """
-
-        call_expression = self._get_call_expression(node)
-        if not call_expression:
-            return fallback
-        callee = call_expression.child_by_field_name("function")
-        return callee.text.decode("utf-8") if callee.type == "identifier" else fallback
-
-    def _get_call_expression_description(self, node: Node, fallback: str = "") -> str:
-        """
-        Returns the description (i.e., name) of a call expression.
-
-        Parameters:
-            node (Node): The node to determine the description of
-            fallback (str, optional): The fallback type to return
-
-        Returns:
-            str: The description of the call expression
-        """
-
-        call_expression = self._get_call_expression(node)
-        if not call_expression:
-            return fallback
-        args = call_expression.child_by_field_name("arguments")
-        identifier = next(
-            (
-                child
-                for child in args.named_children
-                if child.type in {"string", "binary_expression"}
-            ),
-            None,
-        )
-        raw_name = identifier.text.decode("utf-8") if identifier else fallback
-
-        # 1) Remove the quotes and pluses
-        clean_name = (
-            raw_name.replace('"', "").replace("+", "").replace("'", "").replace("`", "")
-        )
-        # 2) Turn any literal \n or \t (or others) into a space
-        clean_name = clean_name.replace("\n", " ").replace("\t", " ").replace("\r", " ")
-        # 3) Collapse any runs of whitespace into one space
-        return " ".join(clean_name.split())
-
-        """
-        Returns a list of file names with their source code that contain only code changes.
-        """
-
-        str_list: list[str] = []
-        files = []
-        source_code_pr_diffs = self._pr_diff_ctx.source_code_file_diffs
-        return files
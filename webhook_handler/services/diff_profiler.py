@@ -0,0 +1,113 @@
+import time
+
+from webhook_handler.helper import git_diff
+from webhook_handler.models import FileDiffStats, PullRequestData, PullRequestDiffStats
+from webhook_handler.services.config import Config
+from webhook_handler.services.file_classifier import FileClassifier
+from webhook_handler.services.gh_service import GitHubService
+from webhook_handler.services.parser_pool import ParserPool
+from webhook_handler.services.pr_diff_context import PullRequestDiffContext
+
+
+class DiffProfiler:
+    """
+    Collects diff and parse statistics of recorded PR payloads, to find the PRs and files dominating pipeline time.
+    """
+
+    def __init__(self, config: Config) -> None:
+        self._config = config
+        self._parser_pool = ParserPool.shared(
+            config.parser_pool_size, config.parse_timeout_seconds
+        )
+
+    def profile_payload(self, payload: dict) -> PullRequestDiffStats:
+        """
+        Runs one payload through PullRequestDiffContext and measures every changed file.
+
+        Parameters:
+            payload (dict): A pull request payload
+
+        Returns:
+            PullRequestDiffStats: The statistics of the PR and its files
+        """
+
+        pr_data = PullRequestData.from_payload(payload)
+        classifier = FileClassifier.for_repository(
+            pr_data.repo, self._config.file_rules_path
+        )
+
+        start = time.perf_counter()
+        try:
+            pr_diff_ctx = PullRequestDiffContext(
+                pr_data.base_commit,
+                pr_data.head_commit,
+                GitHubService(self._config, pr_data),
+                classifier,
+            )
+        except Exception as e:
+            return PullRequestDiffStats(
+                repo=pr_data.repo,
+                number=str(pr_data.number),
+                fetch_seconds=time.perf_counter() - start,
+                error=str(e),
+            )
+
+        stats = PullRequestDiffStats(
+            repo=pr_data.repo,
+            number=str(pr_data.number),
+            fetch_seconds=time.perf_counter() - start,
+        )
+        for pr_file_diff in pr_diff_ctx.file_diffs:
+            file_stats = self._profile_file(
+                pr_file_diff.name,
+                pr_file_diff.category,
+                pr_file_diff.before,
+                pr_file_diff.after,
+            )
+            stats.files.append(file_stats)
+            stats.diff_seconds += file_stats.diff_seconds
+            stats.parse_seconds += file_stats.parse_seconds
+            stats.patch_bytes += file_stats.patch_bytes
+
+        return stats
+
+    def _profile_file(
+        self, name: str, category: str, before: str, after: str
+    ) -> FileDiffStats:
+        """
+        Measures the diff and parse stages for one file.
+
+        Parameters:
+            name (str): The file name
+            category (str): The category assigned by the FileClassifier
+            before (str): The file content before the PR
+            after (str): The file content after the PR
+
+        Returns:
+            FileDiffStats: The statistics of the file
+        """
+
+        start = time.perf_counter()
+        patch = git_diff.unified_diff_with_function_context(before, after, fname=name)
+        diff_seconds = time.perf_counter() - start
+        hunks = git_diff.parse_hunks(patch)
+
+        parse_seconds = 0.0
+        if name.endswith(".rs"):
+            start = time.perf_counter()
+            self._parser_pool.parse(bytes(before, "utf8"))
+            self._parser_pool.parse(bytes(after, "utf8"))
+            parse_seconds = time.perf_counter() - start
+
+        return FileDiffStats(
+            name=name,
+            category=str(category),
+            bytes_before=len(before.encode("utf8")),
+            bytes_after=len(after.encode("utf8")),
+            lines_added=sum(len(hunk.added) for hunk in hunks),
+            lines_removed=sum(len(hunk.removed) for hunk in hunks),
+            hunks=len(hunks),
+            patch_bytes=len(patch.encode("utf8")),
+            diff_seconds=diff_seconds,
+            parse_seconds=parse_seconds,
+        )
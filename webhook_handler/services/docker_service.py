@@ -1,8 +1,10 @@
+import hashlib
 import io
-import json
-import re
 import shlex
 import tarfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import docker
@@ -10,7 +12,24 @@ from docker.errors import APIError, BuildError, ImageNotFound
 from docker.models.containers import Container
 from docker.models.images import Image
 
-from webhook_handler.models import PullRequestData
+from webhook_handler.helper import general
+from webhook_handler.models import CargoTestResult, PullRequestData, StepResult
+from webhook_handler.services.container_pool import ContainerPool
+from webhook_handler.services.exec_stream import (
+    STEP_MARKER,
+    TEST_STEP,
+    RunScriptStream,
+)
+
+# patches and run scripts are copied here, outside of the repository checkout
+RUN_DIR = "/app/run"
+# how often a running script checks for its timeout and cancellation
+WATCH_INTERVAL_SECONDS = 1.0
+TEST_PATCH_FILE = "test_patch.diff"
+GOLDEN_PATCH_FILE = "golden_code_patch.diff"
+# builds of the post-PR codebase keep their own target volume, so they do not invalidate the pre-PR build state
+# (and the two runs of the concurrent evaluation do not wait for each other's build lock)
+POST_PR_TARGET = "post_pr"
 
 
 class DockerService:
@@ -18,36 +37,77 @@ class DockerService:
     Used for Docker operations.
     """
 
-    def __init__(self, project_root: Path, pr_data: PullRequestData) -> None:
+    # one lock per image tag, so concurrent jobs of the same repository and base commit build the image only once
+    _build_locks: dict[str, threading.Lock] = {}
+    _build_locks_lock = threading.Lock()
+
+    def __init__(
+        self,
+        project_root: Path,
+        pr_data: PullRequestData,
+        container_pool: ContainerPool,
+        test_timeout_seconds: int = 300,
+        libtest_json: bool = False,
+        test_output_max_bytes: int = 16 * 1024 * 1024,
+    ) -> None:
         self._project_root = project_root
         self._pr_data = pr_data
+        self._container_pool = container_pool
+        self._test_timeout_seconds = test_timeout_seconds
+        self._libtest_json = libtest_json
+        self._test_output_max_bytes = test_output_max_bytes
         self._client = docker.from_env()
+        self._image_tag = None  # set by build_image
 
     def build_image(self, dockerfile_path: Path) -> None:
         """
-        Build a Docker image from the Dockerfiles in the dockerfiles directory.
+        Builds the Docker image of the PR's base commit, unless an image of the same repository, base commit
+        and Dockerfile content exists already. Concurrent builds of the same image wait for the first one.
         """
 
-        # try:
-        #     docker_image = self._client.images.get(f"webhook_handler:latest")
-        #     return
-        # except ImageNotFound:
-        #     print("Image not found. Building image...")
-        # except APIError as e:
-        #     print(f"Error while accessing Docker API: {e.explanation}")
-        #     return
+        repo_name = self._pr_data.repo.lower()
+        dockerfile_path = Path("dockerfiles", f"Dockerfile_{repo_name}")
+        dockerfile_hash = hashlib.sha256(
+            Path(self._project_root, dockerfile_path).read_bytes()
+        ).hexdigest()
+        self._image_tag = (
+            f"image_{self._pr_data.owner}__{self._pr_data.repo}".lower()
+            + f":{self._pr_data.base_commit[:12]}-{dockerfile_hash[:12]}"
+        )
+
+        with DockerService._build_locks_lock:
+            build_lock = DockerService._build_locks.setdefault(
+                self._image_tag, threading.Lock()
+            )
+
+        with build_lock:
+            try:
+                self._client.images.get(self._image_tag)
+                print(f"Reusing Docker image '{self._image_tag}'")
+                return
+            except ImageNotFound:
+                pass
+            except APIError as e:
+                print(f"Error while accessing Docker API: {e.explanation}")
+                raise AssertionError("Docker API error")
+
+            self._build(dockerfile_path)
+
+    def _build(self, dockerfile_path: Path) -> None:
+        """
+        Builds and tags the Docker image.
 
-        # if not docker_image:
+        Parameters:
+            dockerfile_path (Path): The Dockerfile, relative to the project root
+        """
 
         print("Building Docker image...")
 
         build_args = {"commit_hash": self._pr_data.base_commit}
-        repo_name = self._pr_data.repo.lower()
-        dockerfile_path = Path("dockerfiles", f"Dockerfile_{repo_name}")
         print(f"Using Dockerfile at: {dockerfile_path.as_posix()}")
         print(f"With build args: {build_args}")
         print(f"Project root: {self._project_root.as_posix()}")
-        tag = f"{self._pr_data.image_tag}:latest"
+        tag = self._image_tag
         print(f"Tagging image as: {tag}")
         try:
             self._client.images.build(
@@ -59,7 +119,7 @@ class DockerService:
                 rm=True,
             )
             build_succeeded = True
-            print(f"Docker image '{self._pr_data.image_tag}' built successfully")
+            print(f"Docker image '{tag}' built successfully")
         except BuildError as e:
             log_lines = []
             # for chunk in e.build_log:
@@ -100,232 +160,481 @@ class DockerService:
         test_patch: str,
         tests_to_run: list,
         added_test_file: str,
+        log_path: Path,
         golden_code_patch: str = None,
-    ) -> tuple[bool, str]:
+        cancel: threading.Event = None,
+    ) -> CargoTestResult:
         """
-        Creates a container, applies the patch, runs the test, and returns the result.
+        Checks out a container from the pool, applies the patch, runs the test, and returns the result.
 
         Parameters:
             test_patch (str): Patch to apply to the model test
             tests_to_run (list): List of tests to run
             added_test_file (str): Path to the file to add to the added tests
+            log_path (Path): File the test output is written to
             golden_code_patch (str): Patch content for source code
+            cancel (threading.Event): If set while the test runs, the run is killed and AssertionError is raised
 
         Returns:
-            bool: True if the test has passed, False otherwise
-            str: The output from running the test
+            CargoTestResult: The result of the targeted tests
         """
 
-        try:
-            print("Creating container...")
-            container = self._client.containers.create(
-                image=self._pr_data.image_tag,
-                command="/bin/sh -c 'sleep infinity'",  # keep the container running
-                tty=True,  # allocate a TTY for interactive use
-                detach=True,
+        steps = self._get_prepare_steps(added_test_file)
+        if golden_code_patch is not None:
+            steps.append(
+                (
+                    "apply_golden_code_patch",
+                    self._apply_patch_command(GOLDEN_PATCH_FILE),
+                )
+            )
+        steps.append((TEST_STEP, self._get_test_command(added_test_file, tests_to_run)))
+
+        target_variant = POST_PR_TARGET if golden_code_patch is not None else ""
+        with self._container_pool.checkout(
+            self._image_tag, target_variant
+        ) as container:
+            self._put_run_files(
+                container,
+                {
+                    TEST_PATCH_FILE: test_patch,
+                    GOLDEN_PATCH_FILE: golden_code_patch or "",
+                },
+                {"run.sh": steps},
+            )
+            return self._evaluate_steps(
+                *self._exec_run_script(
+                    container, "run.sh", tests_to_run, log_path, cancel
+                )
             )
-            container.start()
-            print(f"Container {container.short_id} started")
 
-            # check if the test file is already in the container, add stub otherwise (new file)
-            added_file_exists = container.exec_run(
-                f"/bin/sh -c 'test -f /app/testbed/{added_test_file}'"
+    def run_compile_check(
+        self,
+        test_patch: str,
+        added_test_file: str,
+        golden_code_patch: str,
+        log_path: Path,
+    ) -> CargoTestResult:
+        """
+        Builds the test target of the test file in the post-PR codebase without running it (cargo test --no-run).
+        A test which does not compile after the patch can never pass, so this is a cheap check before the test runs.
+
+        Parameters:
+            test_patch (str): Patch to apply to the model test
+            added_test_file (str): Path to the file to add to the added tests
+            golden_code_patch (str): Patch content for source code
+            log_path (Path): File the build output is written to
+
+        Returns:
+            CargoTestResult: The build result, without tests
+        """
+
+        steps = self._get_prepare_steps(added_test_file) + [
+            ("apply_golden_code_patch", self._apply_patch_command(GOLDEN_PATCH_FILE)),
+            (TEST_STEP, self._get_test_command(added_test_file, [], compile_only=True)),
+        ]
+        with self._container_pool.checkout(
+            self._image_tag, POST_PR_TARGET
+        ) as container:
+            self._put_run_files(
+                container,
+                {TEST_PATCH_FILE: test_patch, GOLDEN_PATCH_FILE: golden_code_patch},
+                {"compile.sh": steps},
             )
-            if added_file_exists.exit_code != 0:
-                self._add_file_to_container(container, added_test_file)
-                self._whitelist_stub(container, added_test_file.split("/")[-1])
-
-            # check for gulpfile version (mjs or js)
-            gulpfile_pointer = "gulpfile.mjs"
-            gulpfile_exiss = container.exec_run(
-                f"/bin/sh -c 'test -f /app/testbed/{gulpfile_pointer}'"
+            build_result = self._check_steps(
+                *self._exec_run_script(container, "compile.sh", [], log_path)
+            )
+        print(
+            "Test compiles"
+            if build_result.compiled
+            else f"Test does not compile ({len(build_result.compiler_errors)} errors)"
+        )
+        return build_result
+
+    def run_test_before_and_after(
+        self,
+        test_patch: str,
+        tests_to_run: list,
+        added_test_file: str,
+        golden_code_patch: str,
+        log_path_before: Path,
+        log_path_after: Path,
+    ) -> tuple[CargoTestResult, CargoTestResult | None]:
+        """
+        Runs the test in the pre-PR codebase, then applies the golden patch in the same container and reruns it,
+        so the build state in target/ is reused and only the patched code is recompiled.
+
+        Parameters:
+            test_patch (str): Patch to apply to the model test
+            tests_to_run (list): List of tests to run
+            added_test_file (str): Path to the file to add to the added tests
+            golden_code_patch (str): Patch content for source code
+            log_path_before (Path): File the test output in the pre-PR codebase is written to
+            log_path_after (Path): File the test output in the post-PR codebase is written to
+
+        Returns:
+            CargoTestResult: The result of the targeted tests in the pre-PR codebase
+            CargoTestResult | None: The same for the post-PR codebase, None if the tests already passed pre-PR
+        """
+
+        test_command = self._get_test_command(added_test_file, tests_to_run)
+        with self._container_pool.checkout(self._image_tag) as container:
+            self._put_run_files(
+                container,
+                {TEST_PATCH_FILE: test_patch, GOLDEN_PATCH_FILE: golden_code_patch},
+                {
+                    "before.sh": self._get_prepare_steps(added_test_file)
+                    + [(TEST_STEP, test_command)],
+                    "after.sh": [
+                        (
+                            "apply_golden_code_patch",
+                            self._apply_patch_command(GOLDEN_PATCH_FILE),
+                        ),
+                        (TEST_STEP, test_command),
+                    ],
+                },
             )
-            if gulpfile_exists.exit_code != 0:
-                gulpfile_pointer = "gulpfile.js"
-                old_gulpfile_exists = container.exec_run(
-                    f"/bin/sh -c 'test -f /app/testbed/{gulpfile_pointer}'"
+            result_before = self._evaluate_steps(
+                *self._exec_run_script(
+                    container, "before.sh", tests_to_run, log_path_before
                 )
-                if old_gulpfile_exists.exit_code != 0:
-                    print("No gulpfile found")
-                    raise AssertionError("No gulpfile found")
-
-            # add mock PDF if available
-            if self._pdf_name and self._pdf_content:
-                self._add_file_to_container(
-                    container, f"test/pdfs/{self._pdf_name}", self._pdf_content
+            )
+            if result_before.passed:
+                return result_before, None
+
+            print("Running test in post-PR codebase...")
+            result_after = self._evaluate_steps(
+                *self._exec_run_script(
+                    container, "after.sh", tests_to_run, log_path_after
                 )
+            )
+            return result_before, result_after
+
+    def run_test_concurrently(
+        self,
+        test_patch: str,
+        tests_to_run: list,
+        added_test_file: str,
+        golden_code_patch: str,
+        log_path_before: Path,
+        log_path_after: Path,
+    ) -> tuple[CargoTestResult, CargoTestResult | None]:
+        """
+        Runs the test in the pre- and post-PR codebase at the same time, in two containers with separate target volumes.
+        The post-PR run is cancelled once the test passes in the pre-PR codebase.
 
-            self._copy_and_apply_patch(
-                container, patch_content=test_patch, patch_name="test_patch.diff"
+        Parameters:
+            test_patch (str): Patch to apply to the model test
+            tests_to_run (list): List of tests to run
+            added_test_file (str): Path to the file to add to the added tests
+            golden_code_patch (str): Patch content for source code
+            log_path_before (Path): File the test output in the pre-PR codebase is written to
+            log_path_after (Path): File the test output in the post-PR codebase is written to
+
+        Returns:
+            CargoTestResult: The result of the targeted tests in the pre-PR codebase
+            CargoTestResult | None: The same for the post-PR codebase, None if the tests already passed pre-PR
+        """
+
+        cancel_after = threading.Event()
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            future_before = executor.submit(
+                self.run_test_in_container,
+                test_patch,
+                tests_to_run,
+                added_test_file,
+                log_path_before,
             )
-            if golden_code_patch is not None:
-                self._copy_and_apply_patch(
-                    container,
-                    patch_content=golden_code_patch,
-                    patch_name="golden_code_patch.diff",
-                )
-            stdout = self._run_test(container, gulpfile_pointer, tests_to_run)
-            test_passed = self._evaluate_test(stdout)
-            return test_passed, stdout
-        finally:
-            print("Stopping and removing container...")
-            container.stop()
-            container.remove()
-            print("Container stopped and removed")
+            future_after = executor.submit(
+                self.run_test_in_container,
+                test_patch,
+                tests_to_run,
+                added_test_file,
+                log_path_after,
+                golden_code_patch,
+                cancel_after,
+            )
+            try:
+                result_before = future_before.result()
+            except Exception:
+                cancel_after.set()
+                raise
+            if result_before.passed:
+                print("Test passed pre-PR, cancelling the post-PR run")
+                cancel_after.set()
+                future_after.exception()  # wait until its container is back in the pool
+                return result_before, None
+            return result_before, future_after.result()
+
+    def _get_prepare_steps(self, added_test_file: str) -> list[tuple[str, str]]:
+        """
+        Parameters:
+            added_test_file (str): Path to the file to add to the added tests
+
+        Returns:
+            list: The steps adding the test file if it is new and applying the model test patch
+        """
+
+        test_file = shlex.quote(added_test_file)
+        return [
+            (
+                "add_test_file",
+                f"test -f {test_file} || {{ mkdir -p $(dirname {test_file}) && : > {test_file}; }}",
+            ),
+            ("apply_test_patch", self._apply_patch_command(TEST_PATCH_FILE)),
+        ]
 
     @staticmethod
-    def _add_file_to_container(
-        container: Container, file_path: str, file_content: str | bytes = ""
+    def _apply_patch_command(patch_name: str) -> str:
+        """
+        Parameters:
+            patch_name (str): Name of the patch file in the run directory
+
+        Returns:
+            str: The command applying the patch in /app/testbed
+        """
+
+        return f"patch -p1 < {RUN_DIR}/{patch_name}"
+
+    @staticmethod
+    def _put_run_files(
+        container: Container,
+        files: dict[str, str],
+        scripts: dict[str, list[tuple[str, str]]],
     ) -> None:
         """
-        Adds file to Docker container.
+        Copies the patches and the generated run scripts into the run directory of the container, in one archive.
 
         Parameters:
-            container (Container): Container to add file to
-            file_path (str): Path to the file to add to the container
-            file_content (str | bytes, optional): Content to add to the file
+            container (Container): Container to copy the files to
+            files (dict): Content of each file, by file name
+            scripts (dict): Steps (name, shell command) of each run script, by script name
         """
 
-        if isinstance(file_content, str):
-            content = file_content.encode("utf-8")
-        else:
-            content = file_content
-
+        contents = {
+            **files,
+            **{
+                name: DockerService._build_run_script(steps)
+                for name, steps in scripts.items()
+            },
+        }
         tar_stream = io.BytesIO()
         with tarfile.open(fileobj=tar_stream, mode="w") as tar:
-            ti = tarfile.TarInfo(name=file_path)
-            ti.size = len(file_content)
-            tar.addfile(ti, io.BytesIO(content))
-        tar_stream.seek(0)
+            for name, content in contents.items():
+                data = content.encode("utf-8")
+                ti = tarfile.TarInfo(name=f"{Path(RUN_DIR).name}/{name}")
+                ti.size = len(data)
+                ti.mode = 0o755 if name in scripts else 0o644
+                tar.addfile(ti, io.BytesIO(data))
         try:
-            container.put_archive("/app/testbed", tar_stream.read())
-            print(f"File {file_path} added to container successfully")
+            container.put_archive(
+                Path(RUN_DIR).parent.as_posix(), tar_stream.getvalue()
+            )
         except APIError as e:
             print(f"Docker API error: {e}")
             raise AssertionError("Docker API error")
 
-    def _whitelist_stub(self, container: Container, file_name: str) -> None:
+    @staticmethod
+    def _build_run_script(steps: list[tuple[str, str]]) -> str:
         """
-        Adds the new file to the whitelist for it to be detectable by Jasmine.
+        Generates a shell script running the steps in /app/testbed. Every step is framed by marker lines
+        holding its name and exit code, steps after a failed one are reported as skipped.
+        The script stores its process ID next to itself, so an aborted run can kill its process group.
 
         Parameters:
-            container (Container): Container to modify whitelist in
-            file_name (str): Name of the file to add to the whitelist
+            steps (list): Name and shell command of each step
+
+        Returns:
+            str: The script
         """
 
-        whitelist_path = "test/unit/clitests.json"
-        read = container.exec_run(
-            f"/bin/sh -c 'cd /app/testbed && cat {whitelist_path}'"
-        )
-        if read.exit_code != 0:
-            print(f"Could not read clitests.json: {read.output.decode()}")
-            raise AssertionError("Failed to whitelist stub")
-
-        whitelist = json.loads(read.output.decode())
-        if file_name not in whitelist["spec_files"]:
-            whitelist["spec_files"].append(file_name)
-            updated_whitelist = json.dumps(whitelist, indent=2) + "\n"
-            self._add_file_to_container(container, whitelist_path, updated_whitelist)
-
-    def _copy_and_apply_patch(
-        self, container: Container, patch_content: str, patch_name: str
-    ) -> None:
+        lines = ["#!/bin/sh", 'echo $$ > "$0.pid"', "cd /app/testbed", "failed="]
+        for name, command in steps:
+            lines += [
+                'if [ -n "$failed" ]; then',
+                f"  echo '{STEP_MARKER} {name} skipped'",
+                "else",
+                f"  echo '{STEP_MARKER} {name} start'",
+                f"  ( {command} ) 2>&1",
+                "  code=$?",
+                f'  printf "\\n{STEP_MARKER} {name} exit %d\\n" "$code"',
+                '  [ "$code" -eq 0 ] || failed=1',
+                "fi",
+            ]
+        return "\n".join(lines) + "\n"
+
+    def _exec_run_script(
+        self,
+        container: Container,
+        script_name: str,
+        tests_to_run: list,
+        log_path: Path,
+        cancel: threading.Event = None,
+    ) -> tuple[list[StepResult], CargoTestResult | None]:
         """
-        Copies file to container and applies patch.
+        Executes a run script and parses its output while it is produced, the test output is written to the log file.
+        The script is killed as soon as the tests failed to compile, the test output exceeds its size limit,
+        the run exceeds the test timeout or it is cancelled by the caller.
 
         Parameters:
-            container (Container): Container to apply patch
-            patch_content (str): Patch to apply to the container
-            patch_name (str): Name of the path file
-        """
+            container (Container): Container to run the script in
+            script_name (str): Name of the script in the run directory
+            tests_to_run (list): List of tests to run
+            log_path (Path): File the test output is written to
+            cancel (threading.Event): If set while the script runs, it is killed and AssertionError is raised
 
-        self._add_file_to_container(container, patch_name, patch_content)
+        Returns:
+            list: The result of each step
+            CargoTestResult | None: The result of the test step, None if it did not start
+        """
 
-        # apply the patch inside the container
-        apply_patch_cmd = f"/bin/sh -c 'cd /app/testbed && patch -p1 < {patch_name}'"
-        exec_result = container.exec_run(apply_patch_cmd)
+        stream = RunScriptStream(tests_to_run, log_path, self._test_output_max_bytes)
+        cancel = cancel or threading.Event()
+        finished = threading.Event()
+        timed_out = threading.Event()
+        pid_file = f"{RUN_DIR}/{script_name}.pid"
+
+        def kill() -> bool:
+            # setsid makes the script a process group leader, so cargo and the test binaries are killed as well
+            try:
+                return (
+                    container.exec_run(
+                        f"/bin/sh -c 'kill -s KILL -- -$(cat {pid_file})'"
+                    ).exit_code
+                    == 0
+                )
+            except APIError as e:
+                print(f"Failed to kill run script {script_name}: {e}")
+                return False
 
-        if exec_result.exit_code != 0:
-            print(f"Failed to apply patch: {exec_result.output.decode()}")
-            raise AssertionError("Failed to apply patch")
+        def watch() -> None:
+            # the pid file may not be written yet, so a failed kill is retried
+            deadline = time.monotonic() + self._test_timeout_seconds
+            while not finished.wait(WATCH_INTERVAL_SECONDS):
+                if time.monotonic() > deadline:
+                    timed_out.set()
+                elif not cancel.is_set():
+                    continue
+                if kill():
+                    return
+
+        if cancel.is_set():
+            raise AssertionError("Run cancelled")
+        api = container.client.api
+        watcher = threading.Thread(target=watch, daemon=True)
+        try:
+            exec_id = api.exec_create(
+                container.id,
+                f"/bin/sh -c 'rm -f {pid_file} && exec setsid -w /bin/sh {RUN_DIR}/{script_name}'",
+                stdout=True,
+                stderr=True,
+            )["Id"]
+            watcher.start()
+            for chunk in api.exec_start(exec_id, stream=True):
+                if stream.feed(chunk):
+                    print(f"Aborting run script {script_name}: {stream.abort_reason}")
+                    kill()
+                    break
+        except APIError as e:
+            print(f"Docker API error: {e}")
+            raise AssertionError("Docker API error")
+        finally:
+            finished.set()
 
-        print(f"Patch file {patch_name} applied successfully")
+        results = stream.finish(timed_out.is_set())
+        if cancel.is_set() and not timed_out.is_set():
+            print(f"Run script {script_name} cancelled")
+            raise AssertionError("Run cancelled")
+        return results
 
     @staticmethod
-    def _run_test(
-        container: Container, gulpfile_pointer: str, tests_to_run: list
-    ) -> str:
+    def _check_steps(
+        results: list[StepResult], test_result: CargoTestResult | None
+    ) -> CargoTestResult:
         """
-        Runs tests in container.
+        Checks that the preparation steps succeeded and the test step started.
 
         Parameters:
-            container (Container): Container to run test
-            gulpfile_pointer (str): Determines whether to use gulpfile.mjs or gulpfile.js
-            tests_to_run (list): List of tests to run
+            results (list): The results of the steps of a run script
+            test_result (CargoTestResult | None): The result of the test step
 
         Returns:
-            str: The test output
+            CargoTestResult: The result of the test step
         """
 
-        test_commands = []
-        for desc in tests_to_run:
-            inner = f"TEST_FILTER='{desc}' npx gulp --gulpfile {gulpfile_pointer} unittest-single"
-            test_single = shlex.quote(inner)
-            cmd = f"timeout 300 /bin/sh -c {test_single}"
-            test_commands.append(cmd)
+        for result in results:
+            if result.name == TEST_STEP:
+                break
+            if result.exit_code != 0:
+                print(f"Step {result.name} failed: {result.output}")
+                raise AssertionError(f"Step {result.name} failed")
+            print(f"Step {result.name} succeeded")
+        if test_result is None:
+            print("Run script did not report a test result")
+            raise AssertionError("Run script failed")
+        return test_result
 
-        joined_cmds = " && ".join(test_commands)
+    @staticmethod
+    def _evaluate_steps(
+        results: list[StepResult], test_result: CargoTestResult | None
+    ) -> CargoTestResult:
+        """
+        Checks that the preparation steps succeeded and reports the result of the test step.
 
-        cd_test = shlex.quote(f"cd /app/testbed && {joined_cmds}")
+        Parameters:
+            results (list): The results of the steps of a run script
+            test_result (CargoTestResult | None): The result of the test step
 
-        full_test_command = "/bin/sh -c " f"{cd_test}"
+        Returns:
+            CargoTestResult: The result of the targeted tests
+        """
 
-        print("Running test command...")
-        exec_result = container.exec_run(full_test_command, stdout=True, stderr=True)
-        output = exec_result.output.decode()
-        if exec_result.exit_code == 124:
+        test_result = DockerService._check_steps(results, test_result)
+        if test_result.timed_out:
             print("Test command killed by timeout")
-        else:
-            pattern = re.compile(
-                r"^Ran\s+\d+\s+of\s+\d+\s+specs?\r?\n\d+\s+specs?,\s+\d+\s+failures?$",
-                re.MULTILINE,
-            )
-            if pattern.search(output):
-                print("Test command executed")
-            else:
-                print("Test command failed")
+        elif test_result.output_limit_exceeded:
+            print("Test command killed by output limit")
+        elif not test_result.compiled:
+            print("Tests failed to compile")
+        elif test_result.missing:
+            print(f"Tests not found: {', '.join(test_result.missing)}")
+        for name in test_result.panicked:
+            print(f"Test {name} panicked")
 
-        return exec_result.output.decode()
+        (
+            print(f"Test evaluated as passed")
+            if test_result.passed
+            else print(f"Test evaluated as failed")
+        )
+        return test_result
 
-    @staticmethod
-    def _evaluate_test(stdout: str) -> bool:
+    def _get_test_command(
+        self, test_file: str, tests_to_run: list, compile_only: bool = False
+    ) -> str:
         """
-        Evaluates test output.
+        Builds the cargo command running exactly the given tests of the test file's target.
 
         Parameters:
-            stdout (str): Output of test command
+            test_file (str): Path of the file holding the tests
+            tests_to_run (list): Full paths of the tests to run (e.g. parser::tests::test_x)
+            compile_only (bool, optional): If True, the target is only built (tests_to_run is ignored)
 
         Returns:
-            bool: True if the test has passed, False otherwise
+            str: The test command, run in /app/testbed
         """
 
-        if re.search(r"\b0\s+specs\b", stdout):  # no tests were executed
-            print("No tests were executed")
-            test_passed = False
-        else:
-            match = re.search(
-                r"\b(\d+)\s+failures?\b", stdout
-            )  # extract the number of failures
-            if match:
-                num_failures = int(match.group(1))
-                test_passed = True if num_failures == 0 else False
-            else:
-                print("Test could not be evaluated")
-                return False
-
-        (
-            print(f"Test evaluated as passed")
-            if test_passed
-            else print(f"Test evaluated as failed")
+        crate_dir, target = general.get_cargo_test_target(test_file)
+        target_args = " ".join(target)
+        if target == ["--lib"]:  # binary-only crates keep their modules in src/ as well
+            target_args = "$([ -f src/lib.rs ] && echo --lib || echo --bins)"
+
+        test_args = "--exact " + " ".join(shlex.quote(name) for name in tests_to_run)
+        if self._libtest_json:  # nightly toolchains only
+            test_args = f"-Z unstable-options --format json --report-time {test_args}"
+
+        cd = f"cd {shlex.quote(crate_dir)} && " if crate_dir else ""
+        if compile_only:
+            return f"{cd}CARGO_TERM_COLOR=never cargo test {target_args} --no-run"
+        return (
+            f"{cd}CARGO_TERM_COLOR=never RUST_BACKTRACE=0 "
+            f"cargo test {target_args} --no-fail-fast -- {test_args}"
         )
-        return test_passed
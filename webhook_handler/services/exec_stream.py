@@ -0,0 +1,168 @@
+import codecs
+import re
+from pathlib import Path
+
+from webhook_handler.helper.libtest import LibtestParser
+from webhook_handler.models import CargoTestResult, StepResult
+
+# prefix of the lines framing the steps in the output of a run script
+STEP_MARKER = "@@webhook_handler_step"
+STEP_MARKER_REGEX = re.compile(
+    rf"^{STEP_MARKER} (\S+) (?:(start)|(skipped)|exit (\d+))$"
+)
+# name of the step whose output is the test log
+TEST_STEP = "run_test"
+
+
+class RunScriptStream:
+    """
+    Consumes the output of a run script while it is produced. The output of the test step is written to the log file
+    and parsed line by line, only the short output of the other steps is kept in memory.
+    The caller aborts the run once the tests failed to compile or the output exceeds its limit.
+    """
+
+    def __init__(
+        self, tests_to_run: list[str], log_path: Path, max_output_bytes: int
+    ) -> None:
+        """
+        Parameters:
+            tests_to_run (list): The targeted tests
+            log_path (Path): The file receiving the output of the test step
+            max_output_bytes (int): The maximum size of the test output
+        """
+
+        self._log_path = log_path
+        self._max_output_bytes = max_output_bytes
+        self._parser = LibtestParser(tests_to_run)
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._partial_line = ""
+        self._results: list[StepResult] = []
+        self._current: StepResult | None = None
+        # output of the current step, unless it is the test step
+        self._lines: list[str] = []
+        # blank lines are held back, the run script adds one before each exit marker
+        self._blank_lines = 0
+        self._log = None
+        self._output_bytes = 0
+        self._test_started = False
+        self.abort_reason: str | None = None
+
+    def feed(self, chunk: bytes) -> bool:
+        """
+        Parameters:
+            chunk (bytes): The next chunk of the output
+
+        Returns:
+            bool: True if the run should be aborted (see abort_reason)
+        """
+
+        lines = (self._partial_line + self._decoder.decode(chunk)).split("\n")
+        self._partial_line = lines.pop()
+        for line in lines:
+            self._feed_line(line.rstrip("\r"))
+            if self.abort_reason is not None:
+                return True
+        return False
+
+    def finish(
+        self, timed_out: bool
+    ) -> tuple[list[StepResult], CargoTestResult | None]:
+        """
+        Completes the run, a step cut off by an abort has no exit code.
+
+        Parameters:
+            timed_out (bool): Whether the run was killed by the wall-clock limit
+
+        Returns:
+            list: The result of each step
+            CargoTestResult | None: The result of the tests, None if the test step did not start
+        """
+
+        rest = self._partial_line + self._decoder.decode(b"", final=True)
+        if rest and self.abort_reason is None:
+            self._feed_line(rest)
+        if self._current is not None:
+            self._end_step(None)
+        if not self._test_started:
+            return self._results, None
+
+        test_result = self._parser.result(timed_out)
+        test_result.output_limit_exceeded = self.abort_reason == "output limit"
+        return self._results, test_result
+
+    def _feed_line(self, line: str) -> None:
+        """
+        Parameters:
+            line (str): The next line of the output, without line break
+        """
+
+        marker = STEP_MARKER_REGEX.match(line)
+        if marker:
+            name, start, skipped, exit_code = marker.groups()
+            if start:
+                self._start_step(name)
+            elif skipped:
+                self._results.append(StepResult(name, None, ""))
+            elif self._current is not None:
+                self._blank_lines = max(self._blank_lines - 1, 0)
+                self._end_step(int(exit_code))
+            return
+        if self._current is None:
+            return  # outside of a step
+
+        if not line:
+            self._blank_lines += 1
+            return
+        for held_line in [""] * self._blank_lines + [line]:
+            self._write_line(held_line)
+        self._blank_lines = 0
+
+    def _write_line(self, line: str) -> None:
+        """
+        Parameters:
+            line (str): A line of the output of the current step
+        """
+
+        if self._current.name != TEST_STEP:
+            self._lines.append(line)
+            return
+
+        self._output_bytes += len(line.encode("utf-8")) + 1
+        if self._output_bytes > self._max_output_bytes:
+            self._log.write(f"... output exceeded {self._max_output_bytes} bytes\n")
+            self.abort_reason = "output limit"
+            return
+        self._log.write(line + "\n")
+        self._parser.feed_line(line)
+        if self._parser.compile_failed:
+            self.abort_reason = "compile error"
+
+    def _start_step(self, name: str) -> None:
+        """
+        Parameters:
+            name (str): The name of the step
+        """
+
+        self._current = StepResult(name, None, "")
+        self._lines = []
+        self._blank_lines = 0
+        if name == TEST_STEP:
+            self._test_started = True
+            self._log = open(self._log_path, "w", encoding="utf-8")
+
+    def _end_step(self, exit_code: int | None) -> None:
+        """
+        Parameters:
+            exit_code (int | None): The exit code of the step, None if the step was cut off
+        """
+
+        for _ in range(self._blank_lines if self.abort_reason is None else 0):
+            self._write_line("")
+        self._current.exit_code = exit_code
+        self._current.output = "\n".join(self._lines)
+        self._results.append(self._current)
+        self._current = None
+        self._blank_lines = 0
+        if self._log is not None:
+            self._log.close()
+            self._log = None
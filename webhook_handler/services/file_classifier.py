@@ -0,0 +1,135 @@
+import json
+import re
+from pathlib import Path
+
+from webhook_handler.constants import FILE_CLASSIFICATION_RULES
+from webhook_handler.models import FileCategory
+
+
+class FileClassifier:
+    """
+    Classifies PR-changed files using the glob/regex rules of a repository, compiled into a single matcher.
+    """
+
+    _compiled: dict[tuple[str, str | None], "FileClassifier"] = {}
+
+    def __init__(self, rules: dict[str, list[str]]) -> None:
+        alternatives = []
+        for category, patterns in rules.items():
+            FileCategory(category)  # fail early on unknown categories
+            if not patterns:
+                continue
+            joined = "|".join(self._to_regex(pattern) for pattern in patterns)
+            alternatives.append(f"(?P<{category}>{joined})")
+
+        # the alternation is tried from left to right, so earlier categories take precedence
+        self._matcher = re.compile("|".join(alternatives)) if alternatives else None
+
+    @classmethod
+    def for_repository(
+        cls, repo: str, rules_path: str | Path | None = None
+    ) -> "FileClassifier":
+        """
+        Returns the (cached) classifier for a repository.
+
+        Parameters:
+            repo (str): Name of the repository
+            rules_path (str | Path, optional): JSON file overriding the built-in rules
+
+        Returns:
+            FileClassifier: The classifier for the repository
+        """
+
+        key = (repo.lower(), str(rules_path) if rules_path else None)
+        if key not in cls._compiled:
+            cls._compiled[key] = cls(cls._load_rules(*key))
+        return cls._compiled[key]
+
+    def classify(self, file_name: str) -> FileCategory:
+        """
+        Classifies a single file.
+
+        Parameters:
+            file_name (str): Path of the file relative to the repository root
+
+        Returns:
+            FileCategory: The category of the file
+        """
+
+        if self._matcher is None:
+            return FileCategory.OTHER
+        match = self._matcher.fullmatch(file_name)
+        return FileCategory(match.lastgroup) if match else FileCategory.OTHER
+
+    def classify_all(self, file_names: list[str]) -> dict[str, FileCategory]:
+        """
+        Classifies a list of files.
+
+        Parameters:
+            file_names (list): Paths of the files relative to the repository root
+
+        Returns:
+            dict: Mapping of each file to its category
+        """
+
+        return {file_name: self.classify(file_name) for file_name in file_names}
+
+    @staticmethod
+    def _load_rules(repo: str, rules_path: str | None) -> dict[str, list[str]]:
+        """
+        Merges the built-in rules of a repository with the rules from the JSON file.
+        The JSON file maps repository names (or "default") to categories and their patterns.
+
+        Parameters:
+            repo (str): Name of the repository (lowercase)
+            rules_path (str, optional): JSON file overriding the built-in rules
+
+        Returns:
+            dict: Patterns per category, in order of precedence
+        """
+
+        rules = dict(
+            FILE_CLASSIFICATION_RULES.get(repo, FILE_CLASSIFICATION_RULES["default"])
+        )
+        if rules_path:
+            overrides = json.loads(Path(rules_path).read_text(encoding="utf-8"))
+            repo_overrides = overrides.get(repo, overrides.get("default", {}))
+            for category, patterns in repo_overrides.items():
+                rules[category] = patterns
+        return rules
+
+    @staticmethod
+    def _to_regex(pattern: str) -> str:
+        """
+        Translates a glob pattern into a regular expression. Patterns starting with "re:" are used as is.
+        Supported wildcards: "**" (any number of directories), "*" and "?" (within one path segment).
+
+        Parameters:
+            pattern (str): The glob pattern
+
+        Returns:
+            str: The equivalent regular expression
+        """
+
+        if pattern.startswith("re:"):
+            return f"(?:{pattern[3:]})"
+
+        regex = ""
+        i = 0
+        while i < len(pattern):
+            if pattern.startswith("**/", i):
+                regex += "(?:.*/)?"
+                i += 3
+            elif pattern.startswith("**", i):
+                regex += ".*"
+                i += 2
+            elif pattern[i] == "*":
+                regex += "[^/]*"
+                i += 1
+            elif pattern[i] == "?":
+                regex += "[^/]"
+                i += 1
+            else:
+                regex += re.escape(pattern[i])
+                i += 1
+        return f"(?:{regex})"
@@ -1,3 +1,4 @@
+import json
 import re
 import subprocess
 import time
@@ -6,6 +7,7 @@ import requests
 
 from webhook_handler.models import PullRequestData
 from webhook_handler.services import Config
+from webhook_handler.services.blob_cache import BlobCache
 
 GH_API_URL = "https://api.github.com/repos"
 GH_RAW_URL = "https://raw.githubusercontent.com"
@@ -15,15 +17,29 @@ class GitHubService:
     def __init__(self, config: Config, pr_data: PullRequestData) -> None:
         self._config = config
         self._pr_data = pr_data
+        self._blob_cache = (
+            BlobCache(config.blob_cache_dir, pr_data.owner, pr_data.repo)
+            if config.blob_cache_dir
+            else None
+        )
+        if config.github_offline and self._blob_cache is None:
+            raise ValueError("Offline mode requires BLOB_CACHE_DIR to be set")
 
-    def fetch_pr_files(self) -> dict:
+    def fetch_pr_files(self) -> list[dict]:
         """
         Fetches all files of a pull request.
 
         Returns:
-            dict: All raw files
+            list: All raw files
         """
 
+        if self._blob_cache is not None:
+            cached = self._blob_cache.get_pr_files(self._pr_data.number)
+            if cached is not None:
+                return json.loads(cached)
+            if self._config.github_offline:
+                raise LookupError(f"Files of PR #{self._pr_data.number} not cached")
+
         url = f"{GH_API_URL}/{self._pr_data.owner}/{self._pr_data.repo}/pulls/{self._pr_data.number}/files"
         response = requests.get(url, headers=self._config.HEADER)
         if response.status_code == 403 and "X-RateLimit-Reset" in response.headers:
@@ -34,6 +50,8 @@ class GitHubService:
             return self.fetch_pr_files()
 
         response.raise_for_status()
+        if self._blob_cache is not None:
+            self._blob_cache.put_pr_files(self._pr_data.number, response.text)
         return response.json()
 
     def get_linked_data(self) -> str | None:
@@ -84,8 +102,21 @@ class GitHubService:
             str | bytes: File contents
         """
 
+        if self._blob_cache is not None:
+            cached = self._blob_cache.get_file_version(commit, file_name)
+            if cached is not None:
+                return cached
+            if self._config.github_offline:
+                raise LookupError(f"{file_name}@{commit} not cached")
+
         url = f"{GH_RAW_URL}/{self._pr_data.owner}/{self._pr_data.repo}/{commit}/{file_name}"
         response = requests.get(url, headers=self._config.HEADER)
+        if self._blob_cache is not None and response.status_code in {200, 404}:
+            self._blob_cache.put_file_version(
+                commit,
+                file_name,
+                response.text if response.status_code == 200 else None,
+            )
         if response.status_code == 200:
             return response.text  # File exists
         return ""  # File most likely does not exist (anymore)
@@ -0,0 +1,96 @@
+from bisect import bisect_left, bisect_right
+from typing import Iterator
+
+
+class LineRangeSet:
+    """
+    Set of line numbers stored as sorted, disjoint and non-adjacent intervals (both ends inclusive).
+    Adding or removing a range of lines touches only the intervals it overlaps.
+    """
+
+    def __init__(self) -> None:
+        self._starts: list[int] = []
+        self._ends: list[int] = []
+
+    def __len__(self) -> int:
+        return sum(end - start + 1 for start, end in self)
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        return zip(self._starts, self._ends)
+
+    def __contains__(self, line: int) -> bool:
+        i = bisect_right(self._starts, line) - 1
+        return i >= 0 and line <= self._ends[i]
+
+    def add(self, start: int, end: int) -> None:
+        """
+        Adds the lines start..end to the set.
+
+        Parameters:
+            start (int): The first line of the range
+            end (int): The last line of the range
+        """
+
+        if end < start:
+            return
+
+        # intervals overlapping or adjacent to the range are merged into it
+        lo = bisect_left(self._ends, start - 1)
+        hi = bisect_right(self._starts, end + 1)
+        if lo < hi:
+            start = min(start, self._starts[lo])
+            end = max(end, self._ends[hi - 1])
+        self._starts[lo:hi] = [start]
+        self._ends[lo:hi] = [end]
+
+    def remove(self, start: int, end: int) -> None:
+        """
+        Removes the lines start..end from the set, lines which are not part of it are ignored.
+
+        Parameters:
+            start (int): The first line of the range
+            end (int): The last line of the range
+        """
+
+        if end < start:
+            return
+
+        lo = bisect_left(self._ends, start)
+        hi = bisect_right(self._starts, end)
+        if lo >= hi:
+            return
+
+        # only the first and last overlapping intervals can stick out of the range
+        starts, ends = [], []
+        if self._starts[lo] < start:
+            starts.append(self._starts[lo])
+            ends.append(start - 1)
+        if self._ends[hi - 1] > end:
+            starts.append(end + 1)
+            ends.append(self._ends[hi - 1])
+        self._starts[lo:hi] = starts
+        self._ends[lo:hi] = ends
+
+    def gaps(self, first: int, last: int) -> Iterator[tuple[int, int]]:
+        """
+        Yields the ranges of lines between first and last which are not part of the set.
+
+        Parameters:
+            first (int): The first line to consider
+            last (int): The last line to consider
+
+        Returns:
+            Iterator: The missing ranges (start, end), in ascending order
+        """
+
+        current = first
+        for start, end in self:
+            if end < current:
+                continue
+            if start > last:
+                break
+            if start > current:
+                yield current, start - 1
+            current = end + 1
+        if current <= last:
+            yield current, last
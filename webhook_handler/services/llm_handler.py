@@ -3,8 +3,9 @@ import re
 from groq import Groq
 from openai import OpenAI
 
-from webhook_handler.models import LLM, PipelineInputs
+from webhook_handler.models import LLM, PipelineInputs, SymbolKind
 from webhook_handler.services.config import Config
+from webhook_handler.services.symbol_index import SymbolIndex
 
 
 class LLMHandler:
@@ -12,10 +13,17 @@ class LLMHandler:
     Used to interact with LLMs.
     """
 
-    def __init__(self, config: Config, data: PipelineInputs) -> None:
+    def __init__(
+        self,
+        config: Config,
+        data: PipelineInputs,
+        symbol_index: SymbolIndex | None = None,
+    ) -> None:
         self._pipeline_inputs = data
         self._pr_data = data.pr_data
         self._pr_diff_ctx = data.pr_diff_ctx
+        self._symbol_index = symbol_index
+        self._max_prompt_chars = config.admission_max_prompt_chars
         self._openai_client = OpenAI(api_key=config.openai_key)
         self._groq_client = Groq(api_key=config.groq_key)
 
@@ -58,10 +66,40 @@ class LLMHandler:
             f"Issue:\n<issue>\n{self._pipeline_inputs.problem_statement}\n</issue>\n\n"
         )
 
-        patch = f"Patch:\n<patch>\n{self._pr_diff_ctx.golden_code_patch}\n</patch>\n\n"
+        golden_code_patch = (
+            self._pr_diff_ctx.compact_code_patch
+            if self._pipeline_inputs.sliced_only
+            else self._pr_diff_ctx.golden_code_patch
+        )
+        patch = f"Patch:\n<patch>\n{golden_code_patch}\n</patch>\n\n"
+
+        symbol_context = self._build_symbol_context()
+        symbols = (
+            f"Symbols:\n<symbols>\n{symbol_context}</symbols>\n\n"
+            if symbol_context
+            else ""
+        )
+        compiler_errors = self._pipeline_inputs.compiler_errors
+        previous_errors = (
+            "The test of the previous attempt did not compile:\n<compiler_errors>\n"
+            + "\n\n".join(compiler_errors)
+            + "\n</compiler_errors>\n\n"
+            if compiler_errors
+            else ""
+        )
         # available_imports = f"Imports:\n<imports>\n{available_packages}\n{available_relative_imports}\n</imports>\n\n"
 
         golden_code = ""
+        code = (
+            self._pipeline_inputs.code_sliced
+            if self._pipeline_inputs.sliced_only
+            else self._pipeline_inputs.code_before
+        )
+        if code:
+            golden_code += "Code:\n<code>\n"
+            for f_name, f_code in zip(self._pr_diff_ctx.code_names, code):
+                golden_code += "File:\n" f"{f_name}\n" f"{f_code}\n"
+            golden_code += "</code>\n\n"
         # if include_golden_code:
         #     code_filenames = self._pr_diff_ctx.code_names
         #     if sliced:
@@ -154,10 +192,12 @@ class LLMHandler:
         #         self._pr_data.description
         #     }\n</pr_summary>\n\n"
 
-        return (
+        prompt = (
             f"{guidelines}"
             f"{linked_issue}"
             f"{patch}"
+            f"{symbols}"
+            f"{previous_errors}"
             # f"{available_imports}"
             f"{golden_code}"
             f"{test_code}"
@@ -165,6 +205,52 @@ class LLMHandler:
             f"{instructions}"
             f"{example}"
         )
+        if golden_code and len(prompt) >= self._max_prompt_chars:
+            # the source files are context only, the patch is enough to write the test
+            print("Source files omitted from the prompt, it exceeds the limit")
+            prompt = prompt.replace(golden_code, "", 1)
+        return prompt
+
+    def _build_symbol_context(self) -> str:
+        """
+        Lists the items changed by the PR with their import paths and locations, together with the
+        impl blocks of the changed types and the implementors of the changed traits,
+        as found in the symbol index of the base commit.
+
+        Returns:
+            str: One line per item, empty if there is no symbol index
+        """
+
+        changed_symbols = self._pipeline_inputs.changed_symbols
+        if self._symbol_index is None or not changed_symbols:
+            return ""
+
+        lines = []
+        for symbol in changed_symbols:
+            if symbol.kind in {SymbolKind.USE, SymbolKind.TEST_MODULE}:
+                continue
+            owner = f" (in {symbol.owner})" if symbol.owner else ""
+            lines.append(
+                f"{symbol.kind} {symbol.path}{owner} at {symbol.file}:{symbol.start_line}-{symbol.end_line}\n"
+            )
+            type_name = symbol.owner if symbol.kind == SymbolKind.FUNCTION else symbol.name
+            if symbol.kind == SymbolKind.TRAIT or (
+                symbol.kind == SymbolKind.FUNCTION
+                and symbol.owner
+                and self._symbol_index.find_definitions(symbol.owner, SymbolKind.TRAIT)
+            ):
+                # trait or trait method: the owner of a function in a trait block is the trait
+                impls = self._symbol_index.find_trait_impls(type_name)
+            elif symbol.kind in {SymbolKind.STRUCT, SymbolKind.ENUM} or symbol.owner:
+                impls = self._symbol_index.find_impls(type_name)
+            else:
+                impls = []
+            for impl in impls:
+                trait = f"{impl.owner} for " if impl.owner else ""
+                lines.append(
+                    f"  impl {trait}{impl.name} at {impl.file}:{impl.start_line}-{impl.end_line}\n"
+                )
+        return "".join(dict.fromkeys(lines))
 
     def query_model(self, prompt: str, model: LLM, temperature: float = 0.0) -> str:
         """
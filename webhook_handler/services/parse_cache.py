@@ -0,0 +1,75 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+from tree_sitter import Tree
+
+# rough memory footprint of one syntax tree node, used to enforce the memory budget
+TREE_NODE_BYTES = 64
+
+
+class ParseTreeCache:
+    """
+    Bounded LRU cache of parsed syntax trees, keyed by the hash of the source code.
+    Cached trees are shared between callers and must not be edited (use Tree.copy() first).
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[bytes, tuple[Tree, int]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_parse(self, source: bytes, parse: Callable[[bytes], Tree]) -> Tree:
+        """
+        Returns the cached tree of the source code, parsing it on a cache miss.
+
+        Parameters:
+            source (bytes): The source code
+            parse (Callable): Parses the source code on a cache miss
+
+        Returns:
+            Tree: The syntax tree of the source code
+        """
+
+        key = hashlib.blake2b(source, digest_size=16).digest()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        tree = parse(source)
+        if tree is None:
+            return tree
+
+        size = len(source) + tree.root_node.descendant_count * TREE_NODE_BYTES
+        if size > self.max_bytes:
+            return tree  # would evict everything else
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (tree, size)
+                self.size_bytes += size
+            while self.size_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size_bytes -= evicted_size
+                self.evictions += 1
+        return tree
+
+    def stats(self) -> str:
+        """
+        Returns:
+            str: Summary of the cache usage
+        """
+
+        return (
+            f"{len(self._entries)} trees ({self.size_bytes / 2**20:.1f} MiB), "
+            f"{self.hits} hits, {self.misses} misses, {self.evictions} evictions"
+        )
@@ -0,0 +1,123 @@
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+import tree_sitter_rust
+from tree_sitter import Language, Parser, Tree
+
+# bytes handed to the parser per read, the parse deadline is checked between reads, so this bounds
+# how much is parsed after the deadline (smaller chunks cost more Python calls, ~8% at 1 KiB)
+PARSE_CHUNK_BYTES = 1024
+
+
+class ParserPool:
+    """
+    Pool of pre-initialized tree-sitter parsers. A Parser must not be used by two threads at once,
+    so every parse checks one out and returns it afterwards. The pool never grows beyond its size,
+    when all parsers are in use, callers wait until one is returned.
+    """
+
+    _shared: "ParserPool | None" = None
+    _shared_lock = threading.Lock()
+
+    def __init__(
+        self, language: Language, size: int = 1, timeout_seconds: float = 0
+    ) -> None:
+        """
+        Parameters:
+            language (Language): The language of all parsers
+            size (int, optional): The number of parsers, i.e. the maximum number of concurrent parses
+            timeout_seconds (float, optional): Parses taking longer are given up (0 for no limit)
+        """
+
+        if size < 1:
+            raise ValueError(f"Parser pool size must be at least 1, got {size}")
+        self.language = language
+        self.timeout_seconds = timeout_seconds
+        self._idle = [Parser(language) for _ in range(size)]
+        self._returned = threading.Condition()
+
+    @classmethod
+    def shared(cls, size: int = 1, timeout_seconds: float = 0) -> "ParserPool":
+        """
+        Returns the Rust parser pool of this process, creating it on first use (later arguments are ignored).
+
+        Parameters:
+            size (int, optional): The number of parsers, i.e. the maximum number of concurrent parses
+            timeout_seconds (float, optional): Parses taking longer are given up (0 for no limit)
+
+        Returns:
+            ParserPool: The shared parser pool
+        """
+
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = ParserPool(cls.rust_language(), size, timeout_seconds)
+            return cls._shared
+
+    @staticmethod
+    @functools.cache
+    def rust_language() -> Language:
+        """
+        Returns:
+            Language: The tree-sitter Rust language, loaded once per process
+        """
+
+        return Language(tree_sitter_rust.language())
+
+    @contextmanager
+    def checkout(self) -> Iterator[Parser]:
+        """
+        Lends a parser to the caller for the duration of the with-block, waiting until one is idle.
+
+        Returns:
+            Iterator: The parser, exclusively used by the caller
+        """
+
+        with self._returned:
+            self._returned.wait_for(lambda: self._idle)
+            parser = self._idle.pop()
+        try:
+            yield parser
+        finally:
+            with self._returned:
+                self._idle.append(parser)
+                self._returned.notify()
+
+    def parse(self, source: bytes, old_tree: Tree | None = None) -> Tree | None:
+        """
+        Parses source code with a pooled parser.
+
+        Parameters:
+            source (bytes): The source code
+            old_tree (Tree, optional): An edited tree of a previous version of the code, for incremental parsing
+
+        Returns:
+            Tree | None: The syntax tree, None if the parse timed out
+        """
+
+        with self.checkout() as parser:
+            if not self.timeout_seconds:
+                return (
+                    parser.parse(source, old_tree) if old_tree else parser.parse(source)
+                )
+
+            # the input is fed in chunks and cut off once the deadline has passed, which ends the parse
+            # (the progress callback of the bindings cannot be used, it crashes with callback input)
+            deadline = time.monotonic() + self.timeout_seconds
+            timed_out = False
+
+            def _read(byte: int, _) -> bytes:
+                nonlocal timed_out
+                if byte < len(source) and time.monotonic() > deadline:
+                    timed_out = True
+                    return b""
+                return source[byte : byte + PARSE_CHUNK_BYTES]
+
+            tree = parser.parse(_read, old_tree) if old_tree else parser.parse(_read)
+            if timed_out:
+                print(f"Parse of {len(source)} bytes exceeded {self.timeout_seconds}s")
+                return None
+            return tree
@@ -1,7 +1,9 @@
 import logging
 from typing import cast
 
-from webhook_handler.models import PullRequestFileDiff
+from webhook_handler.models import FileCategory, PullRequestFileDiff
+from webhook_handler.services.code_reducer import CodeReducer
+from webhook_handler.services.file_classifier import FileClassifier
 from webhook_handler.services.gh_service import GitHubService
 
 logger = logging.getLogger(__name__)
@@ -12,19 +14,35 @@ class PullRequestDiffContext:
     Holds all the PullRequestFileDiffs for one PR and provides common operations.
     """
 
-    def __init__(self, base_commit: str, head_commit: str, gh_service: GitHubService):
+    def __init__(
+        self,
+        base_commit: str,
+        head_commit: str,
+        gh_service: GitHubService,
+        classifier: FileClassifier,
+        raw_files: list[dict] | None = None,
+    ):
         self._gh_service = gh_service
         self._pr_file_diffs: list[PullRequestFileDiff] = []
-        raw_files = gh_service.fetch_pr_files()
-        for raw_file in raw_files:
-            file_name = raw_file["filename"]
+        if raw_files is None:
+            raw_files = gh_service.fetch_pr_files()
+        categories = classifier.classify_all(
+            [raw_file["filename"] for raw_file in raw_files]
+        )
+        for file_name, category in categories.items():
+            if category == FileCategory.OTHER:
+                continue  # irrelevant for the pipeline, no need to fetch its contents
             before = gh_service.fetch_file_version(base_commit, file_name)
             after = gh_service.fetch_file_version(head_commit, file_name)
             if before != after:
                 self._pr_file_diffs.append(
-                    PullRequestFileDiff(file_name, before, after)
+                    PullRequestFileDiff(file_name, before, after, category)
                 )
 
+    @property
+    def file_diffs(self) -> list[PullRequestFileDiff]:
+        return list(self._pr_file_diffs)
+
     @property
     def source_code_file_diffs(self) -> list[PullRequestFileDiff]:
         return [
@@ -87,28 +105,42 @@ class PullRequestDiffContext:
             + "\n\n"
         )
 
-    def remove_tests_from_code_before(self) -> list[str]:
+    @property
+    def compact_code_patch(self) -> str:
+        """
+        Same as golden_code_patch, but without the function context (only the changed hunks).
         """
-        Removes all test functions/classes from the code before the PR changes.
+
+        return (
+            "\n\n".join(
+                pr_file_diff.unified_test_diff()
+                for pr_file_diff in self.source_code_file_diffs
+            )
+            + "\n\n"
+        )
+
+    def remove_tests_from_code_before(self, reducer: CodeReducer) -> list[str]:
+        """
+        Removes all test-only items (test modules, test functions, ...) from the code before the PR changes.
+
+        Parameters:
+            reducer (CodeReducer): The reducer used to locate test-only items
 
         Returns:
             list[str]: List of code files with test functions/classes removed
         """
+
         res: list[str] = []
-        code_before = self.code_before
-        for before in code_before:
-            lines = before.splitlines()
-            test_begin_idx = next(
-                (
-                    idx
-                    for idx, line in enumerate(lines)
-                    if line.strip().startswith("#[cfg(test)]")
-                ),
-                None,
+        for code_file_diff in self.source_code_file_diffs:
+            reduction = reducer.remove_test_items(
+                code_file_diff.before, code_file_diff.name
+            )
+            logger.info(
+                "Removed tests from %s: %d bytes (~%d tokens) saved",
+                reduction.name,
+                reduction.bytes_saved,
+                reduction.tokens_saved,
             )
-            if test_begin_idx is not None:
-                res.append("\n".join(lines[:test_begin_idx]))
-            else:
-                res.append(before)
+            res.append(reduction.code)
 
         return res
@@ -0,0 +1,101 @@
+import heapq
+from bisect import bisect_right
+
+
+class ScopeIntervalIndex:
+    """
+    Maps line numbers to the innermost scope (module, impl, function, ...) enclosing them.
+    The scopes are stored as sorted, disjoint line intervals and looked up by bisection.
+    """
+
+    def __init__(self, intervals: list[tuple[int, int, str]]) -> None:
+        """
+        Parameters:
+            intervals (list): Line intervals (start, end, scope), both ends inclusive. When intervals overlap,
+                              the one added last wins (i.e. nested items are added after their parents).
+        """
+
+        self._starts: list[int] = []
+        self._ends: list[int] = []
+        self._scopes: list[str] = []
+
+        boundaries = sorted(
+            {start for start, _, _ in intervals} | {end + 1 for _, end, _ in intervals}
+        )
+        by_start = sorted(
+            (
+                (start, order, end, scope)
+                for order, (start, end, scope) in enumerate(intervals)
+            ),
+            reverse=True,
+        )
+        # (-order, end, scope) of the intervals covering the segment, latest interval on top
+        active: list[tuple[int, int, str]] = []
+
+        for segment_start, next_boundary in zip(boundaries, boundaries[1:]):
+            while by_start and by_start[-1][0] == segment_start:
+                _, order, end, scope = by_start.pop()
+                heapq.heappush(active, (-order, end, scope))
+            while active and active[0][1] < segment_start:
+                heapq.heappop(active)
+            if not active:
+                continue
+
+            scope = active[0][2]
+            if (
+                self._scopes
+                and self._scopes[-1] == scope
+                and self._ends[-1] == segment_start - 1
+            ):
+                self._ends[-1] = next_boundary - 1  # extend the previous segment
+            else:
+                self._starts.append(segment_start)
+                self._ends.append(next_boundary - 1)
+                self._scopes.append(scope)
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def scope_of(self, line: int, fallback: str = "global") -> str:
+        """
+        Returns the scope of one line.
+
+        Parameters:
+            line (int): The line number (1-based)
+            fallback (str, optional): The scope of lines outside any interval
+
+        Returns:
+            str: The scope of the line
+        """
+
+        i = bisect_right(self._starts, line) - 1
+        if i >= 0 and line <= self._ends[i]:
+            return self._scopes[i]
+        return fallback
+
+    def scopes_of(self, lines: list[int], fallback: str = "global") -> list[str]:
+        """
+        Returns the scopes of the lines of one hunk. The lines have to be sorted, so only the
+        first line is bisected and the remaining ones are resolved by walking the segments.
+
+        Parameters:
+            lines (list): Sorted line numbers (1-based)
+            fallback (str, optional): The scope of lines outside any interval
+
+        Returns:
+            list: The scope of each line
+        """
+
+        if not lines:
+            return []
+
+        scopes = []
+        i = max(bisect_right(self._starts, lines[0]) - 1, 0)
+        for line in lines:
+            while i + 1 < len(self._starts) and self._starts[i + 1] <= line:
+                i += 1
+            if self._starts and self._starts[i] <= line <= self._ends[i]:
+                scopes.append(self._scopes[i])
+            else:
+                scopes.append(fallback)
+        return scopes
@@ -0,0 +1,569 @@
+import sqlite3
+import subprocess
+import time
+from pathlib import Path
+
+from tree_sitter import Node, Tree
+
+from webhook_handler.helper import general
+from webhook_handler.models import Symbol, SymbolKind
+from webhook_handler.services.parser_pool import ParserPool
+
+# bumped whenever the layout changes, older indices are dropped and rebuilt on demand
+SCHEMA_VERSION = 2
+
+# Symbols are stored per blob (content hash), so a file is only parsed once no matter how many
+# commits contain it. A snapshot maps the paths of one commit to their blobs and is never modified
+# once written, new snapshots copy the mapping of an existing one and only replace the changed paths.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    repo TEXT NOT NULL,
+    commit_sha TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (repo, commit_sha)
+);
+CREATE TABLE IF NOT EXISTS snapshot_files (
+    repo TEXT NOT NULL,
+    commit_sha TEXT NOT NULL,
+    file TEXT NOT NULL,
+    blob TEXT NOT NULL,
+    PRIMARY KEY (repo, commit_sha, file)
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    blob TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS symbols (
+    blob TEXT NOT NULL,
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    module TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    start_line INTEGER NOT NULL,
+    end_line INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshot_files_by_blob ON snapshot_files (repo, commit_sha, blob);
+CREATE INDEX IF NOT EXISTS symbols_by_blob ON symbols (blob, start_line);
+CREATE INDEX IF NOT EXISTS symbols_by_name ON symbols (name);
+CREATE INDEX IF NOT EXISTS symbols_by_owner ON symbols (owner);
+"""
+
+SYMBOL_COLUMNS = "s.name, s.kind, f.file, s.module, s.owner, s.start_line, s.end_line"
+
+# wrappers around the name of a type, e.g. Foo<T>, crate::Foo, &Foo
+TYPE_WRAPPER_FIELDS = {
+    "generic_type": "type",
+    "scoped_type_identifier": "name",
+    "reference_type": "type",
+}
+
+# maximum number of SQL parameters per statement
+QUERY_CHUNK_SIZE = 500
+
+
+class SymbolIndex:
+    """
+    Index of the Rust items (functions, impls, traits, structs, enums, use paths, test modules)
+    of a repository at one commit. It is persisted in SQLite, so it is built only once per (repo, commit),
+    and derived from the latest indexed commit of the repository by only parsing the files which changed.
+    Snapshots are immutable, so PRs on different base commits can query their own view concurrently.
+    """
+
+    def __init__(self, db_path: Path, repo: str, commit: str) -> None:
+        self._repo = repo
+        self._commit = commit
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(db_path, timeout=60)
+        # readers never block the writer (and vice versa) in WAL mode
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        if (
+            self._connection.execute("PRAGMA user_version").fetchone()[0]
+            != SCHEMA_VERSION
+        ):
+            with self._connection:
+                for table in ("symbols", "blobs", "snapshot_files", "snapshots"):
+                    self._connection.execute(f"DROP TABLE IF EXISTS {table}")
+                self._connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._connection.executescript(SCHEMA)
+
+    @property
+    def is_built(self) -> bool:
+        return (
+            self._connection.execute(
+                "SELECT 1 FROM snapshots WHERE repo = ? AND commit_sha = ?",
+                (self._repo, self._commit),
+            ).fetchone()
+            is not None
+        )
+
+    def build(self, repo_dir: Path, parser_pool: ParserPool) -> int:
+        """
+        Indexes all Rust files of the commit. The files are read from the git object store,
+        so the working tree of the clone may be checked out at any commit. If the repository
+        has been indexed before, only the files changed since the latest snapshot are listed,
+        and only blobs which have never been indexed are parsed.
+
+        Parameters:
+            repo_dir (Path): The cloned repository
+            parser_pool (ParserPool): The parsers to parse the files with
+
+        Returns:
+            int: The number of parsed files (0 if the index already existed)
+        """
+
+        if self.is_built:
+            return 0
+
+        parent = self._connection.execute(
+            "SELECT commit_sha FROM snapshots WHERE repo = ? "
+            "ORDER BY created_at DESC LIMIT 1",
+            (self._repo,),
+        ).fetchone()
+        changes = None
+        if parent is not None:
+            try:
+                changes = self._list_changed_rust_files(repo_dir, parent[0])
+            except subprocess.CalledProcessError:
+                changes = None  # parent commit is not part of this clone
+        if changes is not None:
+            # files of the parent whose parse failed are retried even though they did not change
+            changes = {**self._get_unindexed_files(parent[0]), **changes}
+        files = changes if changes is not None else self._list_rust_files(repo_dir)
+
+        known_blobs = self._get_known_blobs(
+            {blob for blob in files.values() if blob is not None}
+        )
+        new_blobs = sorted(
+            {blob for blob in files.values() if blob is not None} - known_blobs
+        )
+
+        # parsed outside the write lock, blobs which failed to parse are not recorded and retried later
+        parsed = {}
+        for blob, source in zip(new_blobs, self._read_blobs(repo_dir, new_blobs)):
+            tree = parser_pool.parse(source)
+            if tree is None:
+                print(f"Parsing blob {blob} timed out, it is not indexed")
+                continue
+            parsed[blob] = [
+                (blob, *self._to_row(symbol))
+                for symbol in self._extract_symbols(tree, source)
+            ]
+
+        with self._connection:
+            # holds the write lock until the commit, so checking and filling a blob is atomic
+            self._connection.execute("BEGIN IMMEDIATE")
+            for blob, rows in parsed.items():
+                # another builder may have indexed the blob since the known blobs were read
+                if self._connection.execute(
+                    "INSERT OR IGNORE INTO blobs (blob) VALUES (?)", (blob,)
+                ).rowcount:
+                    self._connection.executemany(
+                        "INSERT INTO symbols (blob, name, kind, module, owner, start_line, end_line) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        rows,
+                    )
+            inserted = self._connection.execute(
+                "INSERT OR IGNORE INTO snapshots (repo, commit_sha, created_at) VALUES (?, ?, ?)",
+                (self._repo, self._commit, time.time()),
+            ).rowcount
+            if inserted:  # another process may have built the snapshot in the meantime
+                if changes is not None:
+                    self._connection.execute(
+                        "INSERT INTO snapshot_files (repo, commit_sha, file, blob) "
+                        "SELECT repo, ?, file, blob FROM snapshot_files WHERE repo = ? AND commit_sha = ?",
+                        (self._commit, self._repo, parent[0]),
+                    )
+                self._connection.executemany(
+                    "DELETE FROM snapshot_files WHERE repo = ? AND commit_sha = ? AND file = ?",
+                    (
+                        (self._repo, self._commit, file)
+                        for file, blob in files.items()
+                        if blob is None
+                    ),
+                )
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO snapshot_files (repo, commit_sha, file, blob) "
+                    "VALUES (?, ?, ?, ?)",
+                    (
+                        (self._repo, self._commit, file, blob)
+                        for file, blob in files.items()
+                        if blob is not None
+                    ),
+                )
+        return len(new_blobs)
+
+    def find_definitions(
+        self, name: str, kind: SymbolKind | None = None
+    ) -> list[Symbol]:
+        """
+        Finds the items with the given name, e.g. where `fn foo` is defined.
+
+        Parameters:
+            name (str): The name of the item
+            kind (SymbolKind, optional): Only return items of this kind
+
+        Returns:
+            list: The matching items
+        """
+
+        if kind is None:
+            return self._query("s.name = ?", name)
+        return self._query("s.name = ? AND s.kind = ?", name, str(kind))
+
+    def find_impls(self, type_name: str) -> list[Symbol]:
+        """
+        Finds the impl blocks of a type (inherent and trait impls).
+
+        Parameters:
+            type_name (str): The name of the type, without generics or path
+
+        Returns:
+            list: The impl blocks, their owner is the implemented trait
+        """
+
+        return self._query("s.name = ? AND s.kind = ?", type_name, str(SymbolKind.IMPL))
+
+    def find_trait_impls(self, trait_name: str) -> list[Symbol]:
+        """
+        Finds the impl blocks implementing a trait, i.e. the implementors of the trait.
+
+        Parameters:
+            trait_name (str): The name of the trait, without generics or path
+
+        Returns:
+            list: The impl blocks, their name is the implementing type
+        """
+
+        return self._query(
+            "s.owner = ? AND s.kind = ?", trait_name, str(SymbolKind.IMPL)
+        )
+
+    def find_members(self, owner: str) -> list[Symbol]:
+        """
+        Finds the functions defined in the impl and trait blocks of a type or trait.
+
+        Parameters:
+            owner (str): The name of the type or trait
+
+        Returns:
+            list: The functions
+        """
+
+        return self._query(
+            "s.owner = ? AND s.kind = ?", owner, str(SymbolKind.FUNCTION)
+        )
+
+    def find_overlapping(
+        self, file: str, start_line: int, end_line: int
+    ) -> list[Symbol]:
+        """
+        Finds the items of a file overlapping a range of lines, e.g. the items touched by a diff hunk.
+
+        Parameters:
+            file (str): The path of the file within the repository
+            start_line (int): The first line of the range
+            end_line (int): The last line of the range
+
+        Returns:
+            list: The items, outermost first
+        """
+
+        return self._query(
+            "f.file = ? AND s.start_line <= ? AND s.end_line >= ?",
+            file,
+            end_line,
+            start_line,
+        )
+
+    def _query(self, condition: str, *parameters) -> list[Symbol]:
+        rows = self._connection.execute(
+            f"SELECT {SYMBOL_COLUMNS} FROM symbols s "
+            "JOIN snapshot_files f ON f.blob = s.blob "
+            f"WHERE f.repo = ? AND f.commit_sha = ? AND {condition} "
+            "ORDER BY f.file, s.start_line, s.end_line DESC",
+            (self._repo, self._commit, *parameters),
+        )
+        # the modules declared inside a file are prefixed with the module of the file itself
+        return [
+            Symbol(
+                name,
+                SymbolKind(kind),
+                file,
+                "::".join(general.get_module_path(file) + ([module] if module else [])),
+                owner,
+                start_line,
+                end_line,
+            )
+            for name, kind, file, module, owner, start_line, end_line in rows
+        ]
+
+    @staticmethod
+    def _to_row(symbol: Symbol) -> tuple:
+        return (
+            symbol.name,
+            str(symbol.kind),
+            symbol.module,
+            symbol.owner,
+            symbol.start_line,
+            symbol.end_line,
+        )
+
+    def _get_known_blobs(self, blobs: set[str]) -> set[str]:
+        """
+        Returns the blobs which have already been indexed (for any commit).
+
+        Parameters:
+            blobs (set): The blob hashes to check
+
+        Returns:
+            set: The indexed blob hashes
+        """
+
+        known = set()
+        blob_list = sorted(blobs)
+        for i in range(0, len(blob_list), QUERY_CHUNK_SIZE):
+            chunk = blob_list[i : i + QUERY_CHUNK_SIZE]
+            known.update(
+                blob
+                for (blob,) in self._connection.execute(
+                    f"SELECT blob FROM blobs WHERE blob IN ({', '.join('?' * len(chunk))})",
+                    chunk,
+                )
+            )
+        return known
+
+    def _get_unindexed_files(self, commit: str) -> dict[str, str]:
+        """
+        Returns the files of an indexed commit whose blob has not been indexed.
+
+        Parameters:
+            commit (str): The indexed commit
+
+        Returns:
+            dict: The blob hash of each file
+        """
+
+        return dict(
+            self._connection.execute(
+                "SELECT file, blob FROM snapshot_files WHERE repo = ? AND commit_sha = ? "
+                "AND blob NOT IN (SELECT blob FROM blobs)",
+                (self._repo, commit),
+            ).fetchall()
+        )
+
+    def _list_rust_files(self, repo_dir: Path) -> dict[str, str]:
+        """
+        Lists all Rust files of the commit with `git ls-tree`.
+
+        Parameters:
+            repo_dir (Path): The cloned repository
+
+        Returns:
+            dict: The blob hash of each file
+        """
+
+        listing = subprocess.run(
+            ["git", "ls-tree", "-r", "-z", "--full-tree", self._commit],
+            cwd=repo_dir,
+            capture_output=True,
+            check=True,
+        ).stdout
+        files = {}
+        for entry in listing.split(b"\0"):
+            if not entry:
+                continue
+            meta, path = entry.split(b"\t", 1)
+            _, object_type, object_hash = meta.split(b" ")
+            if object_type == b"blob" and path.endswith(b".rs"):
+                files[path.decode("utf-8", errors="replace")] = object_hash.decode()
+        return files
+
+    def _list_changed_rust_files(
+        self, repo_dir: Path, parent_commit: str
+    ) -> dict[str, str | None]:
+        """
+        Lists the Rust files which differ between an indexed commit and this commit with `git diff-tree`.
+
+        Parameters:
+            repo_dir (Path): The cloned repository
+            parent_commit (str): The indexed commit
+
+        Returns:
+            dict: The new blob hash of each changed file, None for deleted files
+        """
+
+        listing = subprocess.run(
+            [
+                "git",
+                "diff-tree",
+                "-r",
+                "-z",
+                "--no-renames",
+                parent_commit,
+                self._commit,
+            ],
+            cwd=repo_dir,
+            capture_output=True,
+            check=True,
+        ).stdout
+        # each change is returned as ":<old mode> <new mode> <old hash> <new hash> <status>\0<path>\0"
+        entries = listing.split(b"\0")
+        files = {}
+        for meta, path in zip(entries[0::2], entries[1::2]):
+            if not path.endswith(b".rs"):
+                continue
+            _, _, _, new_hash, status = meta.split(b" ")
+            files[path.decode("utf-8", errors="replace")] = (
+                None if status == b"D" else new_hash.decode()
+            )
+        return files
+
+    @staticmethod
+    def _read_blobs(repo_dir: Path, blobs: list[str]) -> list[bytes]:
+        """
+        Reads blobs from the git object store with one `git cat-file --batch` call.
+
+        Parameters:
+            repo_dir (Path): The cloned repository
+            blobs (list): The blob hashes
+
+        Returns:
+            list: The content of each blob
+        """
+
+        if not blobs:
+            return []
+
+        batch = subprocess.run(
+            ["git", "cat-file", "--batch"],
+            cwd=repo_dir,
+            input="".join(f"{blob}\n" for blob in blobs).encode(),
+            capture_output=True,
+            check=True,
+        ).stdout
+
+        # each object is returned as "<hash> <type> <size>\n<content>\n"
+        contents = []
+        position = 0
+        for _ in blobs:
+            header_end = batch.index(b"\n", position)
+            size = int(batch[position:header_end].rsplit(b" ", 1)[1])
+            contents.append(batch[header_end + 1 : header_end + 1 + size])
+            position = header_end + 1 + size + 1
+        return contents
+
+    def _extract_symbols(self, tree: Tree, source: bytes) -> list[Symbol]:
+        """
+        Collects the items of a Rust file, including those nested in modules, impl and trait blocks.
+        The items only depend on the content of the file, so their file is left empty and their module
+        only contains the modules declared inside the file.
+
+        Parameters:
+            tree (Tree): The concrete syntax tree of the file
+            source (bytes): The source code of the file
+
+        Returns:
+            list: The items of the file
+        """
+
+        def _text(node: Node) -> str:
+            return source[node.start_byte : node.end_byte].decode(
+                "utf-8", errors="replace"
+            )
+
+        def _symbol(node: Node, name: str, kind: SymbolKind, modules: list, owner: str):
+            return Symbol(
+                name=name,
+                kind=kind,
+                file="",
+                module="::".join(modules),
+                owner=owner,
+                start_line=node.start_point[0] + 1,
+                end_line=node.end_point[0] + 1,
+            )
+
+        symbols = []
+        # iterative pre-order walk: (node, module path, name of the surrounding impl / trait)
+        stack = [(child, [], "") for child in reversed(tree.root_node.children)]
+        while stack:
+            node, modules, owner = stack.pop()
+            name_node = node.child_by_field_name("name")
+            name = _text(name_node) if name_node is not None else ""
+            body = node.child_by_field_name("body")
+            members = body.named_children if body is not None else []
+
+            if node.type == "mod_item":
+                if name == "tests" or self._is_cfg_test(node, source):
+                    symbols.append(
+                        _symbol(node, name, SymbolKind.TEST_MODULE, modules, "")
+                    )
+                stack.extend(
+                    (child, modules + [name], "") for child in reversed(members)
+                )
+            elif node.type in {"function_item", "function_signature_item"}:
+                symbols.append(_symbol(node, name, SymbolKind.FUNCTION, modules, owner))
+            elif node.type == "struct_item":
+                symbols.append(_symbol(node, name, SymbolKind.STRUCT, modules, ""))
+            elif node.type == "enum_item":
+                symbols.append(_symbol(node, name, SymbolKind.ENUM, modules, ""))
+            elif node.type == "trait_item":
+                symbols.append(_symbol(node, name, SymbolKind.TRAIT, modules, ""))
+                stack.extend((child, modules, name) for child in reversed(members))
+            elif node.type == "impl_item":
+                type_name = self._get_type_name(node.child_by_field_name("type"), _text)
+                trait_name = self._get_type_name(
+                    node.child_by_field_name("trait"), _text
+                )
+                symbols.append(
+                    _symbol(node, type_name, SymbolKind.IMPL, modules, trait_name)
+                )
+                stack.extend((child, modules, type_name) for child in reversed(members))
+            elif node.type == "use_declaration":
+                argument = node.child_by_field_name("argument")
+                if argument is not None:
+                    use_path = "".join(_text(argument).split())
+                    symbols.append(_symbol(node, use_path, SymbolKind.USE, modules, ""))
+
+        return symbols
+
+    @staticmethod
+    def _get_type_name(node: Node | None, text) -> str:
+        """
+        Returns the bare name of a type, e.g. Foo for crate::Foo<T>.
+
+        Parameters:
+            node (Node | None): The type node
+            text (Callable): Returns the source text of a node
+
+        Returns:
+            str: The name of the type, empty if there is none
+        """
+
+        while node is not None and node.type in TYPE_WRAPPER_FIELDS:
+            node = node.child_by_field_name(TYPE_WRAPPER_FIELDS[node.type])
+        return text(node) if node is not None else ""
+
+    @staticmethod
+    def _is_cfg_test(node: Node, source: bytes) -> bool:
+        """
+        Checks whether an item is annotated with #[cfg(test)].
+
+        Parameters:
+            node (Node): The item
+            source (bytes): The source code the item was parsed from
+
+        Returns:
+            bool: True if the item only exists in test builds, False otherwise
+        """
+
+        prev = node.prev_sibling
+        while prev is not None and prev.type in {
+            "attribute_item",
+            "line_comment",
+            "block_comment",
+        }:
+            if b"".join(source[prev.start_byte : prev.end_byte].split()) == (
+                b"#[cfg(test)]"
+            ):
+                return True
+            prev = prev.prev_sibling
+        return False
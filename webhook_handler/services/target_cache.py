@@ -0,0 +1,111 @@
+import re
+import threading
+import time
+
+from docker import DockerClient
+from docker.errors import APIError, NotFound
+
+# label marking the volumes managed by the TargetCache, its value is the image the volume belongs to
+TARGET_CACHE_LABEL = "webhook_handler.target_cache"
+TARGET_DIR = "/app/testbed/target"
+
+
+class TargetCache:
+    """
+    Named Docker volumes holding the cargo target directory of each image (i.e. repository, base commit and Dockerfile),
+    so test builds are reused by all containers of that image, across attempts, models and PRs.
+    An empty volume is filled with the target directory of the image when it is mounted for the first time.
+    Concurrent builds in the same volume are serialized by cargo's lock on the build directory, so builds of
+    different code (e.g. the pre- and post-PR codebase) use separate variants of the volume.
+    The least recently used volumes are removed once there are more than max_volumes or they exceed max_bytes.
+    """
+
+    def __init__(self, client: DockerClient, max_volumes: int, max_bytes: int) -> None:
+        """
+        Parameters:
+            client (DockerClient): The Docker client
+            max_volumes (int): The maximum number of volumes
+            max_bytes (int): The maximum total size of the volumes (0 for no limit)
+        """
+
+        self._client = client
+        self._max_volumes = max_volumes
+        self._max_bytes = max_bytes
+        self._last_used: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def get_volume(self, image_tag: str, variant: str = "") -> dict:
+        """
+        Returns the volume of the image, creating it (and evicting older volumes) if it does not exist yet.
+
+        Parameters:
+            image_tag (str): The image of the container which mounts the volume
+            variant (str, optional): Distinguishes volumes of the same image whose builds must not be shared
+
+        Returns:
+            dict: The volume binding, as expected by containers.create
+        """
+
+        name = "target_" + re.sub(r"[^a-zA-Z0-9_.-]", "_", image_tag)
+        if variant:
+            name += f"__{variant}"
+        with self._lock:
+            is_new = name not in self._last_used
+            self._last_used[name] = time.monotonic()
+            if is_new:
+                try:
+                    self._client.volumes.get(name)
+                except NotFound:
+                    self._client.volumes.create(
+                        name, labels={TARGET_CACHE_LABEL: image_tag}
+                    )
+                    print(f"Created target volume {name}")
+                self._evict(keep=name)
+        return {name: {"bind": TARGET_DIR, "mode": "rw"}}
+
+    def _evict(self, keep: str) -> None:
+        """
+        Removes the least recently used volumes until the limits are met, volumes in use are skipped.
+        Volumes of a previous process were not used by this one, so they are removed first.
+
+        Parameters:
+            keep (str): The volume which is about to be used
+        """
+
+        volumes = self._client.volumes.list(filters={"label": TARGET_CACHE_LABEL})
+        sizes = self._get_sizes() if self._max_bytes else {}
+        candidates = sorted(
+            (volume.name for volume in volumes if volume.name != keep),
+            key=lambda name: self._last_used.get(name, 0.0),
+        )
+
+        count = len(volumes)
+        total_bytes = sum(sizes.values())
+        for name in candidates:
+            if count <= self._max_volumes and (
+                not self._max_bytes or total_bytes <= self._max_bytes
+            ):
+                break
+            try:
+                self._client.volumes.get(name).remove()
+            except APIError as e:  # still mounted by a container
+                print(f"Could not remove target volume {name}: {e.explanation}")
+                continue
+            print(f"Removed target volume {name}")
+            self._last_used.pop(name, None)
+            count -= 1
+            total_bytes -= sizes.get(name, 0)
+
+    def _get_sizes(self) -> dict[str, int]:
+        """
+        Returns:
+            dict: The disk usage of each managed volume in bytes (computed by the Docker daemon, may be slow)
+        """
+
+        sizes = {}
+        for volume in self._client.df().get("Volumes") or []:
+            if TARGET_CACHE_LABEL in (volume.get("Labels") or {}):
+                sizes[volume["Name"]] = max(
+                    volume.get("UsageData", {}).get("Size", 0), 0
+                )
+        return sizes
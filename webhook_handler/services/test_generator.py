@@ -3,7 +3,13 @@ from pathlib import Path
 
 from webhook_handler.constants import PROMPT_COMBINATIONS_GEN
 from webhook_handler.helper import git_diff, templates
-from webhook_handler.models import LLM, PipelineInputs, PullRequestData
+from webhook_handler.models import (
+    LLM,
+    EvaluationMode,
+    PipelineInputs,
+    PullRequestData,
+    PullRequestFileDiff,
+)
 from webhook_handler.services import Config
 from webhook_handler.services.cst_builder import CSTBuilder
 from webhook_handler.services.docker_service import DockerService
@@ -43,6 +49,7 @@ class TestGenerator:
         self._llm_handler = llm_handler
         self._i_attempt = i_attempt
         self._model = model
+        self.compiler_errors = None  # set if the generated test does not compile
 
     def generate(self) -> bool:
         """
@@ -71,7 +78,7 @@ class TestGenerator:
             # self._pipeline_inputs.available_relative_imports
         )
 
-        if len(prompt) >= 1048576:  # gpt4o limit
+        if len(prompt) >= self._config.admission_max_prompt_chars:
             logger.critical("Prompt exceeds limits, skipping...")
             raise Exception("Prompt is too long.")
 
@@ -103,40 +110,88 @@ class TestGenerator:
             "src/", ""
         )  # temporary replacement to run in lib-legacy
 
-        if self._pipeline_inputs.test_file_content:
+        test_filename = self._pipeline_inputs.filename_to_insert_test
+        test_file_content = self._pipeline_inputs.test_file_content or ""
+        if test_file_content:
             new_test_file_content = self._cst_builder.append_function(
-                self._pipeline_inputs.test_file_content, new_test
+                test_file_content, new_test
             )
+            if new_test_file_content is None:
+                print("Parsing the test file timed out, skipping the test runs")
+                print("================= Test Generation Finished ==============")
+                return False
         else:
             new_test_file_content = new_test
 
         model_test_patch = (
             git_diff.unified_diff(
-                self._pipeline_inputs.test_file_content,
+                test_file_content,
                 new_test_file_content,
-                fromfile=self._pipeline_inputs.test_filename,
-                tofile=self._pipeline_inputs.test_filename,
+                fromfile=test_filename,
+                tofile=test_filename,
             )
             + "\n\n"
         )
 
         test_file_diff = PullRequestFileDiff(
-            self._pipeline_inputs.test_filename,
-            self._pipeline_inputs.test_file_content,
+            test_filename,
+            test_file_content,
             new_test_file_content,
         )
 
         test_to_run = self._cst_builder.extract_changed_tests(test_file_diff)
+        if not test_to_run:
+            # without a filter, cargo would run the whole test suite of the target
+            print(
+                "No test function found in the generated test, skipping the test runs"
+            )
+            print("================= Test Generation Finished ==============")
+            return False
+
+        if self._config.compile_check:
+            build_result = self._docker_service.run_compile_check(
+                model_test_patch,
+                test_file_diff.name,
+                self._pr_diff_ctx.golden_code_patch,
+                generation_dir / "compile.txt",
+            )
+            if not build_result.compiled:
+                self.compiler_errors = build_result.compiler_errors or None
+                print("Generated test does not compile, skipping the test runs")
+                print("================= Test Generation Finished ==============")
+                return False
 
         # logger.marker("Running test in pre-PR codebase...")
-        test_passed_before, stdout_before = self._docker_service.run_test_in_container(
-            model_test_patch, test_to_run, test_file_diff.name
-        )
-        (generation_dir / "before.txt").write_text(stdout_before, encoding="utf-8")
+        result_after = None
+        if self._config.evaluation_mode in {
+            EvaluationMode.INCREMENTAL,
+            EvaluationMode.CONCURRENT,
+        }:
+            run_both = (
+                self._docker_service.run_test_before_and_after
+                if self._config.evaluation_mode == EvaluationMode.INCREMENTAL
+                else self._docker_service.run_test_concurrently
+            )
+            result_before, result_after = run_both(
+                model_test_patch,
+                test_to_run,
+                test_file_diff.name,
+                self._pr_diff_ctx.golden_code_patch,
+                generation_dir / "before.txt",
+                generation_dir / "after.txt",
+            )
+        else:
+            result_before = self._docker_service.run_test_in_container(
+                model_test_patch,
+                test_to_run,
+                test_file_diff.name,
+                generation_dir / "before.txt",
+            )
+        test_passed_before = result_before.passed
         new_test_file = (
-            f"#{self._pipeline_inputs.test_filename}\n{new_test_file_content}"
-            if self._pipeline_inputs.test_file_content
-            else f"#{self._pipeline_inputs.test_filename}\n{new_test}"
+            f"#{test_filename}\n{new_test_file_content}"
+            if test_file_content
+            else f"#{test_filename}\n{new_test}"
         )
         (generation_dir / "new_test_file_content.js").write_text(
             new_test_file, encoding="utf-8"
@@ -149,14 +204,18 @@ class TestGenerator:
             return False
 
         # logger.marker("Running test in post-PR codebase...")
-        print("Running test in post-PR codebase...")
-        test_passed_after, stdout_after = self._docker_service.run_test_in_container(
-            model_test_patch,
-            test_to_run,
-            test_file_diff.name,
-            golden_code_patch=self._pr_diff_ctx.golden_code_patch,
-        )
-        (generation_dir / "after.txt").write_text(stdout_after, encoding="utf-8")
+        if result_after is None:  # not already run together with the pre-PR run
+            print("Running test in post-PR codebase...")
+            result_after = self._docker_service.run_test_in_container(
+                model_test_patch,
+                test_to_run,
+                test_file_diff.name,
+                generation_dir / "after.txt",
+                golden_code_patch=self._pr_diff_ctx.golden_code_patch,
+            )
+        test_passed_after = result_after.passed
+        if not result_after.compiled:
+            self.compiler_errors = result_after.compiler_errors or None
 
         if not test_passed_before and test_passed_after:
             # logger.success("Fail-to-Pass test generated")
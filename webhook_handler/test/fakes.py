@@ -0,0 +1,250 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+from unittest import mock
+
+from webhook_handler.models import LLM, PullRequestData
+from webhook_handler.services.config import Config
+from webhook_handler.services.docker_service import DockerService
+from webhook_handler.services.exec_stream import (
+    STEP_MARKER,
+    TEST_STEP,
+    RunScriptStream,
+)
+from webhook_handler.services.file_classifier import FileClassifier
+from webhook_handler.services.llm_handler import LLMHandler
+from webhook_handler.services.pr_diff_context import PullRequestDiffContext
+
+# output of `cargo test --no-run` for a test target which compiles
+CARGO_BUILD_OUTPUT = """   Compiling shapes v0.1.0 (/app/testbed)
+    Finished `test` profile [unoptimized + debuginfo] target(s) in 0.52s
+  Executable unittests src/lib.rs (target/debug/deps/shapes-0123456789abcdef)"""
+
+# output of `cargo test` for a test which does not compile
+CARGO_COMPILE_ERROR_OUTPUT = """   Compiling shapes v0.1.0 (/app/testbed)
+warning: unused variable: `x`
+ --> src/lib.rs:2:9
+  |
+2 |     let x = 1;
+  |         ^ help: if this is intentional, prefix it with an underscore: `_x`
+
+error[E0425]: cannot find function `tripple` in this scope
+  --> src/lib.rs:12:20
+   |
+12 |         assert_eq!(tripple(2), 6);
+   |                    ^^^^^^^ help: a function with a similar name exists: `triple`
+
+error: could not compile `shapes` (lib test) due to 1 previous error; 1 warning emitted"""
+
+
+def get_payload(rel_path: str) -> dict:
+    abs_path = os.path.join(os.path.dirname(__file__), rel_path)
+    with open(abs_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class FakeGitHubService:
+    """
+    Serves the changed files of a PR from memory instead of the GitHub API.
+    """
+
+    def __init__(self, files: dict[str, tuple[str, str]]) -> None:
+        """
+        Parameters:
+            files (dict): The content before and after the PR, by file name
+        """
+
+        self.files = files
+        self.fetched: list[str] = []
+
+    def fetch_pr_files(self) -> list[dict]:
+        return [{"filename": file_name} for file_name in self.files]
+
+    def fetch_file_version(self, commit: str, file_name: str) -> str:
+        self.fetched.append(file_name)
+        before, after = self.files[file_name]
+        return before if commit == "base" else after
+
+
+def make_diff_context(
+    files: dict[str, tuple[str, str]], repo: str = "grcov"
+) -> PullRequestDiffContext:
+    """
+    Parameters:
+        files (dict): The content before and after the PR, by file name
+        repo (str, optional): The repository whose classification rules are used
+
+    Returns:
+        PullRequestDiffContext: The diff context of a PR from "base" to "head"
+    """
+
+    return PullRequestDiffContext(
+        "base",
+        "head",
+        FakeGitHubService(files),
+        FileClassifier.for_repository(repo),
+    )
+
+
+def cargo_test_output(outcomes: dict[str, bool]) -> str:
+    """
+    Parameters:
+        outcomes (dict): Whether each test passes, by test path
+
+    Returns:
+        str: The output of `cargo test` in the libtest text format
+    """
+
+    failed = [name for name, passed in outcomes.items() if not passed]
+    lines = [
+        "   Compiling shapes v0.1.0 (/app/testbed)",
+        "    Finished `test` profile [unoptimized + debuginfo] target(s) in 0.61s",
+        "     Running unittests src/lib.rs (target/debug/deps/shapes-0123456789abcdef)",
+        "",
+        f"running {len(outcomes)} tests",
+    ]
+    lines += [
+        f"test {name} ... {'ok' if passed else 'FAILED'}"
+        for name, passed in outcomes.items()
+    ]
+    if failed:
+        lines += ["", "failures:", ""]
+        for name in failed:
+            lines += [
+                f"---- {name} stdout ----",
+                "",
+                f"thread '{name}' panicked at src/lib.rs:12:9:",
+                "assertion `left == right` failed",
+                "note: run with `RUST_BACKTRACE=1` environment variable to display a backtrace",
+                "",
+            ]
+        lines += ["", "failures:"] + [f"    {name}" for name in failed]
+    lines += [
+        "",
+        f"test result: {'FAILED' if failed else 'ok'}. {len(outcomes) - len(failed)} passed; "
+        f"{len(failed)} failed; 0 ignored; 0 measured; 0 filtered out; finished in 0.00s",
+    ]
+    return "\n".join(lines)
+
+
+class FakeContainer:
+    """
+    Stands in for a test container, it keeps the run files and whether the golden patch has been applied.
+    """
+
+    def __init__(self, image_tag: str, target_variant: str) -> None:
+        self.image_tag = image_tag
+        self.target_variant = target_variant
+        self.files: dict[str, str] = {}
+        self.scripts: dict[str, list[tuple[str, str]]] = {}
+        self.golden_code_applied = False
+
+
+class FakeContainerPool:
+    """
+    Lends a new FakeContainer for every checkout, they are recorded in order.
+    """
+
+    def __init__(self) -> None:
+        self.containers: list[FakeContainer] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def checkout(
+        self, image_tag: str, target_variant: str = ""
+    ) -> Iterator[FakeContainer]:
+        container = FakeContainer(image_tag, target_variant)
+        with self._lock:
+            self.containers.append(container)
+        yield container
+
+
+class FakeDockerService(DockerService):
+    """
+    Runs the evaluation logic of DockerService without a Docker daemon. Instead of executing a run script,
+    its steps print canned cargo output, the post-PR output once the golden patch has been applied in the container.
+    """
+
+    def __init__(
+        self,
+        pr_data: PullRequestData,
+        output_before: str,
+        output_after: str,
+        compile_output: str = CARGO_BUILD_OUTPUT,
+    ) -> None:
+        """
+        Parameters:
+            pr_data (PullRequestData): The PR
+            output_before (str): The output of the test step in the pre-PR codebase
+            output_after (str): The output of the test step in the post-PR codebase
+            compile_output (str, optional): The output of the compile check
+        """
+
+        with mock.patch("docker.from_env"):
+            super().__init__(Path.cwd(), pr_data, FakeContainerPool())
+        self._image_tag = "image_shapes:base"
+        self._outputs = {"before": output_before, "after": output_after}
+        self._compile_output = compile_output
+        # (script name, codebase) of each test step which ran
+        self.runs: list[tuple[str, str]] = []
+
+    @property
+    def containers(self) -> list[FakeContainer]:
+        return self._container_pool.containers
+
+    def _put_run_files(
+        self,
+        container: FakeContainer,
+        files: dict[str, str],
+        scripts: dict[str, list[tuple[str, str]]],
+    ) -> None:
+        container.files.update(files)
+        container.scripts.update(scripts)
+
+    def _exec_run_script(
+        self,
+        container: FakeContainer,
+        script_name: str,
+        tests_to_run: list,
+        log_path: Path,
+        cancel: threading.Event = None,
+    ):
+        if cancel is not None and cancel.is_set():
+            raise AssertionError("Run cancelled")
+        stream = RunScriptStream(tests_to_run, log_path, self._test_output_max_bytes)
+        for name, command in container.scripts[script_name]:
+            output = ""
+            if name == "apply_golden_code_patch":
+                container.golden_code_applied = True
+            elif name == TEST_STEP and "--no-run" in command:
+                output = self._compile_output
+                self.runs.append((script_name, "compile"))
+            elif name == TEST_STEP:
+                codebase = "after" if container.golden_code_applied else "before"
+                output = self._outputs[codebase]
+                self.runs.append((script_name, codebase))
+            exit_code = (
+                101 if "FAILED" in output or "could not compile" in output else 0
+            )
+            stream.feed(
+                f"{STEP_MARKER} {name} start\n{output}\n{STEP_MARKER} {name} exit {exit_code}\n".encode()
+            )
+        return stream.finish(False)
+
+
+class FakeLLMHandler(LLMHandler):
+    """
+    Builds the real prompts, but answers every query with the same response. The prompts are recorded.
+    """
+
+    def __init__(self, config: Config, data, response: str, symbol_index=None) -> None:
+        super().__init__(config, data, symbol_index)
+        self._response = response
+        self.prompts: list[str] = []
+
+    def query_model(self, prompt: str, model: LLM, temperature: float = 0.0) -> str:
+        self.prompts.append(prompt)
+        return self._response
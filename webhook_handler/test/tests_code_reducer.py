@@ -0,0 +1,120 @@
+from django.test import SimpleTestCase
+
+from webhook_handler.models import PipelineInputs, PullRequestData
+from webhook_handler.services.code_reducer import CodeReducer
+from webhook_handler.services.config import Config
+from webhook_handler.services.llm_handler import LLMHandler
+from webhook_handler.services.parser_pool import ParserPool
+from webhook_handler.test.fakes import get_payload, make_diff_context
+
+CODE_BEFORE = """use std::fmt;
+
+/// Adds two numbers.
+pub fn add(a: i32, b: i32) -> i32 {
+    a + b
+}
+
+pub struct Point {
+    pub x: i32,
+    #[cfg(test)]
+    pub debug_name: String,
+}
+
+#[cfg(test)]
+fn test_helper() -> i32 {
+    42
+}
+
+/// Checks add.
+#[test]
+fn test_add_top_level() {
+    assert_eq!(add(1, 2), 3);
+}
+
+impl fmt::Display for Point {
+    fn fmt(&self, f: &mut fmt::Formatter) -> fmt::Result {
+        write!(f, "({})", self.x)
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_add() {
+        assert_eq!(add(2, 2), 4);
+    }
+}
+
+pub fn sub(a: i32, b: i32) -> i32 {
+    a - b
+}
+"""
+
+
+#
+# RUN With: python manage.py test webhook_handler.test.tests_code_reducer
+#
+class TestCodeReducer(SimpleTestCase):
+    def setUp(self) -> None:
+        self.reducer = CodeReducer(ParserPool(ParserPool.rust_language()))
+
+    def test_removes_test_items_only(self):
+        reduction = self.reducer.remove_test_items(CODE_BEFORE, "src/lib.rs")
+
+        for removed in [
+            "mod tests",
+            "fn test_add(",
+            "fn test_add_top_level",
+            "/// Checks add.",
+            "fn test_helper",
+            "debug_name",
+            "#[cfg(test)]",
+        ]:
+            self.assertNotIn(removed, reduction.code)
+        for kept in [
+            "use std::fmt;",
+            "/// Adds two numbers.\npub fn add(a: i32, b: i32) -> i32 {",
+            "pub struct Point {\n    pub x: i32,\n}",
+            "impl fmt::Display for Point",
+            "pub fn sub(a: i32, b: i32) -> i32 {\n    a - b\n}",
+        ]:
+            self.assertIn(kept, reduction.code)
+        self.assertEqual(reduction.bytes_saved, len(CODE_BEFORE) - len(reduction.code))
+        self.assertGreater(reduction.tokens_saved, 0)
+
+    def test_removes_test_only_file(self):
+        code = "#![cfg(test)]\n\nuse super::*;\n\n#[test]\nfn test_x() {}\n"
+
+        self.assertEqual(self.reducer.remove_test_items(code).code, "")
+
+    def test_keeps_code_without_test_items(self):
+        code = '#[derive(Debug)]\npub struct A;\n\n#[cfg(feature = "x")]\nfn f() {}\n'
+
+        self.assertEqual(self.reducer.remove_test_items(code).code, code)
+
+    def test_reduced_code_is_sent_to_the_llm(self):
+        pr_diff_ctx = make_diff_context(
+            {"src/lib.rs": (CODE_BEFORE, CODE_BEFORE.replace("a - b", "b - a"))}
+        )
+        config = Config()
+        config.openai_key = config.groq_key = "test"
+        pipeline_inputs = PipelineInputs(
+            pr_data=PullRequestData.from_payload(
+                get_payload("test_data/grcov/pr_1180.json")
+            ),
+            pr_diff_ctx=pr_diff_ctx,
+            problem_statement="sub returns the wrong sign",
+            code_before=pr_diff_ctx.remove_tests_from_code_before(self.reducer),
+        )
+
+        prompt = LLMHandler(config, pipeline_inputs).build_prompt()
+        code = prompt[prompt.index("Code:\n<code>\n") : prompt.index("</code>")]
+
+        self.assertTrue(
+            code.startswith("Code:\n<code>\nFile:\nsrc/lib.rs\nuse std::fmt;")
+        )
+        self.assertIn("impl fmt::Display for Point", code)
+        self.assertNotIn("mod tests", code)
+        self.assertNotIn("fn test_helper", code)
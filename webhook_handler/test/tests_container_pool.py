@@ -0,0 +1,142 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from webhook_handler.services.container_pool import CONTAINER_POOL_LABEL, ContainerPool
+
+
+class FakeDockerContainer:
+    def __init__(self, client: "FakeDockerClient", labels: dict) -> None:
+        self._client = client
+        self.id = f"container{len(client.created)}"
+        self.short_id = self.id
+        self.labels = labels
+        self.status = "created"
+
+    def start(self) -> None:
+        self.status = "running"
+
+    def reload(self) -> None:
+        pass
+
+    def exec_run(self, cmd: str) -> SimpleNamespace:
+        return SimpleNamespace(exit_code=0)
+
+    def remove(self, force: bool = False) -> None:
+        self._client.removed.append(self)
+
+
+class FakeContainers:
+    def __init__(self, client: "FakeDockerClient") -> None:
+        self._client = client
+
+    def create(self, labels: dict, **kwargs) -> FakeDockerContainer:
+        container = FakeDockerContainer(self._client, labels)
+        self._client.created.append(container)
+        return container
+
+    def list(self, all: bool, filters: dict) -> list[FakeDockerContainer]:
+        return [
+            container
+            for container in self._client.created
+            if filters["label"] in container.labels
+            and container not in self._client.removed
+        ]
+
+
+class FakeDockerClient:
+    """
+    Keeps the containers in memory, removed containers are recorded.
+    """
+
+    def __init__(self) -> None:
+        self.containers = FakeContainers(self)
+        self.created: list[FakeDockerContainer] = []
+        self.removed: list[FakeDockerContainer] = []
+
+
+#
+# RUN With: python manage.py test webhook_handler.test.tests_container_pool
+#
+class TestContainerPool(SimpleTestCase):
+    def setUp(self) -> None:
+        self.client = FakeDockerClient()
+
+    def _pool(self, idle_timeout_seconds: float = 600) -> ContainerPool:
+        with mock.patch("docker.from_env", return_value=self.client):
+            pool = ContainerPool(2, idle_timeout_seconds)
+        self.addCleanup(pool.close)
+        return pool
+
+    def test_containers_are_labeled_and_reused(self):
+        pool = self._pool()
+
+        for _ in range(2):
+            with pool.checkout("image:a") as container:
+                pass
+
+        self.assertEqual(self.client.created, [container])
+        self.assertEqual(
+            container.labels,
+            {CONTAINER_POOL_LABEL: f"{socket.gethostname()}:{os.getpid()}"},
+        )
+        self.assertEqual(self.client.removed, [])
+
+    def test_expired_containers_are_reaped_without_checkout(self):
+        pool = self._pool(idle_timeout_seconds=0.01)
+        with pool.checkout("image:a") as container:
+            pass
+
+        deadline = time.monotonic() + 5
+        while not self.client.removed and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        self.assertEqual(self.client.removed, [container])
+
+    def test_expired_containers_are_reaped_on_release(self):
+        pool = self._pool(idle_timeout_seconds=0.05)
+        with pool.checkout("image:a") as expired:
+            pass
+        time.sleep(0.1)
+
+        with pool.checkout("image:b", "post_pr"):
+            self.assertEqual(self.client.removed, [expired])
+
+        self.assertEqual(self.client.removed, [expired])
+
+    def test_close_removes_idle_and_returned_containers(self):
+        pool = self._pool()
+        with pool.checkout("image:a") as idle:
+            pass
+
+        with pool.checkout("image:b") as in_use:
+            pool.close()
+            self.assertEqual(self.client.removed, [idle])
+
+        self.assertEqual(self.client.removed, [idle, in_use])
+
+    def test_leftovers_of_exited_processes_are_removed(self):
+        exited = subprocess.run(
+            [sys.executable, "-c", "import os; print(os.getpid())"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        hostname = socket.gethostname()
+        for owner in (
+            f"{hostname}:{exited.stdout.strip()}",
+            f"{hostname}:{os.getpid()}",
+            "other-host:1",
+        ):
+            self.client.containers.create(labels={CONTAINER_POOL_LABEL: owner})
+        leftover = self.client.created[0]
+
+        self._pool()
+
+        self.assertEqual(self.client.removed, [leftover])
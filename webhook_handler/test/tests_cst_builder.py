@@ -0,0 +1,126 @@
+import contextlib
+import io
+
+from django.test import SimpleTestCase
+
+from webhook_handler.models import PipelineInputs, PullRequestData, PullRequestFileDiff
+from webhook_handler.services import cst_builder
+from webhook_handler.services.config import Config
+from webhook_handler.services.cst_builder import CSTBuilder
+from webhook_handler.services.parse_cache import ParseTreeCache
+from webhook_handler.services.llm_handler import LLMHandler
+from webhook_handler.services.parser_pool import ParserPool
+from webhook_handler.test.fakes import get_payload, make_diff_context
+
+PARSER_BEFORE = """pub struct Parser {
+    pos: usize,
+}
+
+impl Parser {
+    pub fn new() -> Self {
+        Parser { pos: 0 }
+    }
+
+    pub fn advance(&mut self) {
+        self.pos += 1;
+    }
+}
+
+pub fn unrelated() -> u32 {
+    7
+}
+"""
+
+LEXER_BEFORE = """pub fn lex(input: &str) -> Vec<char> {
+    input.chars().collect()
+}
+
+pub fn untouched() {}
+"""
+
+
+#
+# RUN With: python manage.py test webhook_handler.test.tests_cst_builder
+#
+class TestSlicing(SimpleTestCase):
+    def setUp(self) -> None:
+        self.pr_diff_ctx = make_diff_context(
+            {
+                "src/parser.rs": (
+                    PARSER_BEFORE,
+                    PARSER_BEFORE.replace("self.pos += 1;", "self.pos += 2;"),
+                ),
+                "src/lexer.rs": (
+                    LEXER_BEFORE,
+                    LEXER_BEFORE.replace(".collect()", ".rev().collect()"),
+                ),
+            }
+        )
+        self.parser_pool = ParserPool(ParserPool.rust_language())
+
+    def _slice(self, slicing_workers: int) -> list[str]:
+        builder = CSTBuilder(
+            self.parser_pool, self.pr_diff_ctx, slicing_workers=slicing_workers
+        )
+        with contextlib.redirect_stdout(io.StringIO()):
+            return builder.get_sliced_code_files()
+
+    def test_process_pool_matches_in_process_slicing(self):
+        sliced = self._slice(0)
+
+        self.assertEqual(len(sliced), 2)
+        self.assertTrue(sliced[1].startswith("1 pub fn lex(input: &str)"))
+        self.assertEqual(self._slice(2), sliced)
+
+    def test_sliced_code_is_sent_for_sliced_only_prs(self):
+        config = Config()
+        config.openai_key = config.groq_key = "test"
+        code_sliced = self._slice(0)
+        pipeline_inputs = PipelineInputs(
+            pr_data=PullRequestData.from_payload(
+                get_payload("test_data/grcov/pr_1180.json")
+            ),
+            pr_diff_ctx=self.pr_diff_ctx,
+            problem_statement="advance skips a character",
+            code_sliced=code_sliced,
+            sliced_only=True,
+        )
+
+        prompt = LLMHandler(config, pipeline_inputs).build_prompt()
+
+        self.assertIn(f"File:\nsrc/parser.rs\n{code_sliced[0]}\n", prompt)
+        self.assertIn(f"File:\nsrc/lexer.rs\n{code_sliced[1]}\n", prompt)
+
+
+class TestParseTimeouts(SimpleTestCase):
+    def setUp(self) -> None:
+        # longer than one read of the parser, so the deadline is always checked
+        self.test_file = "\n".join(
+            f"pub fn f{i}() -> u32 {{\n    {i}\n}}" for i in range(100)
+        )
+        timed_out_pool = ParserPool(ParserPool.rust_language(), timeout_seconds=1e-9)
+        self.builder = CSTBuilder(timed_out_pool, parse_cache=ParseTreeCache(2**20))
+
+    def test_changed_tests_of_a_timed_out_file(self):
+        file_diff = PullRequestFileDiff(
+            "src/lib.rs",
+            self.test_file,
+            self.test_file + "\n#[test]\nfn test_new() {}\n",
+        )
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(self.builder.extract_changed_tests(file_diff), [])
+
+    def test_append_function_to_a_timed_out_file(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertIsNone(
+                self.builder.append_function(self.test_file, "fn test_new() {}")
+            )
+
+    def test_slicing_workers_use_the_parse_timeout(self):
+        self.addCleanup(setattr, cst_builder, "_worker_cst_builder", None)
+        cst_builder._init_slicing_worker(0, 2.5)
+
+        self.assertEqual(
+            cst_builder._worker_cst_builder._parser_pool.timeout_seconds, 2.5
+        )
@@ -0,0 +1,150 @@
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from webhook_handler.services.exec_stream import STEP_MARKER, TEST_STEP, RunScriptStream
+from webhook_handler.test.fakes import CARGO_COMPILE_ERROR_OUTPUT, cargo_test_output
+
+
+def frame(name: str, output: str, exit_code: int) -> str:
+    """
+    Returns:
+        str: The output of a step as printed by a run script, which adds a line break before the exit marker
+    """
+
+    return (
+        f"{STEP_MARKER} {name} start\n{output}\n{STEP_MARKER} {name} exit {exit_code}\n"
+    )
+
+
+#
+# RUN With: python manage.py test webhook_handler.test.tests_exec_stream
+#
+class TestRunScriptStream(SimpleTestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.log_path = Path(self._tmp.name, "test.txt")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _stream(self, max_output_bytes: int = 2**20) -> RunScriptStream:
+        return RunScriptStream(["tests::test_a"], self.log_path, max_output_bytes)
+
+    def test_steps_are_framed(self):
+        test_output = cargo_test_output({"tests::test_a": True}) + "\n"
+        stream = self._stream()
+
+        aborted = stream.feed(
+            (
+                "output before the first step\n"
+                + frame("add_test_file", "", 0)
+                + frame("apply_test_patch", "patching file src/lib.rs\n", 0)
+                + frame(TEST_STEP, test_output, 0)
+            ).encode()
+        )
+        results, test_result = stream.finish(False)
+
+        self.assertFalse(aborted)
+        self.assertEqual(
+            [(result.name, result.exit_code, result.output) for result in results],
+            [
+                ("add_test_file", 0, ""),
+                ("apply_test_patch", 0, "patching file src/lib.rs"),
+                (TEST_STEP, 0, ""),
+            ],
+        )
+        self.assertEqual(self.log_path.read_text(), test_output)
+        self.assertTrue(test_result.passed)
+
+    def test_steps_after_a_failed_one_are_skipped(self):
+        stream = self._stream()
+
+        stream.feed(
+            (
+                frame("apply_test_patch", "Hunk #1 FAILED at 12.", 1)
+                + f"{STEP_MARKER} {TEST_STEP} skipped\n"
+            ).encode()
+        )
+        results, test_result = stream.finish(False)
+
+        self.assertEqual(
+            [(result.name, result.exit_code, result.output) for result in results],
+            [
+                ("apply_test_patch", 1, "Hunk #1 FAILED at 12."),
+                (TEST_STEP, None, ""),
+            ],
+        )
+        self.assertIsNone(test_result)
+        self.assertFalse(self.log_path.exists())
+
+    def test_blank_lines_of_the_output_are_kept(self):
+        stream = self._stream()
+
+        stream.feed(frame(TEST_STEP, "a\n\n\nb\n\n", 101).encode())
+        stream.finish(False)
+
+        self.assertEqual(self.log_path.read_text(), "a\n\n\nb\n\n")
+
+    def test_chunks_split_lines_and_characters(self):
+        output = frame(TEST_STEP, "running 1 test\ntest tests::test_a ... ok ✓\n", 0)
+        data = output.encode()
+        split = data.index("✓".encode()) + 1  # inside the multibyte character
+        stream = self._stream()
+
+        for chunk in (data[:7], data[7:split], data[split:]):
+            stream.feed(chunk)
+        _, test_result = stream.finish(False)
+
+        self.assertEqual(
+            self.log_path.read_text(), "running 1 test\ntest tests::test_a ... ok ✓\n"
+        )
+        self.assertEqual([test.name for test in test_result.tests], ["tests::test_a"])
+
+    def test_output_limit(self):
+        stream = self._stream(max_output_bytes=20)
+
+        aborted = stream.feed(
+            f"{STEP_MARKER} {TEST_STEP} start\n0123456789\n0123456789\n".encode()
+        )
+        results, test_result = stream.finish(False)
+
+        self.assertTrue(aborted)
+        self.assertEqual(stream.abort_reason, "output limit")
+        self.assertEqual(
+            self.log_path.read_text(), "0123456789\n... output exceeded 20 bytes\n"
+        )
+        self.assertEqual(results[0].exit_code, None)
+        self.assertTrue(test_result.output_limit_exceeded)
+        self.assertFalse(test_result.passed)
+
+    def test_compile_error_aborts(self):
+        stream = self._stream()
+
+        aborted = stream.feed(
+            f"{STEP_MARKER} {TEST_STEP} start\n{CARGO_COMPILE_ERROR_OUTPUT}\n"
+            "   Compiling other v0.1.0\n".encode()
+        )
+        _, test_result = stream.finish(False)
+
+        self.assertTrue(aborted)
+        self.assertEqual(stream.abort_reason, "compile error")
+        self.assertTrue(
+            self.log_path.read_text().endswith(
+                "error: could not compile `shapes` (lib test) due to 1 previous error; 1 warning emitted\n"
+            )
+        )
+        self.assertFalse(test_result.compiled)
+        self.assertEqual(len(test_result.compiler_errors), 1)
+        self.assertFalse(test_result.output_limit_exceeded)
+
+    def test_timed_out_run(self):
+        stream = self._stream()
+
+        stream.feed(f"{STEP_MARKER} {TEST_STEP} start\nrunning 1 test\n".encode())
+        results, test_result = stream.finish(True)
+
+        self.assertIsNone(results[0].exit_code)
+        self.assertTrue(test_result.timed_out)
+        self.assertEqual(test_result.missing, ["tests::test_a"])
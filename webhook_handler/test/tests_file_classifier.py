@@ -0,0 +1,114 @@
+import json
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from webhook_handler.models import FileCategory
+from webhook_handler.services.file_classifier import FileClassifier
+from webhook_handler.services.pr_diff_context import PullRequestDiffContext
+from webhook_handler.test.fakes import make_diff_context
+
+
+#
+# RUN With: python manage.py test webhook_handler.test.tests_file_classifier
+#
+class TestFileClassifier(SimpleTestCase):
+    def test_classify_all(self):
+        classifier = FileClassifier.for_repository("grcov")
+        categories = classifier.classify_all(
+            [
+                "src/lib.rs",
+                "src/parser/mod.rs",
+                "crates/core/src/lib.rs",
+                "src/tests.rs",
+                "tests/cli.rs",
+                "crates/core/tests/it.rs",
+                "benches/parse.rs",
+                "Cargo.toml",
+                "crates/core/Cargo.toml",
+                "build.rs",
+                "Cargo.lock",
+                "examples/demo.rs",
+                "README.md",
+            ]
+        )
+
+        self.assertEqual(
+            categories,
+            {
+                "src/lib.rs": FileCategory.SOURCE,
+                "src/parser/mod.rs": FileCategory.SOURCE,
+                "crates/core/src/lib.rs": FileCategory.SOURCE,
+                "src/tests.rs": FileCategory.TEST,
+                "tests/cli.rs": FileCategory.TEST,
+                "crates/core/tests/it.rs": FileCategory.TEST,
+                "benches/parse.rs": FileCategory.TEST,
+                "Cargo.toml": FileCategory.NON_SOURCE,
+                "crates/core/Cargo.toml": FileCategory.NON_SOURCE,
+                "build.rs": FileCategory.NON_SOURCE,
+                "Cargo.lock": FileCategory.OTHER,
+                "examples/demo.rs": FileCategory.OTHER,
+                "README.md": FileCategory.OTHER,
+            },
+        )
+
+    def test_repository_rules_override_source_only(self):
+        classifier = FileClassifier.for_repository("rust-code-analysis")
+
+        self.assertEqual(
+            classifier.classify("rust-code-analysis-cli/src/main.rs"),
+            FileCategory.SOURCE,
+        )
+        self.assertEqual(classifier.classify("tests/cli.rs"), FileCategory.TEST)
+        self.assertEqual(classifier.classify("Cargo.toml"), FileCategory.NON_SOURCE)
+
+    def test_rules_file_overrides_category(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            rules_path = Path(tmp, "rules.json")
+            rules_path.write_text(
+                json.dumps({"default": {"non_source": ["re:.*\\.lock"]}}),
+                encoding="utf-8",
+            )
+            classifier = FileClassifier.for_repository("grcov", rules_path)
+
+        self.assertEqual(classifier.classify("Cargo.lock"), FileCategory.NON_SOURCE)
+        self.assertEqual(classifier.classify("Cargo.toml"), FileCategory.OTHER)
+        self.assertEqual(classifier.classify("src/lib.rs"), FileCategory.SOURCE)
+
+
+class TestPullRequestAdmission(SimpleTestCase):
+    def _diff_context(self, file_names: list[str]) -> PullRequestDiffContext:
+        return make_diff_context(
+            {file_name: ("", f"// {file_name}\n") for file_name in file_names}
+        )
+
+    def test_accepts_source_changes_with_lockfile_and_examples(self):
+        pr_diff_ctx = self._diff_context(
+            ["src/lib.rs", "Cargo.lock", "examples/demo.rs", "README.md"]
+        )
+
+        self.assertTrue(pr_diff_ctx.fulfills_requirements)
+        self.assertEqual(pr_diff_ctx.code_names, ["src/lib.rs"])
+        # files of the "other" category are never fetched
+        self.assertNotIn("Cargo.lock", pr_diff_ctx._gh_service.fetched)
+
+    def test_rejects_manifest_changes(self):
+        pr_diff_ctx = self._diff_context(["src/lib.rs", "Cargo.toml"])
+
+        self.assertFalse(pr_diff_ctx.fulfills_requirements)
+
+    def test_rejects_build_script_changes(self):
+        pr_diff_ctx = self._diff_context(["src/lib.rs", "crates/core/build.rs"])
+
+        self.assertFalse(pr_diff_ctx.fulfills_requirements)
+
+    def test_rejects_test_changes(self):
+        pr_diff_ctx = self._diff_context(["src/lib.rs", "tests/cli.rs"])
+
+        self.assertFalse(pr_diff_ctx.fulfills_requirements)
+
+    def test_rejects_without_source_changes(self):
+        pr_diff_ctx = self._diff_context(["Cargo.lock", "README.md"])
+
+        self.assertFalse(pr_diff_ctx.fulfills_requirements)
@@ -0,0 +1,50 @@
+from django.test import SimpleTestCase
+
+from webhook_handler.helper.general import get_cargo_test_target, get_module_path
+
+
+#
+# RUN With: python manage.py test webhook_handler.test.tests_general
+#
+class TestGetModulePath(SimpleTestCase):
+    def test_library_root_has_no_module_path(self):
+        self.assertEqual(get_module_path("src/lib.rs"), [])
+
+    def test_nested_module(self):
+        self.assertEqual(get_module_path("core/src/parser/mod.rs"), ["parser"])
+
+    def test_module_named_like_a_target_dir(self):
+        self.assertEqual(get_module_path("src/examples.rs"), ["examples"])
+        self.assertEqual(get_module_path("src/benches.rs"), ["benches"])
+        self.assertEqual(get_module_path("src/tests/mod.rs"), ["tests"])
+
+    def test_integration_test_has_no_module_path(self):
+        self.assertEqual(get_module_path("tests/cli.rs"), [])
+
+
+#
+# RUN With: python manage.py test webhook_handler.test.tests_general
+#
+class TestGetCargoTestTarget(SimpleTestCase):
+    def test_library(self):
+        self.assertEqual(
+            get_cargo_test_target("core/src/parser.rs"), ("core", ["--lib"])
+        )
+
+    def test_module_named_like_a_target_dir(self):
+        self.assertEqual(get_cargo_test_target("src/examples.rs"), ("", ["--lib"]))
+        self.assertEqual(get_cargo_test_target("src/benches.rs"), ("", ["--lib"]))
+
+    def test_crate_dir_named_like_a_target_dir(self):
+        self.assertEqual(
+            get_cargo_test_target("crates/tests/src/lib.rs"),
+            ("crates/tests", ["--lib"]),
+        )
+
+    def test_other_targets(self):
+        self.assertEqual(get_cargo_test_target("tests/cli.rs"), ("", ["--test", "cli"]))
+        self.assertEqual(
+            get_cargo_test_target("src/bin/tool.rs"), ("", ["--bin", "tool"])
+        )
+        self.assertEqual(get_cargo_test_target("src/main.rs"), ("", ["--bins"]))
+        self.assertEqual(get_cargo_test_target("build.rs"), ("", []))
@@ -0,0 +1,144 @@
+import json
+
+from django.test import SimpleTestCase
+
+from webhook_handler.helper.libtest import MAX_COMPILER_ERRORS, LibtestParser
+from webhook_handler.models import TestOutcome
+from webhook_handler.test.fakes import (
+    CARGO_BUILD_OUTPUT,
+    CARGO_COMPILE_ERROR_OUTPUT,
+    cargo_test_output,
+)
+
+
+def parse(output: str, tests_to_run: list[str], timed_out: bool = False):
+    parser = LibtestParser(tests_to_run)
+    for line in output.splitlines():
+        parser.feed_line(line)
+    return parser.result(timed_out)
+
+
+#
+# RUN With: python manage.py test webhook_handler.test.tests_libtest
+#
+class TestLibtestParser(SimpleTestCase):
+    def test_text_format(self):
+        result = parse(
+            cargo_test_output({"tests::test_a": True, "tests::test_b": False}),
+            ["tests::test_a", "tests::test_b"],
+        )
+
+        self.assertTrue(result.compiled)
+        self.assertEqual(
+            [(test.name, test.outcome) for test in result.tests],
+            [
+                ("tests::test_a", TestOutcome.PASSED),
+                ("tests::test_b", TestOutcome.FAILED),
+            ],
+        )
+        self.assertEqual(result.failed, ["tests::test_b"])
+        self.assertEqual(result.panicked, ["tests::test_b"])
+        self.assertEqual(result.tests[1].message, "assertion `left == right` failed")
+        self.assertFalse(result.passed)
+
+    def test_passing_tests(self):
+        result = parse(cargo_test_output({"tests::test_a": True}), ["tests::test_a"])
+
+        self.assertTrue(result.passed)
+        self.assertEqual(result.missing, [])
+        self.assertEqual(result.compiler_errors, [])
+
+    def test_targeted_tests_which_did_not_run_are_missing(self):
+        result = parse(
+            cargo_test_output({"tests::test_a": True}),
+            ["tests::test_a", "tests::test_renamed"],
+        )
+
+        self.assertEqual(result.missing, ["tests::test_renamed"])
+        self.assertFalse(result.passed)
+
+    def test_ignored_tests_do_not_pass(self):
+        result = parse(
+            "     Running unittests src/lib.rs (target/debug/deps/shapes-0123)\n"
+            "test tests::test_a ... ignored, slow\n",
+            ["tests::test_a"],
+        )
+
+        self.assertEqual(result.tests[0].outcome, TestOutcome.IGNORED)
+        self.assertFalse(result.passed)
+
+    def test_timed_out_run_does_not_pass(self):
+        result = parse(
+            cargo_test_output({"tests::test_a": True}), ["tests::test_a"], True
+        )
+
+        self.assertTrue(result.timed_out)
+        self.assertFalse(result.passed)
+
+    def test_json_format(self):
+        events = [
+            {"type": "suite", "event": "started", "test_count": 2},
+            {"type": "test", "event": "started", "name": "tests::test_a"},
+            {"type": "test", "event": "started", "name": "tests::test_b"},
+            {"type": "test", "event": "ok", "name": "tests::test_a", "exec_time": 0.25},
+            {
+                "type": "test",
+                "event": "failed",
+                "name": "tests::test_b",
+                "exec_time": 0.5,
+                "stdout": "\nthread 'tests::test_b' panicked at src/lib.rs:20:9:\n"
+                "explicit panic\nnote: run with `RUST_BACKTRACE=1` environment variable\n",
+            },
+            {"type": "suite", "event": "failed", "passed": 1, "failed": 1},
+        ]
+        output = "\n".join(
+            ["     Running unittests src/lib.rs (target/debug/deps/shapes-0123)"]
+            + [json.dumps(event) for event in events]
+        )
+
+        result = parse(output, ["tests::test_a", "tests::test_b"])
+
+        self.assertEqual(
+            [(test.name, test.outcome, test.duration_seconds) for test in result.tests],
+            [
+                ("tests::test_a", TestOutcome.PASSED, 0.25),
+                ("tests::test_b", TestOutcome.FAILED, 0.5),
+            ],
+        )
+        self.assertEqual(result.tests[1].message, "explicit panic")
+        self.assertTrue(result.tests[1].panicked)
+
+    def test_failed_build(self):
+        parser = LibtestParser(["tests::test_a"])
+        for line in CARGO_COMPILE_ERROR_OUTPUT.splitlines():
+            parser.feed_line(line)
+        result = parser.result(False)
+
+        self.assertTrue(parser.compile_failed)
+        self.assertFalse(result.compiled)
+        self.assertEqual(result.missing, ["tests::test_a"])
+        self.assertEqual(
+            result.compiler_errors,
+            [
+                "error[E0425]: cannot find function `tripple` in this scope\n"
+                "  --> src/lib.rs:12:20\n"
+                "   |\n"
+                "12 |         assert_eq!(tripple(2), 6);\n"
+                "   |                    ^^^^^^^ help: a function with a similar name exists: `triple`"
+            ],
+        )
+
+    def test_compiler_errors_are_limited(self):
+        output = "\n\n".join(
+            f"error[E0425]: cannot find value `x{i}` in this scope" for i in range(10)
+        )
+
+        result = parse(output + "\nerror: could not compile `shapes`", [])
+
+        self.assertEqual(len(result.compiler_errors), MAX_COMPILER_ERRORS)
+
+    def test_build_without_running_tests(self):
+        result = parse(CARGO_BUILD_OUTPUT, [])
+
+        self.assertTrue(result.compiled)
+        self.assertEqual(result.tests, [])
@@ -0,0 +1,75 @@
+import random
+
+from django.test import SimpleTestCase
+
+from webhook_handler.services.line_ranges import LineRangeSet
+
+
+#
+# RUN With: python manage.py test webhook_handler.test.tests_line_ranges
+#
+class TestLineRangeSet(SimpleTestCase):
+    def test_add_merges_overlapping_and_adjacent_ranges(self):
+        lines = LineRangeSet()
+        lines.add(5, 7)
+        lines.add(10, 12)
+        lines.add(8, 9)  # adjacent to both
+        lines.add(20, 20)
+        lines.add(3, 2)  # empty
+
+        self.assertEqual(list(lines), [(5, 12), (20, 20)])
+        self.assertEqual(len(lines), 9)
+        self.assertIn(8, lines)
+        self.assertNotIn(13, lines)
+
+    def test_remove_splits_ranges(self):
+        lines = LineRangeSet()
+        lines.add(1, 10)
+        lines.add(15, 20)
+        lines.remove(4, 5)
+        lines.remove(9, 16)
+        lines.remove(30, 40)  # not part of the set
+
+        self.assertEqual(list(lines), [(1, 3), (6, 8), (17, 20)])
+
+    def test_gaps(self):
+        lines = LineRangeSet()
+        lines.add(3, 4)
+        lines.add(8, 9)
+
+        self.assertEqual(list(lines.gaps(1, 12)), [(1, 2), (5, 7), (10, 12)])
+        self.assertEqual(list(lines.gaps(3, 9)), [(5, 7)])
+        self.assertEqual(list(LineRangeSet().gaps(1, 2)), [(1, 2)])
+
+    def test_matches_python_set(self):
+        rng = random.Random(11)
+        for _ in range(200):
+            lines = LineRangeSet()
+            expected: set[int] = set()
+            for _ in range(rng.randint(1, 15)):
+                start = rng.randint(1, 50)
+                end = start + rng.randint(-1, 10)
+                if rng.random() < 0.6:
+                    lines.add(start, end)
+                    expected |= set(range(start, end + 1))
+                else:
+                    lines.remove(start, end)
+                    expected -= set(range(start, end + 1))
+
+            self.assertEqual(
+                {line for start, end in lines for line in range(start, end + 1)},
+                expected,
+            )
+            self.assertEqual(len(lines), len(expected))
+            ranges = list(lines)
+            # disjoint and not adjacent
+            for (_, end), (start, _) in zip(ranges, ranges[1:]):
+                self.assertGreater(start, end + 1)
+            self.assertEqual(
+                {
+                    line
+                    for start, end in lines.gaps(1, 70)
+                    for line in range(start, end + 1)
+                },
+                set(range(1, 71)) - expected,
+            )
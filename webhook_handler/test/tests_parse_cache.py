@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase
+
+from webhook_handler.services.parse_cache import TREE_NODE_BYTES, ParseTreeCache
+from webhook_handler.services.parser_pool import ParserPool
+
+
+def _fake_tree(nodes: int) -> SimpleNamespace:
+    return SimpleNamespace(root_node=SimpleNamespace(descendant_count=nodes))
+
+
+#
+# RUN With: python manage.py test webhook_handler.test.tests_parse_cache
+#
+class TestParseTreeCache(SimpleTestCase):
+    def setUp(self) -> None:
+        self.parsed: list[bytes] = []
+
+    def _parse(self, source: bytes) -> SimpleNamespace:
+        self.parsed.append(source)
+        return _fake_tree(1)
+
+    def test_hits_return_the_cached_tree(self):
+        cache = ParseTreeCache(max_bytes=10 * TREE_NODE_BYTES)
+
+        first = cache.get_or_parse(b"fn a() {}", self._parse)
+        second = cache.get_or_parse(b"fn a() {}", self._parse)
+
+        self.assertIs(first, second)
+        self.assertEqual(self.parsed, [b"fn a() {}"])
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_evicts_least_recently_used(self):
+        entry_bytes = 1 + TREE_NODE_BYTES
+        cache = ParseTreeCache(max_bytes=2 * entry_bytes)
+
+        cache.get_or_parse(b"a", self._parse)
+        cache.get_or_parse(b"b", self._parse)
+        cache.get_or_parse(b"a", self._parse)  # "b" is now the least recently used
+        cache.get_or_parse(b"c", self._parse)
+        cache.get_or_parse(b"a", self._parse)
+        cache.get_or_parse(b"b", self._parse)
+
+        self.assertEqual(self.parsed, [b"a", b"b", b"c", b"b"])
+        self.assertEqual(cache.evictions, 2)
+        self.assertLessEqual(cache.size_bytes, cache.max_bytes)
+
+    def test_oversized_and_failed_parses_are_not_cached(self):
+        cache = ParseTreeCache(max_bytes=TREE_NODE_BYTES)
+
+        cache.get_or_parse(b"big", lambda source: _fake_tree(100))
+        self.assertIsNone(cache.get_or_parse(b"timeout", lambda source: None))
+        cache.get_or_parse(b"big", self._parse)
+
+        self.assertEqual(self.parsed, [b"big"])
+        self.assertEqual(cache.size_bytes, 0)
+
+    def test_caches_real_trees(self):
+        pool = ParserPool(ParserPool.rust_language())
+        cache = ParseTreeCache(max_bytes=2**20)
+
+        tree = cache.get_or_parse(b"fn main() {}", pool.parse)
+
+        self.assertEqual(tree.root_node.type, "source_file")
+        self.assertIs(cache.get_or_parse(b"fn main() {}", pool.parse), tree)
@@ -0,0 +1,51 @@
+import threading
+
+from django.test import SimpleTestCase
+
+from webhook_handler.services.parser_pool import PARSE_CHUNK_BYTES, ParserPool
+
+# unbalanced brackets keep the parser in error recovery, ~0.1s for these 40 KB
+PATHOLOGICAL = b"fn f() { let x = " + b"[{<(" * 10000 + b" }\n"
+
+
+#
+# RUN With: python manage.py test webhook_handler.test.tests_parser_pool
+#
+class TestParserPool(SimpleTestCase):
+    def test_pathological_input_is_cut_off(self):
+        self.assertLess(len(PATHOLOGICAL), 64 * 1024)
+        self.assertGreater(len(PATHOLOGICAL), 10 * PARSE_CHUNK_BYTES)
+        pool = ParserPool(ParserPool.rust_language(), timeout_seconds=0.001)
+
+        self.assertIsNone(pool.parse(PATHOLOGICAL))
+
+    def test_parse_within_timeout(self):
+        pool = ParserPool(ParserPool.rust_language(), timeout_seconds=10)
+        source = b"pub fn add(a: i32, b: i32) -> i32 {\n    a + b\n}\n" * 100
+
+        tree = pool.parse(source)
+
+        self.assertFalse(tree.root_node.has_error)
+        self.assertEqual(tree.root_node.end_byte, len(source))
+        self.assertEqual(len(tree.root_node.children), 100)
+
+    def test_pool_does_not_grow_beyond_size(self):
+        pool = ParserPool(ParserPool.rust_language(), size=1)
+        parsed = threading.Event()
+
+        def parse() -> None:
+            pool.parse(b"fn f() {}\n")
+            parsed.set()
+
+        with pool.checkout():
+            thread = threading.Thread(target=parse)
+            thread.start()
+            self.assertFalse(parsed.wait(0.2))
+        thread.join(5)
+
+        self.assertTrue(parsed.is_set())
+        self.assertEqual(len(pool._idle), 1)
+
+    def test_size_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            ParserPool(ParserPool.rust_language(), size=0)
@@ -0,0 +1,73 @@
+import random
+
+from django.test import SimpleTestCase
+
+from webhook_handler.services.scope_index import ScopeIntervalIndex
+
+
+def _naive_scope_of(
+    intervals: list[tuple[int, int, str]], line: int, fallback: str = "global"
+) -> str:
+    scope = fallback
+    for start, end, name in intervals:  # the interval added last wins
+        if start <= line <= end:
+            scope = name
+    return scope
+
+
+#
+# RUN With: python manage.py test webhook_handler.test.tests_scope_index
+#
+class TestScopeIntervalIndex(SimpleTestCase):
+    def test_nested_scopes(self):
+        index = ScopeIntervalIndex(
+            [
+                (1, 30, "mod parser"),
+                (5, 20, "impl Parser"),
+                (8, 12, "fn parse"),
+                (25, 28, "fn helper"),
+            ]
+        )
+
+        self.assertEqual(index.scope_of(1), "mod parser")
+        self.assertEqual(index.scope_of(5), "impl Parser")
+        self.assertEqual(index.scope_of(10), "fn parse")
+        self.assertEqual(index.scope_of(13), "impl Parser")
+        self.assertEqual(index.scope_of(21), "mod parser")
+        self.assertEqual(index.scope_of(28), "fn helper")
+        self.assertEqual(index.scope_of(31), "global")
+        self.assertEqual(index.scope_of(40, fallback="file"), "file")
+        # mod, impl, fn, impl, mod, fn, mod
+        self.assertEqual(len(index), 7)
+
+    def test_scopes_of_sorted_lines(self):
+        index = ScopeIntervalIndex([(3, 4, "fn a"), (10, 12, "fn b")])
+
+        self.assertEqual(
+            index.scopes_of([1, 3, 4, 5, 10, 12, 13]),
+            ["global", "fn a", "fn a", "global", "fn b", "fn b", "global"],
+        )
+        self.assertEqual(index.scopes_of([]), [])
+        self.assertEqual(ScopeIntervalIndex([]).scopes_of([1, 2]), ["global"] * 2)
+
+    def test_adjacent_segments_of_the_same_scope_are_merged(self):
+        index = ScopeIntervalIndex([(1, 10, "fn a"), (4, 6, "fn a")])
+
+        self.assertEqual(len(index), 1)
+        self.assertEqual(
+            index.scopes_of(list(range(1, 12))), ["fn a"] * 10 + ["global"]
+        )
+
+    def test_matches_linear_lookup(self):
+        rng = random.Random(7)
+        for _ in range(200):
+            intervals = []
+            for i in range(rng.randint(0, 8)):
+                start = rng.randint(1, 40)
+                intervals.append((start, start + rng.randint(0, 15), f"scope{i}"))
+            index = ScopeIntervalIndex(intervals)
+            lines = sorted(rng.sample(range(1, 60), rng.randint(1, 20)))
+
+            expected = [_naive_scope_of(intervals, line) for line in lines]
+            self.assertEqual([index.scope_of(line) for line in lines], expected)
+            self.assertEqual(index.scopes_of(lines), expected)
@@ -0,0 +1,285 @@
+import subprocess
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from webhook_handler.bot_runner import BotRunner
+from webhook_handler.models import PipelineInputs, PullRequestData, SymbolKind
+from webhook_handler.services.config import Config
+from webhook_handler.services.llm_handler import LLMHandler
+from webhook_handler.services.parser_pool import ParserPool
+from webhook_handler.services.symbol_index import SymbolIndex
+from webhook_handler.test.fakes import get_payload, make_diff_context
+
+SHAPES = """pub trait Shape {
+    fn area(&self) -> f64;
+}
+
+pub struct Square {
+    pub side: f64,
+}
+
+impl Square {
+    pub fn new(side: f64) -> Self {
+        Square { side }
+    }
+}
+
+impl Shape for Square {
+    fn area(&self) -> f64 {
+        self.side * self.side
+    }
+}
+"""
+
+CIRCLE = """use crate::shapes::Shape;
+
+pub struct Circle {
+    pub radius: f64,
+}
+
+impl Shape for Circle {
+    fn area(&self) -> f64 {
+        3.14 * self.radius * self.radius
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    #[test]
+    fn test_area() {}
+}
+"""
+
+
+def _git(repo_dir: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", *args], cwd=repo_dir, capture_output=True, check=True, text=True
+    ).stdout.strip()
+
+
+def make_repo(repo_dir: Path) -> None:
+    repo_dir.mkdir(parents=True, exist_ok=True)
+    _git(repo_dir, "init", "-q")
+    _git(repo_dir, "config", "user.email", "test@example.com")
+    _git(repo_dir, "config", "user.name", "test")
+
+
+def commit(repo_dir: Path, files: dict[str, str | None]) -> str:
+    """
+    Writes (or deletes, for None) the files and commits them.
+
+    Returns:
+        str: The hash of the new commit
+    """
+
+    for name, content in files.items():
+        path = Path(repo_dir, name)
+        if content is None:
+            path.unlink()
+            continue
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+    _git(repo_dir, "add", "-A")
+    _git(repo_dir, "commit", "-q", "-m", "change")
+    return _git(repo_dir, "rev-parse", "HEAD")
+
+
+class HookedParserPool:
+    """
+    Runs a hook before the first parse, and fails the parse if the hook returns True.
+    """
+
+    def __init__(self, parser_pool: ParserPool, hook) -> None:
+        self._parser_pool = parser_pool
+        self._hook = hook
+
+    def parse(self, source: bytes):
+        hook, self._hook = self._hook, None
+        if hook is not None and hook():
+            return None
+        return self._parser_pool.parse(source)
+
+
+class SymbolIndexTestCase(SimpleTestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmp.name)
+        self.repo_dir = self.tmp / "repo"
+        self.db_path = self.tmp / "index" / "symbols.sqlite3"
+        self.parser_pool = ParserPool(ParserPool.rust_language())
+        make_repo(self.repo_dir)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _index(self, commit_sha: str) -> SymbolIndex:
+        return SymbolIndex(self.db_path, "owner/repo", commit_sha)
+
+
+#
+# RUN With: python manage.py test webhook_handler.test.tests_symbol_index
+#
+class TestSymbolIndex(SymbolIndexTestCase):
+    def test_build_and_query(self):
+        commit_sha = commit(
+            self.repo_dir, {"src/shapes.rs": SHAPES, "src/circle.rs": CIRCLE}
+        )
+        index = self._index(commit_sha)
+
+        self.assertEqual(index.build(self.repo_dir, self.parser_pool), 2)
+        self.assertTrue(index.is_built)
+        self.assertEqual(index.build(self.repo_dir, self.parser_pool), 0)
+
+        (trait,) = index.find_definitions("Shape", SymbolKind.TRAIT)
+        self.assertEqual(trait.path, "crate::shapes::Shape")
+        self.assertEqual((trait.start_line, trait.end_line), (1, 3))
+        self.assertEqual(
+            [(impl.name, impl.owner) for impl in index.find_impls("Square")],
+            [("Square", ""), ("Square", "Shape")],
+        )
+        self.assertEqual(
+            [(impl.file, impl.name) for impl in index.find_trait_impls("Shape")],
+            [("src/circle.rs", "Circle"), ("src/shapes.rs", "Square")],
+        )
+        self.assertEqual(
+            [member.name for member in index.find_members("Square")], ["new", "area"]
+        )
+        (tests,) = index.find_definitions("tests", SymbolKind.TEST_MODULE)
+        self.assertEqual(tests.path, "crate::circle::tests")
+        self.assertEqual(
+            [symbol.name for symbol in index.find_overlapping("src/shapes.rs", 16, 16)],
+            ["Square", "area"],
+        )
+
+    def test_snapshot_is_derived_from_parent(self):
+        first_sha = commit(
+            self.repo_dir, {"src/shapes.rs": SHAPES, "src/circle.rs": CIRCLE}
+        )
+        self._index(first_sha).build(self.repo_dir, self.parser_pool)
+        second_sha = commit(
+            self.repo_dir,
+            {
+                "src/shapes.rs": None,
+                "src/circle.rs": CIRCLE.replace("3.14", "std::f64::consts::PI"),
+                "src/lib.rs": "pub mod circle;\n",
+            },
+        )
+        second = self._index(second_sha)
+
+        self.assertEqual(second.build(self.repo_dir, self.parser_pool), 2)
+        self.assertEqual(second.find_definitions("Square"), [])
+        self.assertEqual(
+            [symbol.file for symbol in second.find_definitions("area")],
+            ["src/circle.rs"],
+        )
+        self.assertEqual(len(self._index(first_sha).find_definitions("area")), 3)
+
+    def test_concurrent_builders_do_not_duplicate_symbols(self):
+        first_sha = commit(self.repo_dir, {"src/shapes.rs": SHAPES})
+        second_sha = commit(self.repo_dir, {"README.md": "shapes\n"})
+        second = self._index(second_sha)
+
+        # the other builder commits the same blob while this one is parsing it
+        def build_concurrently() -> bool:
+            second.build(self.repo_dir, self.parser_pool)
+            return False
+
+        self._index(first_sha).build(
+            self.repo_dir, HookedParserPool(self.parser_pool, build_concurrently)
+        )
+
+        for commit_sha in (first_sha, second_sha):
+            self.assertEqual(len(self._index(commit_sha).find_definitions("Square")), 3)
+
+    def test_failed_parse_is_retried(self):
+        first_sha = commit(self.repo_dir, {"src/shapes.rs": SHAPES})
+        first = self._index(first_sha)
+        first.build(self.repo_dir, HookedParserPool(self.parser_pool, lambda: True))
+
+        self.assertTrue(first.is_built)
+        self.assertEqual(first.find_definitions("Square"), [])
+
+        second = self._index(commit(self.repo_dir, {"src/lib.rs": "mod shapes;\n"}))
+
+        self.assertEqual(second.build(self.repo_dir, self.parser_pool), 2)
+        self.assertEqual(len(second.find_definitions("Square")), 3)
+
+
+class TestSymbolContext(SymbolIndexTestCase):
+    def _symbol_context(self, index: SymbolIndex, changed: list) -> str:
+        config = Config()
+        config.openai_key = config.groq_key = "test"
+        pipeline_inputs = PipelineInputs(
+            pr_data=PullRequestData.from_payload(
+                get_payload("test_data/grcov/pr_1180.json")
+            ),
+            pr_diff_ctx=make_diff_context({"src/shapes.rs": (SHAPES, SHAPES)}),
+            problem_statement="",
+            changed_symbols=changed,
+        )
+        return LLMHandler(config, pipeline_inputs, index)._build_symbol_context()
+
+    def test_trait_methods_list_the_implementors(self):
+        index = self._index(
+            commit(self.repo_dir, {"src/shapes.rs": SHAPES, "src/circle.rs": CIRCLE})
+        )
+        index.build(self.repo_dir, self.parser_pool)
+        trait_method = next(
+            symbol
+            for symbol in index.find_members("Shape")
+            if symbol.file == "src/shapes.rs"
+        )
+
+        context = self._symbol_context(index, [trait_method])
+
+        self.assertIn("function crate::shapes::area (in Shape)", context)
+        self.assertIn("  impl Shape for Circle at src/circle.rs:7-11\n", context)
+        self.assertIn("  impl Shape for Square at src/shapes.rs:15-19\n", context)
+        self.assertNotIn("impl Square at", context)
+
+    def test_methods_list_the_impls_of_their_type(self):
+        index = self._index(commit(self.repo_dir, {"src/shapes.rs": SHAPES}))
+        index.build(self.repo_dir, self.parser_pool)
+        (constructor,) = index.find_definitions("new", SymbolKind.FUNCTION)
+
+        context = self._symbol_context(index, [constructor])
+
+        self.assertIn("  impl Square at src/shapes.rs:9-13\n", context)
+        self.assertIn("  impl Shape for Square at src/shapes.rs:15-19\n", context)
+
+
+class TestLoadSymbolIndex(SymbolIndexTestCase):
+    def test_clone_is_removed_after_building(self):
+        source_sha = commit(self.repo_dir, {"src/shapes.rs": SHAPES})
+        payload = get_payload("test_data/grcov/pr_1180.json")
+        payload["pull_request"]["base"]["sha"] = source_sha
+        config = Config()
+        config.symbol_index_path = str(self.db_path)
+        config.cloned_repo_dir = str(self.tmp / "clone")
+        runner = BotRunner(payload, config)
+        runner._gh_service.clone_repo = lambda: _git(
+            self.tmp, "clone", "-q", str(self.repo_dir), config.cloned_repo_dir
+        )
+
+        symbol_index = runner._load_symbol_index()
+
+        self.assertTrue(symbol_index.is_built)
+        self.assertFalse(Path(config.cloned_repo_dir).exists())
+        self.assertEqual(
+            len(symbol_index.find_definitions("Square", SymbolKind.STRUCT)), 1
+        )
+
+    def test_existing_clone_is_kept(self):
+        source_sha = commit(self.repo_dir, {"src/shapes.rs": SHAPES})
+        payload = get_payload("test_data/grcov/pr_1180.json")
+        payload["pull_request"]["base"]["sha"] = source_sha
+        config = Config()
+        config.symbol_index_path = str(self.db_path)
+        config.cloned_repo_dir = str(self.repo_dir)
+
+        symbol_index = BotRunner(payload, config)._load_symbol_index()
+
+        self.assertTrue(symbol_index.is_built)
+        self.assertTrue(self.repo_dir.exists())
@@ -0,0 +1,100 @@
+from django.test import SimpleTestCase
+from docker.errors import NotFound
+
+from webhook_handler.services.target_cache import (
+    TARGET_CACHE_LABEL,
+    TARGET_DIR,
+    TargetCache,
+)
+
+
+class FakeVolume:
+    def __init__(self, volumes: "FakeVolumes", name: str, labels: dict) -> None:
+        self._volumes = volumes
+        self.name = name
+        self.labels = labels
+
+    def remove(self) -> None:
+        del self._volumes.created[self.name]
+
+
+class FakeVolumes:
+    """
+    Keeps the volumes of a FakeDockerClient in memory.
+    """
+
+    def __init__(self) -> None:
+        self.created: dict[str, FakeVolume] = {}
+
+    def get(self, name: str) -> FakeVolume:
+        if name not in self.created:
+            raise NotFound(name)
+        return self.created[name]
+
+    def create(self, name: str, labels: dict) -> FakeVolume:
+        self.created[name] = FakeVolume(self, name, labels)
+        return self.created[name]
+
+    def list(self, filters: dict) -> list[FakeVolume]:
+        return [
+            volume
+            for volume in self.created.values()
+            if filters["label"] in volume.labels
+        ]
+
+
+class FakeDockerClient:
+    def __init__(self) -> None:
+        self.volumes = FakeVolumes()
+
+
+#
+# RUN With: python manage.py test webhook_handler.test.tests_target_cache
+#
+class TestTargetCache(SimpleTestCase):
+    def setUp(self) -> None:
+        self.client = FakeDockerClient()
+        self.cache = TargetCache(self.client, max_volumes=4, max_bytes=0)
+
+    def test_variants_of_an_image_get_separate_volumes(self):
+        pre_pr = self.cache.get_volume("image_shapes:abc-123")
+        post_pr = self.cache.get_volume("image_shapes:abc-123", "post_pr")
+
+        self.assertEqual(
+            pre_pr, {"target_image_shapes_abc-123": {"bind": TARGET_DIR, "mode": "rw"}}
+        )
+        self.assertEqual(
+            post_pr,
+            {
+                "target_image_shapes_abc-123__post_pr": {
+                    "bind": TARGET_DIR,
+                    "mode": "rw",
+                }
+            },
+        )
+        self.assertEqual(
+            {
+                name: volume.labels[TARGET_CACHE_LABEL]
+                for name, volume in self.client.volumes.created.items()
+            },
+            {
+                "target_image_shapes_abc-123": "image_shapes:abc-123",
+                "target_image_shapes_abc-123__post_pr": "image_shapes:abc-123",
+            },
+        )
+
+    def test_least_recently_used_volumes_are_evicted(self):
+        for image in ("image_a:1", "image_b:1", "image_a:1"):
+            self.cache.get_volume(image)
+            self.cache.get_volume(image, "post_pr")
+        self.cache.get_volume("image_c:1")
+
+        self.assertEqual(
+            sorted(self.client.volumes.created),
+            [
+                "target_image_a_1",
+                "target_image_a_1__post_pr",
+                "target_image_b_1__post_pr",
+                "target_image_c_1",
+            ],
+        )
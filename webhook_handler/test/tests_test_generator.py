@@ -0,0 +1,336 @@
+import os
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from webhook_handler.bot_runner import BotRunner
+from webhook_handler.helper.libtest import LibtestParser
+from webhook_handler.models import (
+    LLM,
+    AdmissionDecision,
+    EvaluationMode,
+    PipelineInputs,
+    PullRequestData,
+)
+from webhook_handler.services.config import Config
+from webhook_handler.services.cst_builder import CSTBuilder
+from webhook_handler.services.docker_service import POST_PR_TARGET, TEST_PATCH_FILE
+from webhook_handler.services.parser_pool import ParserPool
+from webhook_handler.services.test_generator import TestGenerator
+from webhook_handler.test.fakes import (
+    CARGO_BUILD_OUTPUT,
+    CARGO_COMPILE_ERROR_OUTPUT,
+    FakeDockerService,
+    FakeLLMHandler,
+    cargo_test_output,
+    get_payload,
+    make_diff_context,
+)
+
+CODE_BEFORE = """pub fn double(x: i32) -> i32 {
+    x + x + 1
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_double_zero() {
+        assert_eq!(double(0) - 1, 0);
+    }
+}
+"""
+
+GENERATED_TEST = """```rust
+#[test]
+fn test_double() {
+    assert_eq!(double(2), 4);
+}
+```"""
+
+NEW_TEST = "tests::test_double"
+
+
+class OfflineBotRunner(BotRunner):
+    """
+    Prepares the attempts from in-memory fakes instead of GitHub and Docker, the LLM always answers with GENERATED_TEST.
+    """
+
+    def __init__(
+        self,
+        payload: dict,
+        config: Config,
+        pr_diff_ctx,
+        docker_service: FakeDockerService,
+    ) -> None:
+        super().__init__(payload, config)
+        self._issue_statement = "double is off by one"
+        self._admission_decision = AdmissionDecision.ACCEPT
+        self._pr_diff_ctx = pr_diff_ctx
+        self._cst_builder = CSTBuilder(self._parser_pool, pr_diff_ctx)
+        self._docker_service = docker_service
+
+    def prepare_environment(self, curr_attempt: int, model: LLM) -> None:
+        self._config.output_dir = Path(
+            self._config.pr_log_dir, f"i{curr_attempt + 1}_{model}"
+        )
+        Path(self._config.output_dir, "generation").mkdir(parents=True)
+        self._prepare_attempt_inputs()
+        self._llm_handler = FakeLLMHandler(
+            self._config, self._pipeline_inputs, GENERATED_TEST
+        )
+
+
+class TestGeneratorTestCase(SimpleTestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.config = Config()
+        self.config.openai_key = self.config.groq_key = "test"
+        self.config.output_dir = Path(self._tmp.name)
+        Path(self.config.output_dir, "generation").mkdir()
+        self.pr_data = PullRequestData.from_payload(
+            get_payload("test_data/grcov/pr_1180.json")
+        )
+        self.pr_diff_ctx = make_diff_context(
+            {"src/lib.rs": (CODE_BEFORE, CODE_BEFORE.replace("x + x + 1", "x * 2"))}
+        )
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _make_generator(
+        self,
+        docker_service: FakeDockerService,
+        compiler_errors: list | None = None,
+        response: str = GENERATED_TEST,
+        parse_timeout_seconds: float = 0,
+    ) -> TestGenerator:
+        pipeline_inputs = PipelineInputs(
+            pr_data=self.pr_data,
+            pr_diff_ctx=self.pr_diff_ctx,
+            problem_statement="double is off by one",
+            filename_to_insert_test=self.pr_diff_ctx.code_names[0],
+            test_file_content=self.pr_diff_ctx.code_before[0],
+            compiler_errors=compiler_errors,
+        )
+        self.llm_handler = FakeLLMHandler(self.config, pipeline_inputs, response)
+        return TestGenerator(
+            self.config,
+            pipeline_inputs,
+            False,
+            None,
+            CSTBuilder(
+                ParserPool(
+                    ParserPool.rust_language(), timeout_seconds=parse_timeout_seconds
+                ),
+                self.pr_diff_ctx,
+            ),
+            docker_service,
+            self.llm_handler,
+            0,
+            LLM.GPT4o,
+        )
+
+    def _docker_service(self, passes_before: bool, passes_after: bool):
+        return FakeDockerService(
+            self.pr_data,
+            cargo_test_output({NEW_TEST: passes_before}),
+            cargo_test_output({NEW_TEST: passes_after}),
+        )
+
+
+#
+# RUN With: python manage.py test webhook_handler.test.tests_test_generator
+#
+class TestTestGenerator(TestGeneratorTestCase):
+    def test_default_evaluation_mode_is_separate(self):
+        # an empty value counts as unset, and keeps load_dotenv from setting one from .env
+        with mock.patch.dict(os.environ, {"EVALUATION_MODE": ""}):
+            self.assertEqual(Config().evaluation_mode, EvaluationMode.SEPARATE)
+
+    def test_compile_check_is_on_unless_disabled(self):
+        for value, compile_check in [("", True), ("true", True), ("0", False)]:
+            with self.subTest(value=value):
+                with mock.patch.dict(os.environ, {"COMPILE_CHECK": value}):
+                    self.assertEqual(Config().compile_check, compile_check)
+
+    def test_fail_to_pass_test_in_every_evaluation_mode(self):
+        expected_runs = {
+            EvaluationMode.SEPARATE: [
+                ("compile.sh", "compile"),
+                ("run.sh", "before"),
+                ("run.sh", "after"),
+            ],
+            EvaluationMode.INCREMENTAL: [
+                ("compile.sh", "compile"),
+                ("before.sh", "before"),
+                ("after.sh", "after"),
+            ],
+            EvaluationMode.CONCURRENT: [
+                ("compile.sh", "compile"),
+                ("run.sh", "after"),
+                ("run.sh", "before"),
+            ],
+        }
+        for mode, runs in expected_runs.items():
+            with self.subTest(mode=mode):
+                self.config.evaluation_mode = mode
+                docker_service = self._docker_service(False, True)
+
+                self.assertTrue(self._make_generator(docker_service).generate())
+                self.assertEqual(
+                    (
+                        docker_service.runs[:1] + sorted(docker_service.runs[1:])
+                        if mode == EvaluationMode.CONCURRENT
+                        else docker_service.runs
+                    ),
+                    runs,
+                )
+
+    def test_post_pr_runs_use_their_own_target_volume(self):
+        for mode in EvaluationMode:
+            with self.subTest(mode=mode):
+                self.config.evaluation_mode = mode
+                docker_service = self._docker_service(False, True)
+
+                self.assertTrue(self._make_generator(docker_service).generate())
+                compile_check, *runs = docker_service.containers
+                self.assertEqual(compile_check.target_variant, POST_PR_TARGET)
+                if mode == EvaluationMode.INCREMENTAL:
+                    # the golden patch is applied in the container of the pre-PR run
+                    self.assertEqual([run.target_variant for run in runs], [""])
+                else:
+                    self.assertEqual(
+                        sorted(
+                            (run.golden_code_applied, run.target_variant)
+                            for run in runs
+                        ),
+                        [(False, ""), (True, POST_PR_TARGET)],
+                    )
+
+    def test_test_is_inserted_into_the_test_module(self):
+        docker_service = self._docker_service(False, True)
+
+        self.assertTrue(self._make_generator(docker_service).generate())
+
+        test_patch = docker_service.containers[0].files[TEST_PATCH_FILE]
+        self.assertTrue(
+            test_patch.startswith(
+                "diff --git a/src/lib.rs b/src/lib.rs\n--- a/src/lib.rs\n+++ b/src/lib.rs\n"
+            )
+        )
+        self.assertIn(
+            "         assert_eq!(double(0) - 1, 0);\n"
+            "     }\n"
+            "+\n"
+            "+    #[test]\n"
+            "+    fn test_double() {\n"
+            "+        assert_eq!(double(2), 4);\n"
+            "+    }\n"
+            " }\n",
+            test_patch,
+        )
+        log_before = Path(self.config.output_dir, "generation", "before.txt")
+        self.assertIn(f"test {NEW_TEST} ... FAILED", log_before.read_text())
+
+    def test_test_passing_before_is_rejected(self):
+        for mode in EvaluationMode:
+            with self.subTest(mode=mode):
+                self.config.evaluation_mode = mode
+                docker_service = self._docker_service(True, True)
+
+                self.assertFalse(self._make_generator(docker_service).generate())
+                self.assertIn(("compile.sh", "compile"), docker_service.runs)
+                self.assertIn(docker_service.runs[1][0], {"run.sh", "before.sh"})
+                if mode != EvaluationMode.CONCURRENT:
+                    self.assertEqual(len(docker_service.runs), 2)
+
+    def test_test_failing_after_is_rejected(self):
+        generator = self._make_generator(self._docker_service(False, False))
+
+        self.assertFalse(generator.generate())
+        self.assertIsNone(generator.compiler_errors)
+
+    def test_test_file_which_timed_out_is_not_run(self):
+        docker_service = self._docker_service(False, True)
+        self.pr_diff_ctx = make_diff_context(
+            {"src/lib.rs": (CODE_BEFORE * 10, CODE_BEFORE * 10 + "\n")}
+        )
+
+        generator = self._make_generator(docker_service, parse_timeout_seconds=1e-9)
+
+        self.assertFalse(generator.generate())
+        self.assertEqual(docker_service.containers, [])
+
+    def test_response_without_test_function_is_not_run(self):
+        docker_service = self._docker_service(False, True)
+        generator = self._make_generator(
+            docker_service,
+            response="fn check_double() {\n    assert_eq!(double(2), 4);\n}\n",
+        )
+
+        self.assertFalse(generator.generate())
+        self.assertEqual(docker_service.runs, [])
+        self.assertEqual(docker_service.containers, [])
+
+
+class TestCompilerErrorFeedback(TestGeneratorTestCase):
+    def test_libtest_parser_keeps_the_errors_of_a_failed_build(self):
+        parser = LibtestParser([NEW_TEST])
+        for line in CARGO_COMPILE_ERROR_OUTPUT.splitlines():
+            parser.feed_line(line)
+
+        result = parser.result(timed_out=False)
+
+        self.assertTrue(parser.compile_failed)
+        self.assertFalse(result.compiled)
+        self.assertEqual(len(result.compiler_errors), 1)
+        self.assertTrue(
+            result.compiler_errors[0].startswith(
+                "error[E0425]: cannot find function `tripple` in this scope\n"
+                "  --> src/lib.rs:12:20\n"
+            )
+        )
+        self.assertNotIn("unused variable", result.compiler_errors[0])
+
+    def test_compiler_errors_reach_the_next_prompt(self):
+        self.config.pr_log_dir = Path(self._tmp.name, "pr")
+        self.config.gen_test_dir = Path(self._tmp.name, "generated_tests")
+        self.config.gen_test_dir.mkdir()
+        docker_service = FakeDockerService(
+            self.pr_data,
+            cargo_test_output({NEW_TEST: False}),
+            cargo_test_output({NEW_TEST: True}),
+            compile_output=CARGO_COMPILE_ERROR_OUTPUT,
+        )
+        runner = OfflineBotRunner(
+            get_payload("test_data/grcov/pr_1180.json"),
+            self.config,
+            self.pr_diff_ctx,
+            docker_service,
+        )
+
+        self.assertFalse(runner.execute_runner(0, LLM.GPT4o))
+        self.assertEqual(docker_service.runs, [("compile.sh", "compile")])
+        self.assertEqual(len(runner._compiler_errors), 1)
+
+        docker_service._compile_output = CARGO_BUILD_OUTPUT
+        self.assertTrue(runner.execute_runner(1, LLM.GPT4o))
+        self.assertIsNone(runner._compiler_errors)
+
+        prompts = [
+            Path(
+                self.config.pr_log_dir, attempt, "generation", "prompt.txt"
+            ).read_text()
+            for attempt in ("i1_gpt-4o", "i2_gpt-4o")
+        ]
+        self.assertNotIn("<compiler_errors>", prompts[0])
+        self.assertIn(
+            "The test of the previous attempt did not compile:\n<compiler_errors>\n"
+            "error[E0425]: cannot find function `tripple` in this scope\n",
+            prompts[1],
+        )
+        self.assertNotIn("unused variable", prompts[1])